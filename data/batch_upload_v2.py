@@ -391,6 +391,19 @@ def ensure_base_tables(conn):
             FOREIGN KEY (biz_no) REFERENCES Company_Basic (biz_no)
         )
     ''')
+
+    # Company_Financial_Latest (latest fiscal year per company, used by search/detail in web_app.py)
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS Company_Financial_Latest (
+            biz_no VARCHAR(12) PRIMARY KEY,
+            fiscal_year INTEGER,
+            rating1 VARCHAR(20),
+            total_assets BIGINT,
+            sales_revenue BIGINT,
+            retained_earnings BIGINT
+        )
+    ''')
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_fin_latest_retained ON Company_Financial_Latest(retained_earnings)")
     conn.commit()
 
     # [Migration] Ensure jibun_address exists in Company_Basic
@@ -718,6 +731,8 @@ def process_company_basic(conn, df, execute=False, global_current=0, global_tota
             print(json.dumps({"type": "error", "message": error_msg}), flush=True)
             sys.exit(1)
     if execute: conn.commit()
+    if execute and (insert_data_list or update_data_list):
+        optimize_search_index(conn)
     log(f"  Inserted: {count_inserted}, Updated: {count_updated}, Errors: {count_error}")
     json_result("Company_Basic_Inserted", count_inserted)
     json_result("Company_Basic_Updated", count_updated)
@@ -939,6 +954,58 @@ def process_company_shareholder(conn, df, execute=False, global_current=0, globa
     progress_event("table_done", "Company_Shareholder", inserted=count_inserted, updated=0, error=count_error)
     return global_current
 
+def optimize_search_index(conn):
+    """Merge the FTS5 segments written by the Company_Basic sync triggers (web_app.ensure_search_indexes) after a bulk upload"""
+    cursor = conn.cursor()
+    cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='Company_Search_FTS'")
+    if not cursor.fetchone():
+        return
+    try:
+        log("  Optimizing Company_Search_FTS...")
+        cursor.execute("INSERT INTO Company_Search_FTS(Company_Search_FTS) VALUES ('optimize')")
+        conn.commit()
+    except Exception as e:
+        log(f"  [Warn] Company_Search_FTS optimize failed: {e}")
+
+def refresh_financial_latest(conn, biz_nos):
+    """Re-derive Company_Financial_Latest rows for the given companies (same logic as web_app.refresh_company_financial_latest)"""
+    keys = [(b,) for b in set(biz_nos) if b]
+    if not keys:
+        return
+    cursor = conn.cursor()
+    CHUNK = 500
+    for i in range(0, len(keys), CHUNK):
+        chunk = keys[i:i + CHUNK]
+        cursor.executemany("DELETE FROM Company_Financial_Latest WHERE biz_no = ?", chunk)
+        cursor.executemany('''
+            INSERT OR REPLACE INTO Company_Financial_Latest (biz_no, fiscal_year, rating1, total_assets, sales_revenue, retained_earnings)
+            SELECT biz_no, fiscal_year, rating1, total_assets, sales_revenue, retained_earnings
+            FROM Company_Financial
+            WHERE biz_no = ?
+            ORDER BY fiscal_year DESC
+            LIMIT 1
+        ''', chunk)
+    conn.commit()
+
+def refresh_system_stats(conn):
+    """Recount the dashboard counters kept in system_stats (see web_app.ensure_system_stats)"""
+    cursor = conn.cursor()
+    cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='system_stats'")
+    if not cursor.fetchone():
+        return
+    now = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    for stat_key, table in [('company_basic_count', 'Company_Basic'), ('contact_history_count', 'Contact_History')]:
+        try:
+            count = cursor.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+        except sqlite3.OperationalError:
+            continue
+        cursor.execute('''
+            INSERT INTO system_stats (stat_key, stat_value, updated_at) VALUES (?, ?, ?)
+            ON CONFLICT(stat_key) DO UPDATE SET stat_value = excluded.stat_value, updated_at = excluded.updated_at
+        ''', (stat_key, count, now))
+    conn.commit()
+    log("  system_stats counters refreshed")
+
 def process_company_financial(conn, df, execute=False, global_current=0, global_total=0):
     log("Processing Company_Financial...")
     if 'biz_no' in df.columns:
@@ -1022,6 +1089,11 @@ def process_company_financial(conn, df, execute=False, global_current=0, global_
             sys.exit(1)
 
     if execute: conn.commit()
+
+    if execute and keys_to_delete:
+        log(f"  Refreshing Company_Financial_Latest for uploaded companies...")
+        refresh_financial_latest(conn, [k[0] for k in keys_to_delete])
+
     log(f"  Processed: {count_inserted}, Errors: {count_error}")
     json_result("Company_Financial_Inserted", count_inserted)
     json_result("Company_Financial_Updated", 0)
@@ -1187,6 +1259,8 @@ def main():
     if table_data["Company_Additional"] is not None:
         global_current = process_generic_table(conn, table_data["Company_Additional"], "Company_Additional", ["biz_no"], execute=(mode == 'execute'), global_current=global_current, global_total=global_total)
 
+    if conn and mode == 'execute':
+        refresh_system_stats(conn)
     if conn:
         conn.close()
     
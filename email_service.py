@@ -11,7 +11,12 @@ import re
 import base64
 from datetime import datetime
 import uuid
+import io
+import sys
+import json
+import socket
 import threading
+import queue
 import time
 import sqlite3
 import pytz
@@ -83,19 +88,674 @@ def _initialize_db_path():
 
 _initialize_db_path()
 
+# --- 커넥션 풀 ---
+# 물리 연결을 재사용하여 PRAGMA 설정/파일 open 비용을 요청마다 반복하지 않습니다.
+# Flask 요청(앱 컨텍스트) 안에서는 g 에 묶어 같은 요청의 get_db_connection() 호출이 하나의 연결을 공유합니다.
+try:
+    from flask import g, has_app_context
+except ImportError:  # 워커 등 Flask 없이 실행되는 경우
+    g = None
+    def has_app_context():
+        return False
+
+DB_POOL_MAX_IDLE = int(os.environ.get('DB_POOL_MAX_IDLE', 8))  # 유휴 연결 최대 보관 수
+DB_CACHE_SIZE_KB = int(os.environ.get('DB_CACHE_SIZE_KB', 20000))  # 연결당 페이지 캐시 (KB)
+DB_MMAP_SIZE = int(os.environ.get('DB_MMAP_SIZE', 256 * 1024 * 1024))  # 메모리 맵 읽기 크기 (bytes)
+DB_STATEMENT_CACHE = int(os.environ.get('DB_STATEMENT_CACHE', 256))  # 연결당 준비된 statement 캐시 수
+
+class PooledConnection(sqlite3.Connection):
+    """close() 시 실제로 닫지 않고 풀에 반환하는 sqlite3 연결"""
+
+    def close(self):
+        _db_pool.release(self)
+
+    def really_close(self):
+        sqlite3.Connection.close(self)
+
+class ConnectionPool:
+    def __init__(self, max_idle=DB_POOL_MAX_IDLE):
+        self.max_idle = max_idle
+        self._idle = []
+        self._lock = threading.Lock()
+        self._generation = 0  # reset() 시 증가, 이전 세대 연결은 반환 시 폐기
+        self.stats = {'created': 0, 'reused': 0, 'released': 0, 'discarded': 0, 'in_use': 0}
+
+    def _connect(self, timeout):
+        conn = sqlite3.connect(DB_PATH, check_same_thread=False, timeout=timeout, factory=PooledConnection,
+                               cached_statements=DB_STATEMENT_CACHE)
+        try:
+            # 물리 연결당 1회만 적용
+            conn.execute("PRAGMA journal_mode=WAL;")  # 읽기/쓰기 동시성 향상
+            conn.execute("PRAGMA synchronous=NORMAL;")
+            conn.execute(f"PRAGMA cache_size=-{DB_CACHE_SIZE_KB};")
+            conn.execute(f"PRAGMA mmap_size={DB_MMAP_SIZE};")
+            conn.execute("PRAGMA temp_store=MEMORY;")  # ORDER BY/GROUP BY 임시 B-tree 를 메모리에
+        except Exception as e:
+            print(f"[DB_CONFIG] PRAGMA failed: {str(e)}")
+        conn._pool_generation = self._generation
+        self.stats['created'] += 1
+        return conn
+
+    def acquire(self, timeout=30):
+        with self._lock:
+            conn = self._idle.pop() if self._idle else None
+            if conn is not None:
+                self.stats['reused'] += 1
+            self.stats['in_use'] += 1
+        if conn is None:
+            conn = self._connect(timeout)
+        elif conn._pool_timeout != timeout:
+            conn.execute(f"PRAGMA busy_timeout={int(timeout * 1000)}")
+        conn._pool_timeout = timeout
+        conn._pool_refs = 1
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def release(self, conn):
+        refs = getattr(conn, '_pool_refs', 0)
+        if refs <= 0:
+            return  # 이미 반환된 연결
+        conn._pool_refs = refs - 1
+        if conn._pool_refs > 0:
+            # 같은 요청 안에서 아직 사용 중. 공유는 트랜잭션이 없을 때만 하므로,
+            # 남은 미커밋 변경은 이 연결을 빌려 간 쪽의 것 → 별도 연결을 닫을 때처럼 폐기
+            if conn.in_transaction:
+                conn.rollback()
+            return
+        if has_app_context() and g.get('_db_conn') is conn:
+            g.pop('_db_conn', None)
+        try:
+            if conn.in_transaction:
+                # 커밋하지 않은 변경은 닫을 때와 동일하게 폐기
+                conn.rollback()
+        except sqlite3.Error:
+            conn._pool_generation = -1
+        with self._lock:
+            self.stats['in_use'] -= 1
+            self.stats['released'] += 1
+            if conn._pool_generation == self._generation and len(self._idle) < self.max_idle:
+                self._idle.append(conn)
+                return
+            self.stats['discarded'] += 1
+        conn.really_close()
+
+    def reset(self):
+        """
+        유휴 연결을 모두 닫습니다. (사용 중인 연결은 반환 시 닫힘)
+        다른 스레드/프로세스의 연결은 그대로이므로 DB 파일을 직접 교체하기 위한 준비로는 충분하지 않습니다.
+        DB 교체는 upload_database 처럼 sqlite3 backup API 로 운영 DB 에 복사하세요.
+        """
+        with self._lock:
+            idle, self._idle = self._idle, []
+            self._generation += 1
+        for conn in idle:
+            conn.really_close()
+
+    def get_stats(self):
+        with self._lock:
+            return dict(self.stats, idle=len(self._idle), max_idle=self.max_idle)
+
+_db_pool = ConnectionPool()
+
 def get_db_connection(timeout=30):
-    """데이터베이스 연결을 반환합니다. WAL 모드 활성화로 동시성 강화."""
-    conn = sqlite3.connect(DB_PATH, check_same_thread=False, timeout=timeout)
-    conn.row_factory = sqlite3.Row
-    try:
-        # WAL 모드 활성화: 읽기/쓰기 동시성 대폭 향상
-        conn.execute("PRAGMA journal_mode=WAL;")
-        conn.execute("PRAGMA synchronous=NORMAL;")
-    except Exception as e:
-        print(f"[DB_CONFIG] PRAGMA failed: {str(e)}")
-    return conn
+    """
+    데이터베이스 연결을 반환합니다. (커넥션 풀, WAL 모드)
+    Flask 요청 안에서는 같은 요청의 호출이 하나의 연결을 공유하며, close() 는 풀에 반환합니다.
+    단, 공유 연결에 커밋하지 않은 변경이 있으면 별도 연결을 반환합니다.
+    (호출된 함수의 commit/rollback 이 호출자의 미완료 변경을 커밋하거나 버리지 않도록)
+    """
+    if has_app_context():
+        conn = g.get('_db_conn')
+        if conn is not None:
+            if conn.in_transaction:
+                return _db_pool.acquire(timeout)
+            conn._pool_refs += 1
+            return conn
+        conn = _db_pool.acquire(timeout)
+        g._db_conn = conn
+        return conn
+    return _db_pool.acquire(timeout)
+
+def release_request_connection(exception=None):
+    """요청 종료 시 close() 되지 않은 요청 연결을 풀에 반환합니다. (Flask teardown_appcontext 용)"""
+    conn = g.pop('_db_conn', None) if g is not None else None
+    if conn is not None and conn._pool_refs > 0:
+        conn._pool_refs = 1
+        _db_pool.release(conn)
+
+def get_db_pool_stats():
+    return _db_pool.get_stats()
+
+def reset_db_pool():
+    _db_pool.reset()
 # ---------------------------------------------
 
+# --- SMTP 발송 엔진 ---
+# 공급자별 초당 발송량(토큰 버킷)과 발송 계정당 동시 SMTP 연결 수입니다.
+# 환경변수 SMTP_RATE_<공급자>, SMTP_BURST_<공급자>, SMTP_CONNECTIONS_<공급자> 로 조정합니다. (예: SMTP_RATE_GMAIL=1.5)
+# 발송량(rate/burst)은 DB(smtp_rate_state)에 발송 계정별로 기록하므로 같은 DB 를 쓰는 모든 프로세스
+# (gunicorn 워커들, 외부 워커)가 함께 지킵니다. connections 는 프로세스(배치)별 상한입니다.
+SMTP_PROVIDER_LIMITS = {
+    'gmail': {'rate': 2.0, 'burst': 5, 'connections': 3},
+    'naver': {'rate': 1.0, 'burst': 3, 'connections': 2},
+    'daum': {'rate': 1.0, 'burst': 3, 'connections': 2},
+    'default': {'rate': 2.0, 'burst': 5, 'connections': 3},
+}
+EMAIL_RESULT_FLUSH_SIZE = int(os.environ.get('EMAIL_RESULT_FLUSH_SIZE', 50))  # 결과 버퍼 flush 단위 (건)
+EMAIL_RESULT_FLUSH_INTERVAL = float(os.environ.get('EMAIL_RESULT_FLUSH_INTERVAL', 3))  # 결과 버퍼 flush 주기 (초)
+EMAIL_RESULT_FLUSH_RETRIES = int(os.environ.get('EMAIL_RESULT_FLUSH_RETRIES', 6))  # 마지막 flush 재시도 횟수
+EMAIL_RESULT_RETRY_BASE = 0.5  # flush 실패 시 재시도 대기 (초, 실패할 때마다 2배, 최대 30초)
+BATCH_PROGRESS_RETENTION = 3600  # 끝난 배치의 진행 정보를 메모리에 보관하는 시간 (초)
+
+def get_smtp_provider(smtp_server):
+    """SMTP 서버 주소로 공급자(gmail/naver/daum/default)를 판별합니다."""
+    host = (smtp_server or '').lower()
+    if 'gmail' in host or 'google' in host:
+        return 'gmail'
+    if 'naver' in host:
+        return 'naver'
+    if 'daum' in host or 'hanmail' in host or 'kakao' in host:
+        return 'daum'
+    return 'default'
+
+def get_provider_limits(provider):
+    """공급자별 발송 한도 (환경변수 설정 우선)"""
+    limits = dict(SMTP_PROVIDER_LIMITS.get(provider, SMTP_PROVIDER_LIMITS['default']))
+    key = provider.upper()
+    limits['rate'] = float(os.environ.get(f'SMTP_RATE_{key}', limits['rate']))
+    limits['burst'] = int(os.environ.get(f'SMTP_BURST_{key}', limits['burst']))
+    limits['connections'] = max(1, int(os.environ.get(f'SMTP_CONNECTIONS_{key}', limits['connections'])))
+    return limits
+
+class TokenBucket:
+    """초당 rate 개의 토큰이 채워지고 최대 capacity 개까지 쌓이는 발송 속도 제한기 (스레드 안전)"""
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self, stop_event=None):
+        """토큰 1개를 얻을 때까지 대기합니다. stop_event 가 설정되면 False 를 반환합니다."""
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return True
+                wait = (1 - self.tokens) / self.rate
+            if stop_event is None:
+                time.sleep(wait)
+            elif stop_event.wait(wait):
+                return False
+
+class SharedTokenBucket:
+    """
+    TokenBucket 과 같은 한도를 DB(smtp_rate_state)에 기록해 여러 프로세스가 함께 지키는 발송 속도 제한기
+    (GCRA: 발송 계정별 다음 예정 시각 tat 를 BEGIN IMMEDIATE 트랜잭션으로 예약)
+    DB 를 쓸 수 없으면 이 프로세스의 TokenBucket 으로 제한합니다.
+    """
+
+    def __init__(self, key, rate, capacity):
+        self.key = key
+        self.interval = 1.0 / rate
+        self.tolerance = (capacity - 1) * self.interval  # 연속 발송 허용량 (burst)
+        self.local = TokenBucket(rate, capacity)
+
+    def _reserve(self):
+        """발송 슬롯 1개를 예약하고 그 시각까지 기다려야 하는 초를 반환합니다."""
+        conn = get_db_connection(timeout=5)
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute("SELECT tat FROM smtp_rate_state WHERE sender_key = ?", (self.key,)).fetchone()
+            now = time.time()
+            tat = max(row[0] if row else now, now)
+            conn.execute('''
+                INSERT INTO smtp_rate_state (sender_key, tat) VALUES (?, ?)
+                ON CONFLICT(sender_key) DO UPDATE SET tat = excluded.tat
+            ''', (self.key, tat + self.interval))
+            conn.commit()
+            return max(0.0, tat - self.tolerance - now)
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+
+    def acquire(self, stop_event=None):
+        """슬롯을 얻을 때까지 대기합니다. stop_event 가 설정되면 False 를 반환합니다."""
+        try:
+            wait = self._reserve()
+        except sqlite3.Error as e:
+            print(f"[SharedTokenBucket] {self.key} DB 예약 실패, 프로세스 내 제한 사용: {e}")
+            return self.local.acquire(stop_event)
+        if wait <= 0:
+            return True
+        if stop_event is None:
+            time.sleep(wait)
+            return True
+        return not stop_event.wait(wait)
+
+def ensure_smtp_rate_table(cursor):
+    """발송 계정별 발송 속도 상태 테이블(smtp_rate_state)을 생성합니다."""
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS smtp_rate_state (
+            sender_key TEXT PRIMARY KEY,
+            tat REAL
+        )
+    ''')
+
+_rate_limiters = {}
+_rate_limiters_lock = threading.Lock()
+
+def get_rate_limiter(provider, sender_email):
+    """발송 계정별 속도 제한기 (같은 계정의 동시 배치는 프로세스와 관계없이 한도를 함께 사용)"""
+    key = (provider, (sender_email or '').lower())
+    with _rate_limiters_lock:
+        limiter = _rate_limiters.get(key)
+        if limiter is None:
+            limits = get_provider_limits(provider)
+            limiter = _rate_limiters[key] = SharedTokenBucket(':'.join(key), limits['rate'], limits['burst'])
+        return limiter
+
+# 발송 중인 배치의 진행 상황 (프로세스 메모리). /api/email/batch-status 는 여기 있으면 DB 를 조회하지 않습니다.
+_batch_progress = {}  # {batch_id: {'status', 'total_count', 'sent_count', 'success_count', 'fail_count', 'last_error', 'finished_at'}}
+_batch_progress_lock = threading.Lock()
+
+def set_batch_progress(batch_id, **fields):
+    """배치 진행 정보를 갱신합니다. (끝난 지 BATCH_PROGRESS_RETENTION 초가 지난 항목은 정리)"""
+    now = time.time()
+    with _batch_progress_lock:
+        progress = _batch_progress.setdefault(batch_id, {
+            'status': 'in_progress', 'total_count': 0, 'sent_count': 0,
+            'success_count': 0, 'fail_count': 0, 'last_error': None, 'finished_at': None
+        })
+        progress.update(fields)
+        for key in [key for key, value in _batch_progress.items()
+                    if value['finished_at'] and now - value['finished_at'] > BATCH_PROGRESS_RETENTION]:
+            del _batch_progress[key]
+
+def clear_batch_progress(batch_id):
+    """이 프로세스가 더 이상 발송하지 않는 배치의 진행 정보를 지웁니다. (다른 워커가 이어받은 경우)"""
+    with _batch_progress_lock:
+        _batch_progress.pop(batch_id, None)
+
+def get_batch_progress(batch_id):
+    """이 프로세스에서 발송 중(또는 최근 완료)인 배치의 진행 정보 사본. 없으면 None."""
+    with _batch_progress_lock:
+        progress = _batch_progress.get(batch_id)
+        return dict(progress) if progress else None
+
+# Company_Basic 의 메일 상태(email_usable, last_send_status 등)가 바뀌면 알릴 콜백 (web_app 의 기업 정보 캐시 무효화 등)
+_company_change_listeners = []
+
+def add_company_change_listener(callback):
+    """callback(biz_nos) 를 등록합니다. biz_nos 가 None 이면 전체가 바뀌었을 수 있다는 뜻입니다."""
+    if callback not in _company_change_listeners:
+        _company_change_listeners.append(callback)
+
+def notify_company_changed(biz_nos=None):
+    """Company_Basic 갱신을 커밋한 뒤 호출합니다. (콜백 오류는 기록만 하고 무시)"""
+    for callback in list(_company_change_listeners):
+        try:
+            callback(biz_nos)
+        except Exception as e:
+            print(f"[notify_company_changed] Error: {e}")
+
+class EmailResultBuffer:
+    """
+    발송 결과를 메모리에 모았다가 flush_size 건 또는 flush_interval 초마다 한 트랜잭션으로 기록합니다.
+    (email_send_log / Company_Basic 은 executemany, send_batches 진행 건수는 flush 당 1회)
+    진행 건수는 결과마다 메모리(_batch_progress)에만 반영합니다.
+    기록에 실패하면(database is locked 등) 결과를 버퍼 앞에 되돌려 놓고 백오프 후 다시 기록합니다.
+    """
+
+    def __init__(self, batch_id, group_name, total=0, flush_size=EMAIL_RESULT_FLUSH_SIZE,
+                 flush_interval=EMAIL_RESULT_FLUSH_INTERVAL):
+        self.batch_id = batch_id
+        self.group_name = group_name
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self.pending = []
+        self.sent_count = 0
+        self.success_count = 0
+        self.fail_count = 0
+        self.lock = threading.Lock()        # pending/카운터 보호 (발송 스레드는 짧게만 대기)
+        self.flush_lock = threading.Lock()  # DB 기록 순서 보장
+        self._stop = threading.Event()
+        self._flusher = None
+        self._failures = 0
+        self._retry_at = 0
+        set_batch_progress(batch_id, total_count=total)
+
+    def resume(self):
+        """
+        재시작 전에 이미 기록된 결과로 카운터를 복원하고, 결과가 기록된 biz_no 집합을 반환합니다.
+        (flush 되지 않았던 마지막 결과분은 다시 발송될 수 있음)
+        """
+        conn = get_db_connection()
+        try:
+            rows = conn.execute("SELECT biz_no, status FROM email_send_log WHERE batch_id = ?", (self.batch_id,)).fetchall()
+        finally:
+            conn.close()
+        with self.lock:
+            self.sent_count = len(rows)
+            self.success_count = sum(1 for row in rows if row[1] == 'SUCCESS')
+            self.fail_count = self.sent_count - self.success_count
+            set_batch_progress(self.batch_id, sent_count=self.sent_count,
+                               success_count=self.success_count, fail_count=self.fail_count)
+        return {row[0] for row in rows}
+
+    def start(self):
+        """flush_interval 초마다 남은 결과를 기록하는 스레드를 시작합니다."""
+        def _run():
+            while not self._stop.wait(self.flush_interval):
+                self.flush()
+        self._flusher = threading.Thread(target=_run, name=f'email-result-flush-{self.batch_id[:8]}', daemon=True)
+        self._flusher.start()
+        return self
+
+    def close(self):
+        """주기 flush 를 멈추고 남은 결과를 모두 기록합니다. 재시도 후에도 실패하면 False."""
+        self._stop.set()
+        if self._flusher:
+            self._flusher.join()
+        for attempt in range(EMAIL_RESULT_FLUSH_RETRIES + 1):
+            if self.flush(force=True):
+                return True
+            if attempt < EMAIL_RESULT_FLUSH_RETRIES:
+                time.sleep(min(EMAIL_RESULT_RETRY_BASE * 2 ** attempt, 30))
+        print(f"[EmailResultBuffer] 결과 {len(self.pending)}건 기록 실패 (batch {self.batch_id})")
+        return False
+
+    def add(self, biz_no, email, subject, status, error=None, is_bounce=False):
+        with self.lock:
+            # sent_at 은 기존 DEFAULT CURRENT_TIMESTAMP 와 같은 UTC 형식으로, flush 시점이 아닌 발송 시점을 기록
+            self.pending.append((biz_no, email, subject, status, error, is_bounce,
+                                 datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S'),
+                                 get_kst_now().strftime('%Y-%m-%d %H:%M:%S')))
+            self.sent_count += 1
+            if status == 'SUCCESS':
+                self.success_count += 1
+            else:
+                self.fail_count += 1
+            set_batch_progress(self.batch_id, sent_count=self.sent_count,
+                               success_count=self.success_count, fail_count=self.fail_count)
+            should_flush = len(self.pending) >= self.flush_size
+        if should_flush:
+            self.flush()
+
+    def flush(self, force=False):
+        """
+        모인 결과를 기록합니다. 실패하면 결과를 버퍼 앞에 되돌리고 재시도 시각을 미룹니다.
+        force 가 아니면 재시도 대기 중에는 건너뜀. 반환: 남은 결과가 없으면 True
+        """
+        with self.flush_lock:
+            with self.lock:
+                if not self.pending:
+                    return True
+                if not force and time.time() < self._retry_at:
+                    return False
+                rows, self.pending = self.pending, []
+                counts = (self.sent_count, self.success_count, self.fail_count)
+            if self._write(rows, counts):
+                self._failures = 0
+                self._retry_at = 0
+                return True
+            with self.lock:
+                self.pending = rows + self.pending
+                self._failures += 1
+                self._retry_at = time.time() + min(EMAIL_RESULT_RETRY_BASE * 2 ** self._failures, 30)
+            return False
+
+    def _write(self, rows, counts):
+        conn = get_db_connection()
+        try:
+            cursor = conn.cursor()
+            cursor.executemany('''
+                INSERT INTO email_send_log (batch_id, biz_no, email, email_lower, group_name, subject, status, error_msg, sent_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''', [(self.batch_id, biz_no, email, normalize_email(email), self.group_name, subject, status, error, sent_at)
+                  for biz_no, email, subject, status, error, is_bounce, sent_at, _ in rows])
+
+            # Company_Basic 최신 상태: 성공 → 사용 가능, 반송(수신 계정 오류) → 사용 불가(REJECTED), 송신 측 오류 → 상태만 기록
+            success = [(now_str, biz_no) for biz_no, _, _, status, _, _, _, now_str in rows if status == 'SUCCESS']
+            bounced = [(now_str, biz_no) for biz_no, _, _, status, _, is_bounce, _, now_str in rows
+                       if status != 'SUCCESS' and is_bounce]
+            sender_fail = [(now_str, biz_no) for biz_no, _, _, status, _, is_bounce, _, now_str in rows
+                           if status != 'SUCCESS' and not is_bounce]
+            if success:
+                cursor.executemany('''
+                    UPDATE Company_Basic
+                    SET email_usable = 1, email_fix_status = 0,
+                        last_send_at = ?, last_send_status = 'SUCCESS'
+                    WHERE biz_no = ?
+                ''', success)
+            if bounced:
+                cursor.executemany('''
+                    UPDATE Company_Basic
+                    SET email_usable = 0, email_fix_status = 0,
+                        last_send_at = ?, last_send_status = 'REJECTED'
+                    WHERE biz_no = ?
+                ''', bounced)
+            if sender_fail:
+                cursor.executemany('''
+                    UPDATE Company_Basic
+                    SET last_send_at = ?, last_send_status = 'FAIL_SENDER'
+                    WHERE biz_no = ?
+                ''', sender_fail)
+
+            cursor.execute('''
+                UPDATE send_batches
+                SET sent_count = ?, success_count = ?, fail_count = ?
+                WHERE batch_id = ?
+            ''', (*counts, self.batch_id))
+            conn.commit()
+            notify_company_changed({row[0] for row in rows})
+            return True
+        except Exception as e:
+            conn.rollback()
+            print(f"[EmailResultBuffer] flush 실패 ({len(rows)}건, 재시도 예정): {e}")
+            return False
+        finally:
+            conn.close()
+
+# --- 메일 개인화 매크로 ---
+# 제목/본문의 {매크로} 를 수신 기업 정보로 치환합니다. 새 매크로는 여기에만 추가하면 됩니다.
+# 매크로 → (테이블 별칭, 컬럼, 형식)  cb = Company_Basic, cf = Company_Financial (최근 결산년도, 금액 단위: 천원)
+MAIL_MACRO_FIELDS = {
+    '상호': ('cb', 'company_name', 'text'),
+    '대표자': ('cb', 'representative_name', 'text'),
+    '이메일': ('cb', 'email', 'text'),
+    '연락처': ('cb', 'phone_number', 'text'),
+    '주소': ('cb', 'address', 'text'),
+    '사업자번호': ('cb', 'biz_no', 'text'),
+    '업종': ('cb', 'industry_name', 'text'),
+    '지역': ('cb', 'region', 'text'),
+    '기업규모': ('cb', 'company_size', 'text'),
+    '설립일': ('cb', 'establish_date', 'text'),
+    '결산연도': ('cf', 'fiscal_year', 'text'),
+    '매출액': ('cf', 'sales_revenue', 'amount'),
+    '영업이익': ('cf', 'operating_income', 'amount'),
+    '당기순이익': ('cf', 'net_income', 'amount'),
+    '총자산': ('cf', 'total_assets', 'amount'),
+    '자본금': ('cf', 'capital_stock_value', 'amount'),
+    '이익잉여금': ('cf', 'retained_earnings', 'amount'),
+}
+MAIL_MACRO_PATTERN = re.compile(r'\{([^{}\s]+)\}')
+MAIL_MACRO_NAME_PATTERN = re.compile(r'^[가-힣A-Za-z0-9_]+$')  # 오타 안내용 (CSS 블록 등은 제외)
+
+def _format_macro_value(value, kind):
+    if value is None:
+        return ''
+    if kind == 'amount':
+        try:
+            return f"{int(float(value)):,}"
+        except (TypeError, ValueError):
+            return str(value)
+    return str(value)
+
+class CompiledMailTemplate:
+    """
+    제목/본문 템플릿을 한 번 파싱해 [문자열, 매크로, 문자열, ...] 조각 목록으로 보관하고
+    수신자마다 join 한 번으로 렌더링합니다. 알 수 없는 {…} 는 그대로 둡니다.
+    """
+
+    def __init__(self, text):
+        text = text or ''
+        self.text = text
+        self.literals = []   # 매크로 사이의 문자열 (len = len(macros) + 1)
+        self.macros = []
+        self.unknown_macros = []
+        pos = 0
+        for match in MAIL_MACRO_PATTERN.finditer(text):
+            name = match.group(1)
+            if name not in MAIL_MACRO_FIELDS:
+                if MAIL_MACRO_NAME_PATTERN.match(name) and name not in self.unknown_macros:
+                    self.unknown_macros.append(name)
+                continue
+            self.literals.append(text[pos:match.start()])
+            self.macros.append(name)
+            pos = match.end()
+        self.literals.append(text[pos:])
+
+    def render(self, values):
+        """values: {매크로: 문자열} (mail_macro_values 결과)"""
+        if not self.macros:
+            return self.literals[0]
+        parts = [self.literals[0]]
+        for name, literal in zip(self.macros, self.literals[1:]):
+            parts.append(values.get(name, ''))
+            parts.append(literal)
+        return ''.join(parts)
+
+def mail_macro_values(company, macros=None):
+    """수신 기업 dict 를 {매크로: 문자열} 로 변환합니다. macros 가 있으면 해당 매크로만 계산."""
+    values = {}
+    for name in (macros if macros is not None else MAIL_MACRO_FIELDS):
+        _, column, kind = MAIL_MACRO_FIELDS[name]
+        value = company.get(column)
+        if name == '연락처' and value is None:
+            value = company.get('phone')
+        values[name] = _format_macro_value(value, kind)
+    return values
+
+def load_mail_recipients(cursor, biz_nos, templates=(), usable_only=True):
+    """
+    발송/미리보기 대상 기업을 biz_nos 순서대로 조회합니다.
+    templates(CompiledMailTemplate) 에서 쓰는 재무 매크로가 있을 때만 최근 결산년도(Company_Financial_Latest) 재무를 조인합니다.
+    """
+    if not biz_nos:
+        return []
+    financial_columns = sorted({MAIL_MACRO_FIELDS[name][1] for template in templates for name in template.macros
+                                if MAIL_MACRO_FIELDS[name][0] == 'cf'})
+    basic_columns = sorted({column for alias, column, _ in MAIL_MACRO_FIELDS.values() if alias == 'cb'} | {'biz_no', 'email'})
+    select_sql = ', '.join([f'cb.{column}' for column in basic_columns] +
+                           ['cb.phone_number as phone'] + [f'cf.{column}' for column in financial_columns])
+    # 최근 결산년도는 기업 상세/검색과 같은 Company_Financial_Latest 기준
+    # (매크로 컬럼이 요약 테이블에 다 있지 않으므로 해당 연도 행을 Company_Financial 에서 조인)
+    financial_join = '''
+        LEFT JOIN Company_Financial_Latest cfl ON cfl.biz_no = cb.biz_no
+        LEFT JOIN Company_Financial cf ON cf.biz_no = cfl.biz_no AND cf.fiscal_year = cfl.fiscal_year
+    ''' if financial_columns else ''
+    usable_filter = 'AND (cb.email_usable = 1 OR cb.email_usable IS NULL)' if usable_only else ''
+
+    placeholders = ','.join(['?'] * len(biz_nos))
+    cursor.execute(f'''
+        SELECT {select_sql}
+        FROM Company_Basic cb {financial_join}
+        WHERE cb.biz_no IN ({placeholders}) {usable_filter}
+    ''', list(biz_nos))
+    rows = {row['biz_no']: dict(row) for row in cursor.fetchall()}
+    return [rows[biz_no] for biz_no in dict.fromkeys(biz_nos) if biz_no in rows]
+
+def render_mail_preview(companies, subject, body, limit=5):
+    """처음 limit 개 수신자에 대해 실제 발송과 같은 방식으로 제목/본문을 렌더링합니다. (발송하지 않음)"""
+    subject_template = CompiledMailTemplate(subject)
+    body_template = CompiledMailTemplate(body)
+    macros = set(subject_template.macros) | set(body_template.macros)
+    previews = []
+    for company in companies[:limit]:
+        values = mail_macro_values(company, macros)
+        previews.append({
+            'biz_no': company.get('biz_no'),
+            'email': company.get('email'),
+            'subject': subject_template.render(values),
+            'body': body_template.render(values),
+        })
+    return {
+        'previews': previews,
+        'macros': sorted(macros),
+        'unknown_macros': list(dict.fromkeys(subject_template.unknown_macros + body_template.unknown_macros)),
+    }
+
+class CampaignMessageTemplate:
+    """
+    배치 단위 메일 틀. 첨부 파일은 생성 시 한 번만 읽고 base64 인코딩해 MIME 바이트로 보관하고,
+    수신자별로는 헤더와 본문 파트만 만들어 보관된 첨부 바이트를 이어 붙입니다.
+    (수신자당 CPU/디스크 I/O 가 첨부 크기와 무관)
+    """
+
+    def __init__(self, sender_email, attachments=None):
+        from email.header import Header
+
+        self.sender_email = sender_email
+        self.boundary = f"{'=' * 15}{uuid.uuid4().int % 10 ** 19:019d}=="  # email.generator 기본 boundary 와 같은 형식
+        self.attachment_count = 0
+        chunks = []
+        for att in attachments or []:
+            file_path = att.get('path')
+            file_name = att.get('name')
+
+            if not file_path or not os.path.exists(file_path):
+                continue
+
+            with open(file_path, "rb") as f:
+                part = MIMEBase("application", "octet-stream")
+                part.set_payload(f.read())
+            encoders.encode_base64(part)
+
+            # Handle Korean filename
+            safe_name = Header(file_name, 'utf-8').encode()
+            part.add_header(
+                "Content-Disposition",
+                f"attachment; filename={safe_name}",
+            )
+            chunks.append(b'\r\n--' + self.boundary.encode() + b'\r\n' + self._flatten(part))
+            self.attachment_count += 1
+        self.attachment_bytes = b''.join(chunks)
+
+    @staticmethod
+    def _flatten(msg):
+        """smtplib.send_message 와 같은 방식(BytesGenerator, CRLF)으로 직렬화합니다."""
+        from email.generator import BytesGenerator
+        buffer = io.BytesIO()
+        BytesGenerator(buffer).flatten(msg, linesep='\r\n')
+        return buffer.getvalue()
+
+    def build(self, to_email, subject, body):
+        """수신자별 메시지 바이트 (헤더/본문만 새로 만들고 첨부는 재사용)"""
+        msg = MIMEMultipart(boundary=self.boundary)
+        msg['Subject'] = subject
+        msg['From'] = self.sender_email
+        msg['To'] = to_email
+
+        # HTML body
+        msg.attach(MIMEText(body, 'html', 'utf-8'))
+        data = self._flatten(msg)
+        if not self.attachment_bytes:
+            return data
+        closing = b'\r\n--' + self.boundary.encode() + b'--'
+        head, tail = data.rsplit(closing, 1)
+        return head + self.attachment_bytes + closing + tail
+
+    def send(self, server, to_email, subject, body):
+        server.sendmail(self.sender_email, [to_email], self.build(to_email, subject, body))
+
 class EmailSender:
     def __init__(self, smtp_server='smtp.gmail.com', smtp_port=587, 
                  sender_email='', sender_password=''):
@@ -115,11 +775,18 @@ class EmailSender:
             (batch_id, user_id, smtp_config_id, subject, body, total_count, sent_at, status, group_name)
             VALUES (?, ?, ?, ?, ?, ?, ?, 'in_progress', ?)
             ''', (batch_id, user_id, smtp_config_id, subject, body_template, len(companies_data), sent_at, group_name))
+
+            # 발송은 작업 큐(email_jobs)에 등록하고 워커가 처리 (재시작/워커 교체 시 이어서 발송)
+            enqueue_email_job('send_batch', {
+                'batch_id': batch_id,
+                'smtp_config_id': smtp_config_id,
+                'companies': companies_data,
+                'subject': subject,
+                'body': body_template,
+                'group_name': group_name,
+                'attachments': attachments,
+            }, job_id=batch_id, conn=conn)
             conn.commit()
-            
-            thread = threading.Thread(target=self._send_batch_worker, args=(batch_id, companies_data, subject, body_template, group_name, attachments))
-            thread.daemon = True
-            thread.start()
             return {'batch_id': batch_id, 'total': len(companies_data), 'status': 'in_progress'}
         except Exception as e:
             conn.rollback()
@@ -163,96 +830,138 @@ class EmailSender:
         server.login(self.sender_email, self.sender_password)
         return server
 
-    def _send_batch_worker(self, batch_id, companies_data, subject, body_template, group_name, attachments=None):
-        success_count = 0
-        fail_count = 0
-        sent_count = 0
+    def _send_batch_worker(self, batch_id, companies_data, subject, body_template, group_name, attachments=None,
+                           stop_event=None, resume=False):
+        """
+        발송 계정당 여러 SMTP 연결로 동시에 발송합니다.
+        - 연결마다 스레드 1개가 공용 수신자 큐에서 꺼내 발송 (연결 수: 공급자별 connections)
+        - 발송 간격은 고정 sleep 대신 공급자별 토큰 버킷으로 제한
+        - 결과는 EmailResultBuffer 로 모아서 기록
+        - resume: 이미 결과가 기록된 수신자는 건너뜀 / stop_event: 외부 중단(작업 임대 상실)
+        반환: 배치 최종 상태 ('completed' | 'LIMIT_EXCEEDED' | 'error'), 외부 중단 시 None
+        """
         total = len(companies_data)
-        
-        print(f"\n[BATCH START] ID: {batch_id} | Total: {total} | Group: {group_name}")
+        provider = get_smtp_provider(self.smtp_server)
+        limits = get_provider_limits(provider)
+        limiter = get_rate_limiter(provider, self.sender_email)
+        results = EmailResultBuffer(batch_id, group_name, total)
+        already_sent = results.resume() if resume else set()
+        results.start()
+        recipients = queue.Queue()
+        for company in companies_data:
+            if company.get('biz_no') not in already_sent:
+                recipients.put(company)
+        stop_event = stop_event or threading.Event()
+        state = {'limit_exceeded': False}
+
+        print(f"\n[BATCH START] ID: {batch_id} | Total: {total} | Remaining: {recipients.qsize()} | Group: {group_name} | "
+              f"Provider: {provider} ({limits['connections']} conn, {limits['rate']}/s)")
         print("="*60)
-        
-        server = None
+
         try:
-            server = self._get_smtp_connection()
-            print("SMTP Connected & Logged in. Starting loop...")
+            # 첨부 파일은 배치당 한 번만 읽고 인코딩, 제목/본문 매크로도 한 번만 파싱
+            template = CampaignMessageTemplate(self.sender_email, attachments)
+            subject_template = CompiledMailTemplate(subject)
+            body_template = CompiledMailTemplate(body_template)
+
+            # 첫 연결은 먼저 열어 인증/접속 오류를 배치 오류로 처리
+            first_server = self._get_smtp_connection()
+            print("SMTP Connected & Logged in. Starting workers...")
             self._update_batch_status(batch_id, status='in_progress')
-            
-            for company in companies_data:
-                sent_count += 1
+
+            num_connections = max(1, min(limits['connections'], recipients.qsize()))
+            workers = [
+                threading.Thread(target=self._smtp_send_loop,
+                                 args=(first_server if i == 0 else None, recipients, limiter, stop_event,
+                                       results, state, subject_template, body_template, template, total),
+                                 daemon=True)
+                for i in range(num_connections)
+            ]
+            for worker in workers:
+                worker.start()
+            for worker in workers:
+                worker.join()
+            flushed = results.close()
+
+            if stop_event.is_set() and not state['limit_exceeded']:
+                print(f"[BATCH STOPPED] ID: {batch_id} | 작업 임대 상실 - 다른 워커가 이어서 발송합니다.")
+                clear_batch_progress(batch_id)
+                return None
+            if not flushed:
+                # 결과가 기록되지 않은 채 완료 처리하지 않음 (재개 시 기록되지 않은 수신자에게 재발송됨)
+                raise Exception(f'발송 결과 {len(results.pending)}건을 기록하지 못했습니다.')
+
+            print("="*60)
+            print(f"[BATCH COMPLETED] ID: {batch_id} | Success: {results.success_count} | Fail: {results.fail_count}\n")
+            final_status = 'LIMIT_EXCEEDED' if state['limit_exceeded'] else 'completed'
+            self._update_batch_status(batch_id, status=final_status, completed=True)
+            return final_status
+
+        except Exception as e:
+            print(f"\n[BATCH ERROR] ID: {batch_id} | Fatal Error: {str(e)}\n")
+            import traceback
+            traceback.print_exc()
+            results.close()
+            self._update_batch_status(batch_id, status='error', error=str(e))
+            return 'error'
+
+    def _smtp_send_loop(self, server, recipients, limiter, stop_event, results, state, subject_template, body_template, template, total):
+        """SMTP 연결 하나를 맡아 수신자 큐가 빌 때까지 발송합니다."""
+        macros = set(subject_template.macros) | set(body_template.macros)
+        try:
+            if server is None:
+                try:
+                    server = self._get_smtp_connection()
+                except Exception as e:
+                    # 추가 연결 실패 시 이 스레드만 종료 (나머지 연결이 큐를 처리)
+                    print(f"[SMTP POOL] 추가 연결 실패: {e}")
+                    return
+
+            while not stop_event.is_set():
+                try:
+                    company = recipients.get_nowait()
+                except queue.Empty:
+                    break
+
                 email = company.get('email')
                 biz_no = company.get('biz_no')
-                
                 if not email:
-                    fail_count += 1
-                    self._log_email_result(batch_id, biz_no, 'N/A', group_name, subject, 'FAIL', error="이메일 주소 없음")
-                                # Personalization: Korean Macros
-                mapping = {
-                    '{상호}': company.get('company_name', ''),
-                    '{대표자}': company.get('representative_name', ''),
-                    '{이메일}': email,
-                    '{연락처}': company.get('phone_number', company.get('phone', '')),
-                    '{주소}': company.get('address', '')
-                }
-                
-                current_body = body_template
-                current_subject = subject
-                for tag, val in mapping.items():
-                    current_body = current_body.replace(tag, str(val))
-                    current_subject = current_subject.replace(tag, str(val))
-                
+                    results.add(biz_no, 'N/A', subject_template.text, 'FAIL', error="이메일 주소 없음")
+                    continue
+
+                # Personalization: 컴파일된 템플릿에 매크로 값만 채움
+                values = mail_macro_values(company, macros)
+                current_subject = subject_template.render(values)
+                current_body = body_template.render(values)
+
+                if not limiter.acquire(stop_event):
+                    break
+
                 # Attempt to send
-                sent_ok = False
                 error_msg = None
                 try:
-                    self._send_email_internal(server, email, current_subject, current_body, attachments)
-                    sent_ok = True
+                    template.send(server, email, current_subject, current_body)
                 except Exception as e:
                     error_msg = str(e)
-                    print(f"[{sent_count}/{total}] SEND FAIL: {email} | Error: {error_msg}")
+                    print(f"[{results.sent_count + 1}/{total}] SEND FAIL: {email} | Error: {error_msg}")
                     # Reconnect if session is broken
                     try:
                         server = self._get_smtp_connection()
                     except: pass
-                
-                if sent_ok:
-                    self._log_email_result(batch_id, biz_no, email, group_name, current_subject, 'SUCCESS')
-                    success_count += 1
-                else:
-                    fail_count += 1
-                    # 송신 오류인지 수신 계정(반송) 오류인지 판별
-                    is_sender_err = self._is_sender_error(error_msg)
-                    is_limit_err = self._is_limit_error(error_msg)
-                    
-                    if is_sender_err:
-                        # 송신 한도 초과 등은 계정 차단하지 않음
-                        self._log_email_result(batch_id, biz_no, email, group_name, current_subject, 'FAIL', error=error_msg, is_bounce=False)
-                        
-                        # 일일 한도 초과인 경우 즉시 루프 중단
-                        if is_limit_err:
-                            print(f"[LIMIT EXCEEDED] ID: {batch_id} | Stopping batch...")
-                            self._update_batch_status(batch_id, status='LIMIT_EXCEEDED', completed=True)
-                            break
-                    else:
-                        # 수신자 계정 문제(반송 등)인 경우에만 자동 보정 대상 포함
-                        self._log_email_result(batch_id, biz_no, email, group_name, current_subject, 'FAIL', error=error_msg, is_bounce=True)
-                        self._disable_invalid_email(biz_no, error_msg)
-
-                # Real-time progress update
-                self._update_batch_progress(batch_id, sent_count, success_count, fail_count)
-                
-                # Dynamic sleep to avoid rate limiting
-                time.sleep(0.5) 
 
-            print("="*60)
-            print(f"[BATCH COMPLETED] ID: {batch_id} | Success: {success_count} | Fail: {fail_count}\n")
-            self._update_batch_status(batch_id, status='completed', completed=True)
-            
-        except Exception as e:
-            print(f"\n[BATCH ERROR] ID: {batch_id} | Fatal Error: {str(e)}\n")
-            import traceback
-            traceback.print_exc()
-            self._update_batch_status(batch_id, status='error', error=str(e))
+                if error_msg is None:
+                    results.add(biz_no, email, current_subject, 'SUCCESS')
+                elif self._is_sender_error(error_msg):
+                    # 송신 한도 초과 등은 계정 차단하지 않음
+                    results.add(biz_no, email, current_subject, 'FAIL', error=error_msg, is_bounce=False)
+                    # 일일 한도 초과인 경우 모든 연결의 발송 중단
+                    if self._is_limit_error(error_msg):
+                        print(f"[LIMIT EXCEEDED] ID: {results.batch_id} | Stopping batch...")
+                        state['limit_exceeded'] = True
+                        stop_event.set()
+                else:
+                    # 수신자 계정 문제(반송 등)인 경우에만 자동 보정 대상 포함
+                    results.add(biz_no, email, current_subject, 'FAIL', error=error_msg, is_bounce=True)
         finally:
             if server:
                 try:
@@ -260,70 +969,13 @@ class EmailSender:
                 except:
                     pass
 
-    def _log_email_result(self, batch_id, biz_no, email, group_name, subject, status, error=None, is_bounce=False):
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        # Log the individual result
-        cursor.execute('''
-            INSERT INTO email_send_log (batch_id, biz_no, email, group_name, subject, status, error_msg)
-            VALUES (?, ?, ?, ?, ?, ?, ?)
-        ''', (batch_id, biz_no, email, group_name, subject, status, error))
-        
-        # Update Company_Basic with the latest status
-        now_str = get_kst_now().strftime('%Y-%m-%d %H:%M:%S')
-        if status == 'SUCCESS':
-            # Successful send means email is usable, and we reset the fix status
-            cursor.execute('''
-                UPDATE Company_Basic 
-                SET email_usable = 1, email_fix_status = 0, 
-                    last_send_at = ?, last_send_status = 'SUCCESS'
-                WHERE biz_no = ?
-            ''', (now_str, biz_no))
-        else:
-            # Failure (특히 송신 측 오류가 아닌 '반송'인 경우에만 사용 불가 처리)
-            if is_bounce:
-                cursor.execute('''
-                    UPDATE Company_Basic 
-                    SET email_usable = 0, last_send_at = ?, last_send_status = 'FAIL'
-                    WHERE biz_no = ?
-                ''', (now_str, biz_no))
-            else:
-                # 송신 측 오류일 경우 usable 상태 유지
-                cursor.execute('''
-                    UPDATE Company_Basic 
-                    SET last_send_at = ?, last_send_status = 'FAIL_SENDER'
-                    WHERE biz_no = ?
-                ''', (now_str, biz_no))
-            
-        conn.commit()
-        conn.close()
-
-    def _disable_invalid_email(self, biz_no, error_msg):
-        """Disables the email and marks as rejected to prevent further attempts"""
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute('''
-            UPDATE Company_Basic 
-            SET email_usable = 0, last_send_status = 'REJECTED', 
-                email_fix_status = 0
-            WHERE biz_no = ?
-        ''', (biz_no,))
-        conn.commit()
-        conn.close()
-
-    def _update_batch_progress(self, batch_id, sent_count, success_count, fail_count):
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute('''
-            UPDATE send_batches 
-            SET sent_count = ?, success_count = ?, fail_count = ? 
-            WHERE batch_id = ?
-        ''', (sent_count, success_count, fail_count, batch_id))
-        conn.commit()
-        conn.close()
-
     def _update_batch_status(self, batch_id, status, completed=False, error=None):
+        if completed:
+            set_batch_progress(batch_id, status=status, finished_at=time.time())
+        elif error:
+            set_batch_progress(batch_id, status=status, last_error=error, finished_at=time.time())
+        else:
+            set_batch_progress(batch_id, status=status)
         conn = get_db_connection()
         cursor = conn.cursor()
         if completed:
@@ -336,40 +988,8 @@ class EmailSender:
         conn.close()
 
     def _send_email_internal(self, server, to_email, subject, body, attachments=None):
-        import os
-        from email.header import Header
-        
-        msg = MIMEMultipart()
-        msg['Subject'] = subject
-        msg['From'] = self.sender_email
-        msg['To'] = to_email
-        
-        # HTML body
-        msg.attach(MIMEText(body, 'html', 'utf-8'))
-        
-        # Attachments
-        if attachments:
-            for att in attachments:
-                file_path = att.get('path')
-                file_name = att.get('name')
-                
-                if not file_path or not os.path.exists(file_path):
-                    continue
-                    
-                with open(file_path, "rb") as f:
-                    part = MIMEBase("application", "octet-stream")
-                    part.set_payload(f.read())
-                    encoders.encode_base64(part)
-                    
-                    # Handle Korean filename
-                    safe_name = Header(file_name, 'utf-8').encode()
-                    part.add_header(
-                        "Content-Disposition",
-                        f"attachment; filename={safe_name}",
-                    )
-                    msg.attach(part)
-                    
-        server.send_message(msg)
+        """단건 발송 (대량 발송은 CampaignMessageTemplate 을 배치당 한 번 만들어 재사용)"""
+        CampaignMessageTemplate(self.sender_email, attachments).send(server, to_email, subject, body)
 
 # --- Compatibility Functions ---
 
@@ -561,6 +1181,8 @@ def get_all_batches(user_id):
 def bulk_update_delivery_results(delivery_items):
     """
     외부 리포트(CSV 등)로부터 전달받은 대량의 발송 결과를 시스템에 일괄 반영합니다.
+    결과를 임시 스테이징 테이블에 적재한 뒤 Company_Basic / email_send_log 를 각각 한 번에 갱신합니다.
+    (같은 biz_no 가 여러 번 있으면 마지막 항목 기준)
     Args:
         delivery_items: [{'biz_no': '...', 'status': 'SUCCESS/FAIL/BOUNCE', 'error': '...'}]
     """
@@ -568,44 +1190,64 @@ def bulk_update_delivery_results(delivery_items):
     cursor = conn.cursor()
     try:
         now_str = get_kst_now().strftime('%Y-%m-%d %H:%M:%S')
-        updated_count = 0
-        
+
+        staged = []
         for item in delivery_items:
             biz_no = item.get('biz_no')
-            status = (item.get('status') or 'SUCCESS').upper()
-            error_msg = item.get('error') or ''
-            
             if not biz_no: continue
-            
-            # 1. Company_Basic 테이블 업데이트 (글로벌 상태)
+            status = (item.get('status') or 'SUCCESS').upper()
             usable = 1 if status == 'SUCCESS' else 0
-            if status == 'BOUNCE':
-                fix_status = 0 # 반송이면 수정 모드 초기화 (수정대상으로 표시)
-            else:
-                fix_status = 1 if status == 'FAIL' else 0
+            # 반송이면 수정 모드 초기화 (수정대상으로 표시), 실패는 수정 필요
+            fix_status = 1 if status == 'FAIL' else 0
+            staged.append((biz_no, status, item.get('error') or '', usable, fix_status))
+
+        # 1. 스테이징 테이블 적재
+        cursor.execute('''
+            CREATE TEMP TABLE IF NOT EXISTS delivery_results_staging (
+                biz_no PRIMARY KEY, status, error_msg, usable, fix_status
+            )
+        ''')
+        cursor.execute("CREATE TEMP TABLE IF NOT EXISTS delivery_latest_log (biz_no PRIMARY KEY, log_id)")
+        cursor.execute("DELETE FROM temp.delivery_results_staging")
+        cursor.execute("DELETE FROM temp.delivery_latest_log")
+        cursor.executemany('''
+            INSERT OR REPLACE INTO temp.delivery_results_staging (biz_no, status, error_msg, usable, fix_status)
+            VALUES (?, ?, ?, ?, ?)
+        ''', staged)
+
+        # 2. Company_Basic 테이블 업데이트 (글로벌 상태)
+        cursor.execute('''
+            UPDATE Company_Basic
+            SET email_usable = (SELECT s.usable FROM temp.delivery_results_staging s WHERE s.biz_no = Company_Basic.biz_no),
+                last_send_at = ?,
+                last_send_status = (SELECT s.status FROM temp.delivery_results_staging s WHERE s.biz_no = Company_Basic.biz_no),
+                email_fix_status = (SELECT s.fix_status FROM temp.delivery_results_staging s WHERE s.biz_no = Company_Basic.biz_no)
+            WHERE biz_no IN (SELECT biz_no FROM temp.delivery_results_staging)
+        ''', (now_str,))
+
+        # 3. biz_no 별 가장 최근 발송 로그 1건 (윈도 함수 1회)
+        cursor.execute('''
+            INSERT INTO temp.delivery_latest_log (biz_no, log_id)
+            SELECT biz_no, id FROM (
+                SELECT biz_no, id, ROW_NUMBER() OVER (PARTITION BY biz_no ORDER BY sent_at DESC, id DESC) AS rn
+                FROM email_send_log
+                WHERE biz_no IN (SELECT biz_no FROM temp.delivery_results_staging)
+            ) WHERE rn = 1
+        ''')
+
+        # 4. 최근 로그 상태 갱신
+        cursor.execute('''
+            UPDATE email_send_log
+            SET status = (SELECT s.status FROM temp.delivery_results_staging s WHERE s.biz_no = email_send_log.biz_no),
+                error_msg = COALESCE((SELECT s.error_msg FROM temp.delivery_results_staging s WHERE s.biz_no = email_send_log.biz_no), error_msg)
+            WHERE id IN (SELECT log_id FROM temp.delivery_latest_log)
+        ''')
+        # 반영 건수: 발송 로그가 있는 항목 수 (중복 항목 포함, 기존 집계 방식 유지)
+        logged = {row[0] for row in cursor.execute("SELECT biz_no FROM temp.delivery_latest_log").fetchall()}
+        updated_count = sum(1 for row in staged if row[0] in logged)
 
-            cursor.execute('''
-                UPDATE Company_Basic 
-                SET email_usable = ?, 
-                    last_send_at = ?, 
-                    last_send_status = ?,
-                    email_fix_status = ?
-                WHERE biz_no = ?
-            ''', (usable, now_str, status, fix_status, biz_no))
-            
-            # 2. 관련 로그가 있다면 최근 로그도 업데이트 (가장 최근 발송건 1건)
-            cursor.execute('''
-                UPDATE email_send_log
-                SET status = ?, error_msg = COALESCE(?, error_msg)
-                WHERE biz_no = ? AND id = (
-                    SELECT id FROM email_send_log WHERE biz_no = ? ORDER BY sent_at DESC LIMIT 1
-                )
-            ''', (status, error_msg, biz_no, biz_no))
-            
-            if cursor.rowcount > 0:
-                updated_count += 1
-                
         conn.commit()
+        notify_company_changed({row[0] for row in staged})
         return {'success': True, 'count': updated_count}
     except Exception as e:
         conn.rollback()
@@ -618,251 +1260,453 @@ def bulk_update_delivery_results(delivery_items):
 # 📬 반송 메일 자동 감지 & DB 업데이트 (IMAP 기반)
 # ─────────────────────────────────────────────────────────────
 
+def normalize_email(email):
+    """반송 대조용 정규화 주소 (email_send_log.email_lower, Company_Basic 의 lower(trim(email)) 인덱스와 동일)"""
+    return email.strip().lower() if email else None
+
+def ensure_email_lower_column(cursor):
+    """email_send_log.email_lower 컬럼을 추가하고 비어 있는 행을 채웁니다. (인덱스는 web_app INDEX_MIGRATIONS)"""
+    cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='email_send_log'")
+    if not cursor.fetchone():
+        return
+    log_cols = [r[1] for r in cursor.execute('PRAGMA table_info(email_send_log)').fetchall()]
+    if 'email_lower' not in log_cols:
+        cursor.execute("ALTER TABLE email_send_log ADD COLUMN email_lower TEXT")
+        print("  → email_send_log.email_lower 컬럼 추가")
+    backfill_email_lower(cursor)
+
+def backfill_email_lower(cursor):
+    """email_lower 없이 기록된 로그(이전 버전/외부 스크립트)를 채웁니다."""
+    cursor.execute('''
+        UPDATE email_send_log SET email_lower = LOWER(TRIM(email))
+        WHERE email_lower IS NULL AND email IS NOT NULL
+    ''')
+
+# 헤더는 UID 묶음 단위로 가져오고, 반송 후보만 본문을 가져옵니다.
+IMAP_HEADER_FETCH_CHUNK = 200
+IMAP_BODY_FETCH_CHUNK = 20
+IMAP_SCAN_CONCURRENCY = int(os.environ.get('IMAP_SCAN_CONCURRENCY', 4))
+IMAP_TIMEOUT = 25  # Render/클라우드 환경에서 IMAP 연결 타임아웃 (초)
+
+BOUNCE_SENDER_KEYWORDS = ['mailer-daemon', 'postmaster', 'delivery', 'noreply', 'no-reply']
+BOUNCE_SUBJECT_KEYWORDS = [
+    'delivery status', 'undeliverable', 'returned mail',
+    'failure notice', 'delivery failure', 'mail delivery failed',
+    '반송', '전달 실패', 'delivery notification'
+]
+EMAIL_ADDRESS_PATTERN = re.compile(r'[a-zA-Z0-9._%+\-]+@[a-zA-Z0-9.\-]+\.[a-zA-Z]{2,}')
+IMAP_UID_PATTERN = re.compile(rb'UID (\d+)')
+
+def ensure_imap_checkpoint_table(cursor):
+    """반송 스캔 체크포인트 테이블 생성 (SMTP 설정 × 폴더별 마지막으로 확인한 UID)"""
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS imap_scan_checkpoints (
+            smtp_config_id INTEGER NOT NULL,
+            folder TEXT NOT NULL,
+            uidvalidity INTEGER,
+            last_uid INTEGER DEFAULT 0,
+            scanned_at TEXT,
+            PRIMARY KEY (smtp_config_id, folder)
+        )
+    ''')
+
+def load_imap_checkpoints(cursor, smtp_config_id):
+    """{folder: (uidvalidity, last_uid)}"""
+    cursor.execute('SELECT folder, uidvalidity, last_uid FROM imap_scan_checkpoints WHERE smtp_config_id = ?',
+                   (smtp_config_id,))
+    return {row[0]: (row[1], row[2]) for row in cursor.fetchall()}
+
+def save_imap_checkpoints(cursor, smtp_config_id, scanned):
+    """
+    스캔을 마친 폴더의 체크포인트 저장 (반송 결과를 DB에 반영하는 트랜잭션 안에서 호출)
+    같은 UIDVALIDITY 이면 last_uid 는 뒤로 가지 않음 (동시에 끝난 스캔이 서로 덮어쓰지 않도록)
+    """
+    now_str = get_kst_now().strftime('%Y-%m-%d %H:%M:%S')
+    cursor.executemany('''
+        INSERT INTO imap_scan_checkpoints (smtp_config_id, folder, uidvalidity, last_uid, scanned_at)
+        VALUES (?, ?, ?, ?, ?)
+        ON CONFLICT(smtp_config_id, folder) DO UPDATE SET
+            last_uid = CASE WHEN uidvalidity = excluded.uidvalidity
+                            THEN MAX(last_uid, excluded.last_uid) ELSE excluded.last_uid END,
+            uidvalidity = excluded.uidvalidity, scanned_at = excluded.scanned_at
+    ''', [(smtp_config_id, folder, uidvalidity, last_uid, now_str)
+          for folder, (uidvalidity, last_uid) in scanned.items()])
+
+def _extract_message_text(msg):
+    """이메일 메시지에서 텍스트 내용을 추출합니다."""
+    text = ''
+    if msg.is_multipart():
+        for part in msg.walk():
+            ct = part.get_content_type()
+            if ct in ('text/plain', 'text/html'):
+                try:
+                    payload = part.get_payload(decode=True)
+                    if payload:
+                        text += payload.decode('utf-8', errors='replace')
+                except:
+                    text += str(part.get_payload())
+    else:
+        try:
+            payload = msg.get_payload(decode=True)
+            if payload:
+                text = payload.decode('utf-8', errors='replace')
+        except:
+            text = str(msg.get_payload())
+    return text
+
+def parse_bounce_recipients(msg, own_addr=''):
+    """
+    반송 메일에서 수신 실패한 주소(소문자 set)를 추출합니다.
+    1) message/delivery-status(DSN, RFC 3464) 파트의 Final-Recipient 중 Action: failed
+    2) DSN 이 없으면 X-Failed-Recipients 헤더
+    3) 둘 다 없으면 (비표준 반송 안내) 본문에서 주소 추출
+    """
+    own_addr = (own_addr or '').lower()
+    bounced = set()
+    has_dsn = False
+    for part in msg.walk():
+        if part.get_content_type() != 'message/delivery-status':
+            continue
+        has_dsn = True
+        # 첫 블록은 per-message 필드, 이후 블록이 수신자별 필드
+        for block in part.get_payload() or []:
+            recipient = block.get('Final-Recipient') or block.get('Original-Recipient')
+            if not recipient:
+                continue
+            action = str(block.get('Action', '')).strip().lower()
+            status = str(block.get('Status', '')).strip()
+            if action == 'failed' or (not action and status.startswith('5')):
+                addr = str(recipient).split(';', 1)[-1].strip().strip('<>').lower()
+                if addr:
+                    bounced.add(addr)
+    if has_dsn:
+        return bounced
+
+    failed_header = msg.get_all('X-Failed-Recipients') or []
+    for value in failed_header:
+        bounced.update(addr.lower() for addr in EMAIL_ADDRESS_PATTERN.findall(str(value)))
+    if bounced:
+        return bounced
+
+    for addr in EMAIL_ADDRESS_PATTERN.findall(_extract_message_text(msg)):
+        addr_lower = addr.lower()
+        # 자기 자신 주소나 시스템 주소 제외
+        if addr_lower != own_addr and not any(kw in addr_lower for kw in ['mailer-daemon', 'postmaster']):
+            bounced.add(addr_lower)
+    return bounced
+
+def _imap_uid_set(uids):
+    return ','.join(str(uid) for uid in uids)
+
+def _iter_fetch_parts(data):
+    """UID FETCH 응답에서 (uid, 내용 bytes) 를 꺼냅니다."""
+    for item in data or []:
+        if not isinstance(item, tuple):
+            continue
+        match = IMAP_UID_PATTERN.search(item[0])
+        if match:
+            yield int(match.group(1)), item[1]
+
+def _is_potential_bounce(header_msg):
+    sender = str(header_msg.get('From', '')).lower()
+    subject_raw = str(header_msg.get('Subject', '')).lower()
+    content_type = str(header_msg.get('Content-Type', '')).lower()
+    return ('multipart/report' in content_type
+            or any(kw in sender for kw in BOUNCE_SENDER_KEYWORDS)
+            or any(kw in subject_raw for kw in BOUNCE_SUBJECT_KEYWORDS))
+
+def scan_bounce_folders(tasks, since_date):
+    """
+    (receiver, folder) 작업들을 동시에 스캔합니다. (폴더마다 IMAP 연결 1개)
+    반환: [(receiver, folder, bounced set, checkpoint 또는 None, 오류 또는 None)]
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    def _scan(task):
+        receiver, folder = task
+        try:
+            bounced, checkpoint = receiver.scan_folder(folder, since_date)
+            return receiver, folder, bounced, checkpoint, None
+        except Exception as e:
+            print(f"[EmailReceiver] {receiver.email_addr} 폴더 {folder} 스캔 실패: {e}")
+            return receiver, folder, set(), None, e
+
+    if not tasks:
+        return []
+    with ThreadPoolExecutor(max_workers=max(1, min(IMAP_SCAN_CONCURRENCY, len(tasks)))) as pool:
+        return list(pool.map(_scan, tasks))
+
+
 class EmailReceiver:
     """Gmail/Naver 등의 IMAP을 통해 반송(bounce) 메일을 감지합니다."""
 
-    def __init__(self, imap_server, imap_port, email_addr, password):
+    def __init__(self, imap_server, imap_port, email_addr, password, checkpoints=None):
         self.imap_server = imap_server
         self.imap_port = int(imap_port or 993)
         self.email_addr = email_addr
         self.password = password
+        self.checkpoints = checkpoints or {}   # {folder: (uidvalidity, last_uid)} - 이전 스캔 위치
+        self.scanned = {}                      # 이번 스캔을 마친 폴더의 새 체크포인트
 
     def connect(self):
         """IMAP 서버에 연결하고 mail 객체를 반환합니다."""
-        import socket
-        # Render/클라우드 환경에서 IMAP 연결 타임아웃 설정 (25초)
-        socket.setdefaulttimeout(25)
         try:
             if self.imap_port == 993:
-                mail = imaplib.IMAP4_SSL(self.imap_server, self.imap_port)
+                mail = imaplib.IMAP4_SSL(self.imap_server, self.imap_port, timeout=IMAP_TIMEOUT)
             else:
-                mail = imaplib.IMAP4(self.imap_server, self.imap_port)
+                mail = imaplib.IMAP4(self.imap_server, self.imap_port, timeout=IMAP_TIMEOUT)
+        except Exception as e:
+            raise Exception(f"IMAP 연결 실패 ({self.imap_server}:{self.imap_port}): {str(e)}")
+        try:
             mail.login(self.email_addr, self.password)
-        finally:
-            # 타임아웃을 기본값으로 복구 (다른 연결에 영향 없도록)
-            socket.setdefaulttimeout(None)
+        except imaplib.IMAP4.error as e:
+            raise Exception(f"IMAP 인증 실패: {str(e)}. 비밀번호 또는 IMAP 서버 설정을 확인해주세요.")
         return mail
 
+    def target_folders(self):
+        # Gmail의 경우 "[Gmail]/All Mail" (전체보관함)은 너무 크므로 제외하고,
+        # 실질적으로 반송 메일이 들어오는 INBOX와 Spam만 스캔합니다.
+        if 'gmail' in self.imap_server.lower():
+            return ['INBOX', '"[Gmail]/Spam"']
+        return ['INBOX', 'Spam', 'Junk']
+
     def check_bounces(self, since_date: str):
         """
-        since_date('YYYY-MM-DD') 이후 받은편지함에서 반송 메일을 찾아
-        반송된 이메일 주소 목록(소문자 set)을 반환합니다.
+        since_date('YYYY-MM-DD') 이후(체크포인트가 있으면 마지막으로 확인한 UID 이후) 받은 메일에서
+        반송된 이메일 주소 목록(소문자 set)을 반환합니다. 폴더는 동시에 스캔하며,
+        스캔을 마친 폴더의 새 체크포인트는 self.scanned 에 남습니다.
         """
         bounced = set()
-        mail = None
+        results = scan_bounce_folders([(self, folder) for folder in self.target_folders()], since_date)
+        errors = [error for _, _, _, _, error in results if error]
+        if errors and len(errors) == len(results):
+            raise errors[0]
+        for _, folder, found, checkpoint, _ in results:
+            bounced |= found
+            if checkpoint:
+                self.scanned[folder] = checkpoint
+        return bounced
+
+    def scan_folder(self, folder, since_date):
+        """
+        폴더 1개를 스캔합니다. 반환: (반송 주소 set, (uidvalidity, last_uid)) / 폴더가 없으면 (set(), None)
+        - 체크포인트의 UIDVALIDITY 가 같으면 last_uid 이후만, 아니면 SINCE since_date 로 검색
+        - FETCH 에 실패한 묶음이 있으면 그 묶음의 첫 UID 직전까지만 체크포인트를 올림 (다음 스캔에서 다시 가져옴)
+        """
+        bounced = set()
+        mail = self.connect()
         try:
-            try:
-                mail = self.connect()
-            except imaplib.IMAP4.error as e:
-                raise Exception(f"IMAP 인증 실패: {str(e)}. 비밀번호 또는 IMAP 서버 설정을 확인해주세요.")
-            except Exception as e:
-                raise Exception(f"IMAP 연결 실패 ({self.imap_server}:{self.imap_port}): {str(e)}")
-            
-            # Gmail의 경우 "[Gmail]/All Mail" (전체보관함)은 너무 크므로 제외하고,
-            # 실질적으로 반송 메일이 들어오는 INBOX와 Spam만 스캔합니다.
-            is_gmail = 'gmail' in self.imap_server.lower()
-            if is_gmail:
-                target_folders = ['INBOX', '"[Gmail]/Spam"']
+            status, _ = mail.select(folder, readonly=True)
+            if status != 'OK':
+                return bounced, None
+            uidvalidity = int((mail.response('UIDVALIDITY')[1] or [0])[0] or 0)
+            uidnext = int((mail.response('UIDNEXT')[1] or [0])[0] or 0)
+
+            prev_validity, last_uid = self.checkpoints.get(folder, (None, 0))
+            if prev_validity == uidvalidity and last_uid:
+                status, messages = mail.uid('search', None, f'UID {last_uid + 1}:*')
             else:
-                target_folders = ['INBOX', 'Spam', 'Junk']
+                last_uid = 0
+                imap_date = datetime.strptime(since_date, '%Y-%m-%d').strftime('%d-%b-%Y')
+                status, messages = mail.uid('search', None, f'(SINCE "{imap_date}")')
+            if status != 'OK':
+                return bounced, None
+            # "n:*" 는 새 메일이 없어도 마지막 UID 를 돌려주므로 걸러냄
+            uids = sorted(uid for uid in (int(x) for x in messages[0].split()) if uid > last_uid)
+            new_last_uid = max([last_uid, uidnext - 1] + uids[-1:])
 
-            for folder in target_folders:
-                try:
-                    status, _ = mail.select(folder)
-                    if status != 'OK': continue
-
-                    date_obj = datetime.strptime(since_date, '%Y-%m-%d')
-                    imap_date = date_obj.strftime('%d-%b-%Y')
-                    status, messages = mail.search(None, f'(SINCE "{imap_date}")')
-                    if status != 'OK':
-                        continue
-
-                    msg_ids = messages[0].split()
-                    if not msg_ids:
-                        continue
-
-                    # 1단계: 헤더만 먼저 가져와서 반송 메일인지 1차 필터링 (속도 향상을 위해)
-                    # RFC822 전체를 가져오는 대신 BODY.PEEK[HEADER.FIELDS (FROM SUBJECT)] 사용
-                    for num in msg_ids:
-                        try:
-                            # 헤더 필드만 우선 확인
-                            status, data = mail.fetch(num, '(BODY.PEEK[HEADER.FIELDS (FROM SUBJECT)])')
-                            if status != 'OK': continue
-                            
-                            header_msg = em_lib.message_from_bytes(data[0][1])
-                            sender = str(header_msg.get('From', '')).lower()
-                            subject_raw = str(header_msg.get('Subject', '')).lower()
-                            
-                            is_potential_bounce = any(kw in sender for kw in [
-                                'mailer-daemon', 'postmaster', 'delivery', 'noreply', 'no-reply'
-                            ]) or any(kw in subject_raw for kw in [
-                                'delivery status', 'undeliverable', 'returned mail',
-                                'failure notice', 'delivery failure', 'mail delivery failed',
-                                '반송', '전달 실패', 'delivery notification'
-                            ])
-                            
-                            if not is_potential_bounce:
-                                continue
-
-                            # 2단계: 반송 메일로 의심되는 경우에만 전체 본문을 가져와서 분석
-                            status, data = mail.fetch(num, '(RFC822)')
-                            if status != 'OK': continue
-                            
-                            raw_email = data[0][1]
-                            msg = em_message_from_bytes(raw_email)
-
-                            # 메일 본문에서 이메일 주소 추출
-                            content = self._extract_text(msg)
-                            found = re.findall(
-                                r'[a-zA-Z0-9._%+\-]+@[a-zA-Z0-9.\-]+\.[a-zA-Z]{2,}', content
-                            )
-                            for addr in found:
-                                addr_lower = addr.lower()
-                                # 자기 자신 주소나 시스템 주소 제외
-                                if addr_lower != self.email_addr.lower() and \
-                                   not any(kw in addr_lower for kw in ['mailer-daemon', 'postmaster']):
-                                    bounced.add(addr_lower)
-                        except Exception as e:
-                            print(f"[EmailReceiver] 개별 메일 처리 오류: {e}")
-                            continue
-
-                except Exception as fe:
-                    print(f"[EmailReceiver] 폴더 {folder} 처리 중 오류: {fe}")
+            # 1단계: 헤더만 UID 묶음으로 가져와서 반송 메일 후보 선별
+            candidates = []
+            failed_uid = None  # FETCH 에 실패한 묶음의 가장 작은 UID
+            for i in range(0, len(uids), IMAP_HEADER_FETCH_CHUNK):
+                chunk = uids[i:i + IMAP_HEADER_FETCH_CHUNK]
+                status, data = mail.uid('fetch', _imap_uid_set(chunk),
+                                        '(BODY.PEEK[HEADER.FIELDS (FROM SUBJECT CONTENT-TYPE)])')
+                if status != 'OK':
+                    failed_uid = min(chunk[0], failed_uid or chunk[0])
                     continue
+                for uid, header in _iter_fetch_parts(data):
+                    if _is_potential_bounce(em_lib.message_from_bytes(header)):
+                        candidates.append(uid)
 
-            mail.logout()
-        except Exception as e:
-            print(f"[EmailReceiver] IMAP 연결/검색 오류: {e}")
-            raise
-        finally:
-            try:
-                if mail:
-                    mail.logout()
-            except:
-                pass
+            # 2단계: 후보만 본문을 가져와서 DSN 분석 (PEEK: 읽음 표시하지 않음)
+            for i in range(0, len(candidates), IMAP_BODY_FETCH_CHUNK):
+                chunk = candidates[i:i + IMAP_BODY_FETCH_CHUNK]
+                status, data = mail.uid('fetch', _imap_uid_set(chunk), '(BODY.PEEK[])')
+                if status != 'OK':
+                    failed_uid = min(chunk[0], failed_uid or chunk[0])
+                    continue
+                for uid, raw_email in _iter_fetch_parts(data):
+                    try:
+                        bounced |= parse_bounce_recipients(em_message_from_bytes(raw_email), self.email_addr)
+                    except Exception as e:
+                        print(f"[EmailReceiver] 개별 메일 처리 오류 (UID {uid}): {e}")
 
-        return bounced
+            if failed_uid is not None:
+                new_last_uid = max([last_uid] + [uid for uid in uids if uid < failed_uid])
+                print(f"[EmailReceiver] {self.email_addr} {folder}: UID {failed_uid} 부터 FETCH 실패, 다음 스캔에서 다시 확인")
+                if new_last_uid == last_uid:
+                    return bounced, None
 
-    def _extract_text(self, msg):
-        """이메일 메시지에서 텍스트 내용을 추출합니다."""
-        text = ''
-        if msg.is_multipart():
-            for part in msg.walk():
-                ct = part.get_content_type()
-                if ct in ('text/plain', 'text/html', 'message/delivery-status'):
-                    try:
-                        payload = part.get_payload(decode=True)
-                        if payload:
-                            text += payload.decode('utf-8', errors='replace')
-                    except:
-                        text += str(part.get_payload())
-        else:
+            print(f"[EmailReceiver] {self.email_addr} {folder}: 신규 {len(uids)}건, 반송 후보 {len(candidates)}건, "
+                  f"반송 주소 {len(bounced)}개 (UID {last_uid} → {new_last_uid})")
+            return bounced, (uidvalidity, new_last_uid)
+        finally:
             try:
-                payload = msg.get_payload(decode=True)
-                if payload:
-                    text = payload.decode('utf-8', errors='replace')
+                mail.logout()
             except:
-                text = str(msg.get_payload())
-        return text
+                pass
 
 
-def check_bounce_and_update(smtp_config_id: int, since_date: str):
+def check_bounce_and_update(smtp_config_id, since_date: str, stop_event=None):
     """
     IMAP으로 반송 메일을 확인한 뒤 DB를 업데이트합니다.
+    smtp_config_id 는 하나 또는 목록 (여러 계정을 동시에 스캔)
+    stop_event 가 설정되면(작업 임대 상실) DB 에 반영하지 않고 None 을 반환합니다.
 
     처리 흐름:
-    1. smtp_configs에서 IMAP 설정 조회
-    2. EmailReceiver로 받은편지함 반송 메일 파싱
-    3. email_send_log에서 해당 이메일 주소의 레코드를 BOUNCE로 변경
+    1. smtp_configs에서 IMAP 설정과 폴더별 체크포인트 조회
+    2. 계정×폴더를 동시에 스캔하여 마지막 체크포인트 이후 반송 메일 파싱
+    3. 반송 주소를 임시 테이블에 적재하고 email_send_log 의 해당 레코드를 BOUNCE로 변경 (email_lower 조인)
     4. Company_Basic.email_usable = 0, last_send_status = 'BOUNCE' 로 설정
     5. send_batches의 fail_count / success_count 재집계
+    6. 스캔을 마친 폴더의 체크포인트 저장 (DB 반영과 같은 트랜잭션)
 
     Returns dict: {success, bounced_count, updated_log_count, message}
     """
     conn = get_db_connection()
     cursor = conn.cursor()
     try:
-        # 1. SMTP 설정 조회
-        cursor.execute('SELECT * FROM smtp_configs WHERE config_id = ?', (smtp_config_id,))
-        config = cursor.fetchone()
-        if not config:
+        # 1. SMTP 설정 / 체크포인트 조회
+        config_ids = smtp_config_id if isinstance(smtp_config_id, (list, tuple)) else [smtp_config_id]
+        ensure_imap_checkpoint_table(cursor)
+        receivers = {}
+        for config_id in config_ids:
+            cursor.execute('SELECT * FROM smtp_configs WHERE config_id = ?', (config_id,))
+            config = cursor.fetchone()
+            if not config:
+                continue
+            receivers[config_id] = EmailReceiver(
+                imap_server=config['imap_server'] if config['imap_server'] else 'imap.gmail.com',
+                imap_port=config['imap_port'] if config['imap_port'] else 993,
+                email_addr=config['sender_email'],
+                password=config['sender_password'],
+                checkpoints=load_imap_checkpoints(cursor, config_id)
+            )
+        if not receivers:
             return {'success': False, 'message': 'SMTP 설정을 찾을 수 없습니다.'}
 
-        imap_server = config['imap_server'] if config['imap_server'] else 'imap.gmail.com'
-        imap_port   = config['imap_port']   if config['imap_port']   else 993
-
-        # 2. 반송 메일 감지
-        receiver = EmailReceiver(
-            imap_server=imap_server,
-            imap_port=imap_port,
-            email_addr=config['sender_email'],
-            password=config['sender_password']
-        )
-        bounced_emails = receiver.check_bounces(since_date)
+        # 2. 반송 메일 감지 (계정×폴더 동시 스캔)
+        tasks = [(receiver, folder) for receiver in receivers.values() for folder in receiver.target_folders()]
+        results = scan_bounce_folders(tasks, since_date)
+        bounced_emails = set()
+        failed_accounts = {}
+        for receiver, folder, found, checkpoint, error in results:
+            bounced_emails |= found
+            if checkpoint:
+                receiver.scanned[folder] = checkpoint
+            elif error:
+                failed_accounts.setdefault(receiver.email_addr, str(error))
+        # 모든 폴더 연결이 실패한 계정은 오류로 보고
+        failed_accounts = {addr: err for addr, err in failed_accounts.items()
+                           if not any(r.scanned for r in receivers.values() if r.email_addr == addr)}
+        if len(failed_accounts) == len(receivers):
+            raise Exception(next(iter(failed_accounts.values())))
         print(f"[check_bounce] 감지된 반송 이메일: {bounced_emails}")
+        if stop_event is not None and stop_event.is_set():
+            return None
+
+        def _lease_lost():
+            # 임대를 잃었으면 다른 워커가 같은 범위를 다시 스캔하므로 반영하지 않음
+            if stop_event is not None and stop_event.is_set():
+                conn.rollback()
+                print("[check_bounce] 작업 임대 상실 - DB 반영 취소")
+                return True
+            return False
+
+        def _save_checkpoints():
+            for config_id, receiver in receivers.items():
+                if receiver.scanned:
+                    save_imap_checkpoints(cursor, config_id, receiver.scanned)
 
         if not bounced_emails:
+            _save_checkpoints()
+            if _lease_lost():
+                return None
+            conn.commit()
             return {
                 'success': True,
                 'bounced_count': 0,
                 'updated_log_count': 0,
-                'message': '반송된 이메일이 없습니다. (받은편지함 확인 완료)'
+                'message': '반송된 이메일이 없습니다. (받은편지함 확인 완료)',
+                'failed_accounts': failed_accounts
             }
 
-        # 3. email_send_log 에서 해당 날짜 이후 발송된 레코드 중 반송 이메일 → BOUNCE
-        updated_log = 0
-        for email_addr in bounced_emails:
-            cursor.execute('''
-                UPDATE email_send_log
-                SET status = 'BOUNCE', error_msg = '반송(수신 불가) - IMAP 자동 감지'
-                WHERE LOWER(email) = ?
-                  AND sent_at >= ?
-                  AND status = 'SUCCESS'
-            ''', (email_addr.lower(), since_date + ' 00:00:00'))
-            updated_log += cursor.rowcount
-
-        # 4. Company_Basic 업데이트: email_usable=0, 상태='BOUNCE'
+        # 3. 반송 주소를 임시 테이블에 적재 (이후 갱신은 모두 조인 1회씩)
+        since_ts = since_date + ' 00:00:00'
+        # email 컬럼은 타입을 지정하지 않음 (TEXT 친화도가 붙으면 LOWER(TRIM(email)) 표현식 인덱스를 쓰지 못함)
+        cursor.execute("CREATE TEMP TABLE IF NOT EXISTS bounced_addresses (email PRIMARY KEY)")
+        cursor.execute("DELETE FROM temp.bounced_addresses")
+        cursor.executemany("INSERT OR IGNORE INTO temp.bounced_addresses (email) VALUES (?)",
+                           [(normalize_email(e),) for e in bounced_emails])
+        backfill_email_lower(cursor)
+
+        # email_send_log: 해당 날짜 이후 발송 성공 레코드 중 반송 이메일 → BOUNCE (email_lower 인덱스)
+        cursor.execute('''
+            UPDATE email_send_log
+            SET status = 'BOUNCE', error_msg = '반송(수신 불가) - IMAP 자동 감지'
+            WHERE email_lower IN (SELECT email FROM temp.bounced_addresses)
+              AND sent_at >= ?
+              AND status = 'SUCCESS'
+        ''', (since_ts,))
+        updated_log = cursor.rowcount
+
+        # 4. Company_Basic 업데이트: email_usable=0, 상태='BOUNCE' (lower(trim(email)) 인덱스)
         now_str = get_kst_now().strftime('%Y-%m-%d %H:%M:%S')
-        bounce_list = list(bounced_emails)
-        placeholders = ','.join(['?'] * len(bounce_list))
-        cursor.execute(f'''
+        cursor.execute('''
             UPDATE Company_Basic
             SET email_usable = 0,
                 last_send_status = 'BOUNCE',
                 last_send_at = ?
-            WHERE LOWER(email) IN ({placeholders})
-        ''', [now_str] + [e.lower() for e in bounce_list])
+            WHERE LOWER(TRIM(email)) IN (SELECT email FROM temp.bounced_addresses)
+        ''', (now_str,))
 
-        # 5. send_batches 재집계 (since_date 이후 배치만)
+        # 5. send_batches 재집계 (since_date 이후 배치만, GROUP BY 1회)
         cursor.execute('''
-            SELECT DISTINCT batch_id FROM email_send_log
-            WHERE sent_at >= ?
-        ''', (since_date + ' 00:00:00',))
-        batch_ids = [r[0] for r in cursor.fetchall() if r[0]]
-
-        for bid in batch_ids:
-            cursor.execute('''
-                SELECT
-                    COUNT(*) as total,
-                    SUM(CASE WHEN status = 'SUCCESS' THEN 1 ELSE 0 END) as succ,
-                    SUM(CASE WHEN status IN ('FAIL','ERROR','BOUNCE') THEN 1 ELSE 0 END) as fail
-                FROM email_send_log WHERE batch_id = ?
-            ''', (bid,))
-            row = cursor.fetchone()
-            if row:
-                cursor.execute('''
-                    UPDATE send_batches
-                    SET success_count = ?, fail_count = ?
-                    WHERE batch_id = ?
-                ''', (row['succ'] or 0, row['fail'] or 0, bid))
+            CREATE TEMP TABLE IF NOT EXISTS bounce_batch_counts (
+                batch_id TEXT PRIMARY KEY, succ INTEGER, fail INTEGER
+            )
+        ''')
+        cursor.execute("DELETE FROM temp.bounce_batch_counts")
+        cursor.execute('''
+            INSERT INTO temp.bounce_batch_counts (batch_id, succ, fail)
+            SELECT batch_id,
+                   SUM(CASE WHEN status = 'SUCCESS' THEN 1 ELSE 0 END),
+                   SUM(CASE WHEN status IN ('FAIL','ERROR','BOUNCE') THEN 1 ELSE 0 END)
+            FROM email_send_log
+            WHERE batch_id IN (SELECT DISTINCT batch_id FROM email_send_log WHERE sent_at >= ? AND batch_id IS NOT NULL)
+            GROUP BY batch_id
+        ''', (since_ts,))
+        cursor.execute('''
+            UPDATE send_batches
+            SET success_count = (SELECT c.succ FROM temp.bounce_batch_counts c WHERE c.batch_id = send_batches.batch_id),
+                fail_count = (SELECT c.fail FROM temp.bounce_batch_counts c WHERE c.batch_id = send_batches.batch_id)
+            WHERE batch_id IN (SELECT batch_id FROM temp.bounce_batch_counts)
+        ''')
 
+        # 6. 체크포인트 저장
+        _save_checkpoints()
+        if _lease_lost():
+            return None
         conn.commit()
+        notify_company_changed()  # 이메일 주소 기준 갱신이라 대상 기업을 특정하지 않음
 
         return {
             'success': True,
             'bounced_count': len(bounced_emails),
             'updated_log_count': updated_log,
             'bounced_emails': list(bounced_emails),
+            'failed_accounts': failed_accounts,
             'message': (
                 f'반송 감지 완료: {len(bounced_emails)}개 이메일 반송 확인, '
                 f'{updated_log}건 로그 업데이트, '
@@ -877,8 +1721,261 @@ def check_bounce_and_update(smtp_config_id: int, since_date: str):
     finally:
         conn.close()
 
+# ─────────────────────────────────────────────────────────────
+# 📮 이메일 작업 큐 (SQLite, 임대/하트비트 기반)
+# ─────────────────────────────────────────────────────────────
+# 대량 발송과 반송 검사는 email_jobs 에 등록되고, 워커가 임대(lease)를 잡고 처리합니다.
+# - 워커: gunicorn 웹 워커 프로세스 내장 스레드(gunicorn.conf.py 의 post_worker_init 에서 시작, import 시에는 시작하지 않음)
+#   또는 별도 프로세스 `python -m email_service worker` (EMAIL_WORKER_MODE=external 이면 내장 워커는 시작하지 않음)
+#   별도 프로세스는 웹과 같은 DB 파일과 uploads/ 첨부 경로를 봐야 하므로 같은 서버(또는 공유 디스크)에서 실행
+# - 처리 중에는 하트비트로 임대를 연장하고, 프로세스가 죽어 임대가 만료되면 다른 워커가 이어서 처리
+# - 발송 작업은 email_send_log 에 결과가 있는 수신자를 건너뛰므로 마지막 발송 이후부터 재개
+EMAIL_JOB_LEASE_SECONDS = int(os.environ.get('EMAIL_JOB_LEASE_SECONDS', 60))
+EMAIL_JOB_HEARTBEAT_SECONDS = max(1, EMAIL_JOB_LEASE_SECONDS // 4)
+EMAIL_JOB_POLL_SECONDS = float(os.environ.get('EMAIL_JOB_POLL_SECONDS', 2))
+EMAIL_JOB_MAX_ATTEMPTS = int(os.environ.get('EMAIL_JOB_MAX_ATTEMPTS', 5))
+EMAIL_WORKER_CONCURRENCY = int(os.environ.get('EMAIL_WORKER_CONCURRENCY', 2))
+
+def ensure_email_job_table(cursor):
+    """작업 큐 테이블(email_jobs)과 발송 속도 상태 테이블(smtp_rate_state)을 생성합니다."""
+    ensure_smtp_rate_table(cursor)
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS email_jobs (
+            job_id TEXT PRIMARY KEY,
+            job_type TEXT NOT NULL,
+            payload TEXT NOT NULL,
+            status TEXT NOT NULL DEFAULT 'queued',
+            result TEXT,
+            attempts INTEGER DEFAULT 0,
+            lease_owner TEXT,
+            lease_expires_at REAL,
+            heartbeat_at TEXT,
+            created_at TEXT,
+            finished_at TEXT
+        )
+    ''')
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_email_jobs_status_created ON email_jobs(status, created_at)")
+
+def enqueue_email_job(job_type, payload, job_id=None, conn=None):
+    """작업을 등록하고 job_id 를 반환합니다. conn 을 넘기면 호출자의 트랜잭션에 포함(호출자가 commit)."""
+    job_id = job_id or uuid.uuid4().hex
+    own_conn = conn is None
+    conn = conn or get_db_connection()
+    try:
+        conn.execute('''
+            INSERT INTO email_jobs (job_id, job_type, payload, status, created_at)
+            VALUES (?, ?, ?, 'queued', ?)
+        ''', (job_id, job_type, json.dumps(payload, ensure_ascii=False, default=str),
+              get_kst_now().strftime('%Y-%m-%d %H:%M:%S')))
+        if own_conn:
+            conn.commit()
+    finally:
+        if own_conn:
+            conn.close()
+    return job_id
+
+def claim_email_job(worker_id):
+    """대기 중이거나 임대가 만료된 작업 1건을 임대합니다. 없으면 None."""
+    now = time.time()
+    conn = get_db_connection()
+    try:
+        conn.execute('BEGIN IMMEDIATE')
+        # 재시도 한도를 넘긴 채 임대가 만료된 작업은 오류 처리
+        conn.execute('''
+            UPDATE email_jobs SET status = 'error', lease_owner = NULL, finished_at = ?,
+                   result = '{"success": false, "message": "작업 재시도 한도 초과"}'
+            WHERE status = 'running' AND lease_expires_at < ? AND attempts >= ?
+        ''', (get_kst_now().strftime('%Y-%m-%d %H:%M:%S'), now, EMAIL_JOB_MAX_ATTEMPTS))
+        row = conn.execute('''
+            SELECT job_id, job_type, payload, attempts FROM email_jobs
+            WHERE status = 'queued' OR (status = 'running' AND lease_expires_at < ?)
+            ORDER BY created_at LIMIT 1
+        ''', (now,)).fetchone()
+        if not row:
+            conn.commit()
+            return None
+        conn.execute('''
+            UPDATE email_jobs SET status = 'running', lease_owner = ?, lease_expires_at = ?,
+                   heartbeat_at = ?, attempts = attempts + 1
+            WHERE job_id = ?
+        ''', (worker_id, now + EMAIL_JOB_LEASE_SECONDS, get_kst_now().strftime('%Y-%m-%d %H:%M:%S'), row['job_id']))
+        conn.commit()
+        return {'job_id': row['job_id'], 'job_type': row['job_type'],
+                'payload': json.loads(row['payload']), 'attempts': row['attempts'] + 1}
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+def heartbeat_email_job(job_id, worker_id):
+    """임대를 연장합니다. 임대를 잃었으면(다른 워커가 가져감) False."""
+    conn = get_db_connection()
+    try:
+        cursor = conn.execute('''
+            UPDATE email_jobs SET lease_expires_at = ?, heartbeat_at = ?
+            WHERE job_id = ? AND lease_owner = ? AND status = 'running'
+        ''', (time.time() + EMAIL_JOB_LEASE_SECONDS, get_kst_now().strftime('%Y-%m-%d %H:%M:%S'), job_id, worker_id))
+        conn.commit()
+        return cursor.rowcount > 0
+    finally:
+        conn.close()
+
+def finish_email_job(job_id, worker_id, status, result):
+    """작업을 완료(done/error) 처리합니다. (임대를 가진 워커만)"""
+    conn = get_db_connection()
+    try:
+        conn.execute('''
+            UPDATE email_jobs SET status = ?, result = ?, lease_owner = NULL, lease_expires_at = NULL, finished_at = ?
+            WHERE job_id = ? AND lease_owner = ?
+        ''', (status, json.dumps(result, ensure_ascii=False, default=str),
+              get_kst_now().strftime('%Y-%m-%d %H:%M:%S'), job_id, worker_id))
+        conn.commit()
+    finally:
+        conn.close()
+
+def get_email_job(job_id):
+    """작업 상태 조회 {job_id, job_type, status, result, attempts, ...}. 없으면 None."""
+    conn = get_db_connection()
+    try:
+        row = conn.execute('''
+            SELECT job_id, job_type, status, result, attempts, heartbeat_at, created_at, finished_at
+            FROM email_jobs WHERE job_id = ?
+        ''', (job_id,)).fetchone()
+    finally:
+        conn.close()
+    if not row:
+        return None
+    job = dict(row)
+    job['result'] = json.loads(job['result']) if job['result'] else None
+    return job
+
+def _run_send_batch_job(payload, stop_event):
+    conn = get_db_connection()
+    try:
+        config = conn.execute('SELECT * FROM smtp_configs WHERE config_id = ?', (payload['smtp_config_id'],)).fetchone()
+    finally:
+        conn.close()
+    if not config:
+        raise Exception('SMTP 설정을 찾을 수 없습니다.')
+
+    sender = EmailSender(
+        smtp_server=config['smtp_server'],
+        smtp_port=config['smtp_port'],
+        sender_email=config['sender_email'],
+        sender_password=config['sender_password']
+    )
+    status = sender._send_batch_worker(payload['batch_id'], payload['companies'], payload['subject'], payload['body'],
+                                       payload.get('group_name'), payload.get('attachments'),
+                                       stop_event=stop_event, resume=True)
+    if status is None:
+        return None
+    return {'success': status != 'error', 'batch_id': payload['batch_id'], 'status': status}
+
+def _run_bounce_scan_job(payload, stop_event):
+    try:
+        config_ids = payload['smtp_config_id']
+        if not isinstance(config_ids, list):
+            config_ids = int(config_ids)
+        return check_bounce_and_update(config_ids, payload['since_date'], stop_event=stop_event)
+    except Exception as e:
+        raise Exception(f'반송 검사 실패: {e}')
+
+EMAIL_JOB_HANDLERS = {
+    'send_batch': _run_send_batch_job,
+    'bounce_scan': _run_bounce_scan_job,
+}
+
+def run_email_job(job, worker_id):
+    """임대한 작업 1건을 처리합니다. 처리 중에는 하트비트로 임대를 연장합니다."""
+    job_id = job['job_id']
+    stop_event = threading.Event()   # 임대를 잃으면 설정 → 핸들러 중단
+    finished = threading.Event()
+
+    def _heartbeat():
+        while not finished.wait(EMAIL_JOB_HEARTBEAT_SECONDS):
+            try:
+                if not heartbeat_email_job(job_id, worker_id):
+                    print(f"[EMAIL WORKER] 임대 상실: {job_id}")
+                    stop_event.set()
+                    return
+            except Exception as e:
+                print(f"[EMAIL WORKER] heartbeat 실패 ({job_id}): {e}")
+
+    heartbeat = threading.Thread(target=_heartbeat, name=f'email-job-heartbeat-{job_id[:8]}', daemon=True)
+    heartbeat.start()
+    print(f"[EMAIL WORKER] {worker_id} → {job['job_type']} {job_id} (시도 {job['attempts']})")
+    try:
+        result = EMAIL_JOB_HANDLERS[job['job_type']](job['payload'], stop_event)
+    except Exception as e:
+        print(f"[EMAIL WORKER] 작업 실패 {job_id}: {e}")
+        finished.set()
+        finish_email_job(job_id, worker_id, 'error', {'success': False, 'message': str(e)})
+        return
+    finished.set()
+    if stop_event.is_set() and result is None:
+        return
+    finish_email_job(job_id, worker_id, 'done', result)
+
+def _email_worker_loop(worker_id, shutdown_event):
+    while not shutdown_event.is_set():
+        try:
+            job = claim_email_job(worker_id)
+        except Exception as e:
+            print(f"[EMAIL WORKER] 작업 조회 실패: {e}")
+            job = None
+        if job is None:
+            shutdown_event.wait(EMAIL_JOB_POLL_SECONDS)
+            continue
+        run_email_job(job, worker_id)
+
+def _start_email_worker_threads(concurrency, shutdown_event):
+    conn = get_db_connection()
+    try:
+        ensure_email_job_table(conn.cursor())
+        conn.commit()
+    finally:
+        conn.close()
+    base_id = f"{socket.gethostname()}:{os.getpid()}"
+    threads = []
+    for i in range(max(1, concurrency)):
+        thread = threading.Thread(target=_email_worker_loop, args=(f"{base_id}:{i}", shutdown_event),
+                                  name=f'email-worker-{i}', daemon=True)
+        thread.start()
+        threads.append(thread)
+    return threads
+
+_embedded_worker_started = False
+
+def start_embedded_email_worker():
+    """
+    웹 프로세스 안에서 작업 큐 워커 스레드를 시작합니다. (EMAIL_WORKER_MODE=external 이면 생략, 프로세스당 1회)
+    gunicorn 워커 초기화 훅 / 개발 서버 실행 시에만 호출 (web_app import 만으로는 시작하지 않음)
+    """
+    global _embedded_worker_started
+    if _embedded_worker_started or os.environ.get('EMAIL_WORKER_MODE', 'embedded') == 'external':
+        return
+    _embedded_worker_started = True
+    _start_email_worker_threads(EMAIL_WORKER_CONCURRENCY, threading.Event())
+    print(f"[EMAIL WORKER] embedded worker started ({EMAIL_WORKER_CONCURRENCY} threads)")
+
+def run_email_worker(concurrency=EMAIL_WORKER_CONCURRENCY):
+    """별도 워커 프로세스 진입점: python -m email_service worker"""
+    shutdown_event = threading.Event()
+    threads = _start_email_worker_threads(concurrency, shutdown_event)
+    print(f"[EMAIL WORKER] started pid={os.getpid()} threads={concurrency} db={DB_PATH}")
+    try:
+        while any(thread.is_alive() for thread in threads):
+            time.sleep(1)
+    except KeyboardInterrupt:
+        print("[EMAIL WORKER] shutting down (진행 중인 작업은 임대 만료 후 다른 워커가 이어서 처리)")
+        shutdown_event.set()
+
 
 if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == 'worker':
+        run_email_worker(int(sys.argv[2]) if len(sys.argv) > 2 else EMAIL_WORKER_CONCURRENCY)
+        sys.exit(0)
     print("\n" + "="*60)
     print(" [🔵 QUANTUM EMAIL SERVICE ENGINE V2.0 ]")
     print("="*60)
@@ -888,4 +1985,5 @@ if __name__ == "__main__":
     print("-" * 60)
     print("  ※ 시스템 가동을 위해 터미널에서 아래 명령을 실행하십시오:")
     print("  > python web_app.py")
+    print("  > python -m email_service worker   (발송/반송 검사 작업 워커)")
     print("="*60 + "\n")
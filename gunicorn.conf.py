@@ -0,0 +1,7 @@
+# gunicorn 설정 (gunicorn 이 실행 디렉터리의 gunicorn.conf.py 를 자동으로 읽음)
+
+
+def post_worker_init(worker):
+    """웹 워커 프로세스마다 이메일 작업 큐 워커 스레드를 시작합니다. (web_app import 만으로는 시작하지 않음)"""
+    from email_service import start_embedded_email_worker
+    start_embedded_email_worker()
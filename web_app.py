@@ -6,9 +6,10 @@ import subprocess
 import sqlite3
 import io
 import time
+import threading
 import json
 import uuid
-from flask import Flask, jsonify, render_template, request, session, redirect, url_for, Response, send_file, send_from_directory
+from flask import Flask, jsonify, render_template, request, session, redirect, url_for, Response, send_file, send_from_directory, stream_with_context
 from datetime import datetime
 import pytz
 import pandas as pd
@@ -83,6 +84,41 @@ def get_kst_now():
 import pytz
 from datetime import datetime, timedelta, date
 from email_service import EmailSender, get_email_history, get_all_batches, DB_PATH, get_db_connection
+from email_service import release_request_connection, get_db_pool_stats
+from email_service import ensure_email_job_table, enqueue_email_job, get_email_job, start_embedded_email_worker
+from email_service import ensure_imap_checkpoint_table, ensure_email_lower_column, normalize_email
+from email_service import add_company_change_listener
+
+# 요청 중 close() 되지 않은 DB 연결도 요청 종료 시 풀에 반환
+app.teardown_appcontext(release_request_connection)
+
+# --- 대량 목록 API 용 조회/JSON 응답 ---
+try:
+    import orjson
+except ImportError:
+    orjson = None  # 미설치 시 표준 json 사용
+
+def fetch_rows(conn, sql, params=()):
+    """
+    sqlite3.Row 대신 tuple 로 조회합니다. (행마다 Row 객체를 만들지 않음)
+    반환값: (columns, rows) - 컬럼명은 cursor.description 기준
+    """
+    cursor = conn.cursor()
+    cursor.row_factory = None
+    cursor.execute(sql, params)
+    return tuple(col[0] for col in cursor.description), cursor.fetchall()
+
+def rows_to_records(columns, rows):
+    """목록 API 응답용 [{컬럼: 값}, ...] (기존 화면들이 객체 배열 형식을 사용하므로 유지)"""
+    return [dict(zip(columns, row)) for row in rows]
+
+def fast_jsonify(payload, status=200):
+    """jsonify 대체: orjson 으로 바로 bytes 직렬화 (없으면 표준 json)"""
+    if orjson is not None:
+        body = orjson.dumps(payload, default=str, option=orjson.OPT_NON_STR_KEYS)
+    else:
+        body = json.dumps(payload, ensure_ascii=False, separators=(',', ':'), default=str).encode('utf-8')
+    return Response(body, status=status, mimetype='application/json')
 
 # --- 커스텀 템플릿 로더 (UTF-8 우선, CP949 폴백) ---
 class UTF8FileSystemLoader(FileSystemLoader):
@@ -537,6 +573,9 @@ def init_pipeline_tables():
             notes TEXT,
             expected_amount INTEGER DEFAULT 0,
             priority_level INTEGER DEFAULT 1 CHECK (priority_level BETWEEN 1 AND 5),
+            urgency_level INTEGER DEFAULT 0,
+            days_since_contact INTEGER,
+            d_day INTEGER,
             created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
             updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
         )
@@ -1180,6 +1219,558 @@ def check_permission(user_level, required_level):
     level_hierarchy = {'VIP': 5, 'V': 4, 'S': 3, 'M': 2, 'N': 1}
     return level_hierarchy.get(user_level, 0) >= level_hierarchy.get(required_level, 0)
 
+# --- 최신 결산년도 재무 요약 (Company_Financial_Latest) ---
+# 검색/상세 화면이 매 요청마다 Company_Financial 전체를 GROUP BY 하지 않도록
+# 기업별 최신 결산년도 1건만 별도 테이블로 유지합니다. (batch_upload_v2.py 와 동일한 구조)
+COMPANY_FINANCIAL_LATEST_COLUMNS = ['fiscal_year', 'rating1', 'total_assets', 'sales_revenue', 'retained_earnings']
+
+def ensure_company_financial_latest_table(cursor):
+    """Company_Financial_Latest 테이블과 인덱스를 생성합니다."""
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS Company_Financial_Latest (
+            biz_no VARCHAR(12) PRIMARY KEY,
+            fiscal_year INTEGER,
+            rating1 VARCHAR(20),
+            total_assets BIGINT,
+            sales_revenue BIGINT,
+            retained_earnings BIGINT
+        )
+    ''')
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_fin_latest_retained ON Company_Financial_Latest(retained_earnings)")
+
+def refresh_company_financial_latest(conn, biz_nos=None):
+    """
+    Company_Financial_Latest 를 갱신합니다. (commit 은 호출자 책임)
+    - biz_nos 지정: 해당 기업만 증분 갱신 (재무 데이터가 없으면 삭제)
+    - biz_nos 없음: 전체 재구성
+    """
+    cols = ', '.join(COMPANY_FINANCIAL_LATEST_COLUMNS)
+    src_cols = ', '.join(f"f.{col}" for col in COMPANY_FINANCIAL_LATEST_COLUMNS)
+    cursor = conn.cursor()
+    if biz_nos is None:
+        cursor.execute("DELETE FROM Company_Financial_Latest")
+        cursor.execute(f'''
+            INSERT OR REPLACE INTO Company_Financial_Latest (biz_no, {cols})
+            SELECT f.biz_no, {src_cols}
+            FROM Company_Financial f
+            JOIN (SELECT biz_no, MAX(fiscal_year) AS max_year FROM Company_Financial GROUP BY biz_no) m
+              ON f.biz_no = m.biz_no AND f.fiscal_year = m.max_year
+        ''')
+        return
+
+    keys = [(biz_no,) for biz_no in set(biz_nos) if biz_no]
+    cursor.executemany("DELETE FROM Company_Financial_Latest WHERE biz_no = ?", keys)
+    cursor.executemany(f'''
+        INSERT OR REPLACE INTO Company_Financial_Latest (biz_no, {cols})
+        SELECT f.biz_no, {src_cols}
+        FROM Company_Financial f
+        WHERE f.biz_no = ?
+        ORDER BY f.fiscal_year DESC
+        LIMIT 1
+    ''', keys)
+
+# --- 전문 검색 색인 (SQLite FTS5, trigram 토크나이저) ---
+# LIKE '%키워드%' 는 B-tree 인덱스를 사용할 수 없어 매번 전체 스캔이 발생하므로
+# 검색 대상 컬럼을 FTS5 외부 콘텐츠(content=) 색인으로 유지합니다.
+# trigram 토크나이저는 한글을 3글자 단위로 색인하므로 띄어쓰기 없는 부분 일치도 가능합니다.
+# 단, 3글자 미만 검색어는 색인으로 찾을 수 없어 LIKE 조건으로 처리합니다.
+SEARCH_FTS_MIN_TERM_LENGTH = 3
+SEARCH_INDEXES = {
+    'Company_Search_FTS': ('Company_Basic', ['biz_no', 'company_name', 'representative_name', 'address', 'industry_name', 'email']),
+    'Individual_Search_FTS': ('individual_business_owners', ['business_number', 'company_name', 'address', 'industry_type']),
+}
+_search_index_ready = set()  # 현재 프로세스에서 사용 가능한 FTS 테이블명
+
+def ensure_search_indexes(conn):
+    """FTS5 색인과 동기화 트리거를 생성합니다. 새로 만든 색인은 원본 테이블로부터 전체 구성합니다."""
+    cursor = conn.cursor()
+    for fts_table, (base_table, columns) in SEARCH_INDEXES.items():
+        try:
+            cursor.execute(f"PRAGMA table_info({base_table})")
+            base_cols = [row[1] for row in cursor.fetchall()]
+            if not base_cols or any(col not in base_cols for col in columns):
+                _search_index_ready.discard(fts_table)
+                continue
+
+            cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name=?", (fts_table,))
+            is_new = cursor.fetchone() is None
+
+            col_list = ', '.join(columns)
+            new_vals = ', '.join(f"new.{col}" for col in columns)
+            old_vals = ', '.join(f"old.{col}" for col in columns)
+            cursor.execute(f'''
+                CREATE VIRTUAL TABLE IF NOT EXISTS {fts_table}
+                USING fts5({col_list}, content='{base_table}', tokenize='trigram')
+            ''')
+            cursor.execute(f'''
+                CREATE TRIGGER IF NOT EXISTS trg_{fts_table.lower()}_ai AFTER INSERT ON {base_table} BEGIN
+                    INSERT INTO {fts_table}(rowid, {col_list}) VALUES (new.rowid, {new_vals});
+                END
+            ''')
+            cursor.execute(f'''
+                CREATE TRIGGER IF NOT EXISTS trg_{fts_table.lower()}_ad AFTER DELETE ON {base_table} BEGIN
+                    INSERT INTO {fts_table}({fts_table}, rowid, {col_list}) VALUES ('delete', old.rowid, {old_vals});
+                END
+            ''')
+            cursor.execute(f'''
+                CREATE TRIGGER IF NOT EXISTS trg_{fts_table.lower()}_au AFTER UPDATE OF {col_list} ON {base_table} BEGIN
+                    INSERT INTO {fts_table}({fts_table}, rowid, {col_list}) VALUES ('delete', old.rowid, {old_vals});
+                    INSERT INTO {fts_table}(rowid, {col_list}) VALUES (new.rowid, {new_vals});
+                END
+            ''')
+            if is_new:
+                print(f"[SEARCH INDEX] Building {fts_table} from {base_table}...")
+                cursor.execute(f"INSERT INTO {fts_table}({fts_table}) VALUES ('rebuild')")
+            _search_index_ready.add(fts_table)
+        except sqlite3.OperationalError as e:
+            # FTS5/trigram 미지원 SQLite 등: LIKE 검색으로 동작
+            print(f"[SEARCH INDEX] {fts_table} unavailable: {e}")
+            _search_index_ready.discard(fts_table)
+
+def build_search_filters(fts_table, rowid_expr, column_terms):
+    """
+    검색어 조건을 FTS5 MATCH 1개 + (색인 불가 검색어용) LIKE 조건으로 변환합니다.
+    - column_terms: [(컬럼 리스트, 검색어), ...] - 컬럼 리스트 중 하나라도 포함하면 일치(OR), 항목끼리는 AND
+    - rowid_expr: 원본 테이블 rowid 표현식 (예: 'b.rowid')
+    반환값: (filters, params) - 컬럼명 앞에는 rowid_expr 의 별칭이 붙습니다.
+    """
+    alias = rowid_expr.rsplit('.', 1)[0] + '.' if '.' in rowid_expr else ''
+    filters, params = [], []
+    match_parts = []
+    for columns, term in column_terms:
+        term = (term or '').strip()
+        if not term:
+            continue
+        if fts_table in _search_index_ready and len(term) >= SEARCH_FTS_MIN_TERM_LENGTH:
+            quoted = '"' + term.replace('"', '""') + '"'
+            match_parts.append(f"{{{' '.join(columns)}}} : {quoted}")
+        else:
+            filters.append('(' + ' OR '.join(f"{alias}{col} LIKE ?" for col in columns) + ')')
+            params.extend([f"%{term}%"] * len(columns))
+
+    if match_parts:
+        filters.insert(0, f"{rowid_expr} IN (SELECT rowid FROM {fts_table} WHERE {fts_table} MATCH ?)")
+        params.insert(0, ' AND '.join(match_parts))
+    return filters, params
+
+# --- 인덱스 마이그레이션 (버전 관리) ---
+# (버전, 설명, [(테이블, 인덱스명, 컬럼 리스트), ...])
+# 새 인덱스가 필요하면 기존 항목을 수정하지 말고 다음 버전을 추가합니다. 적용 이력은 schema_migrations 에 기록되며,
+# 대상 테이블이 아직 없으면 해당 버전은 기록하지 않고 다음 기동 시 다시 시도합니다.
+INDEX_MIGRATIONS = [
+    (1, 'hot query indexes', [
+        ('Contact_History', 'idx_contact_history_biz_datetime', ['biz_no', 'contact_datetime']),
+        ('Contact_History', 'idx_contact_history_registered_datetime', ['registered_by', 'contact_datetime']),
+        ('Contact_History', 'idx_contact_history_datetime', ['contact_datetime']),
+        ('Company_Financial', 'idx_company_financial_biz_year', ['biz_no', 'fiscal_year']),
+        ('Company_Shareholder', 'idx_company_shareholder_biz', ['biz_no']),
+        ('Company_Representative', 'idx_company_representative_biz', ['biz_no']),
+        ('Company_Additional', 'idx_company_additional_biz', ['biz_no']),
+        ('email_send_log', 'idx_email_send_log_biz_sent', ['biz_no', 'sent_at']),
+        ('email_send_log', 'idx_email_send_log_batch_sent', ['batch_id', 'sent_at']),
+        ('email_group_members', 'idx_email_group_members_group', ['group_id']),
+        ('managed_companies', 'idx_managed_companies_manager', ['manager_id']),
+        ('managed_companies', 'idx_managed_companies_biz_no', ['biz_reg_no']),
+    ]),
+    (2, 'pipeline urgency indexes', [
+        ('managed_companies', 'idx_managed_companies_manager_urgency', ['manager_id', 'urgency_level', 'last_contact_date']),
+        ('managed_companies', 'idx_managed_companies_manager_dday', ['manager_id', 'd_day']),
+    ]),
+    (3, 'bounce reconciliation indexes', [
+        ('email_send_log', 'idx_email_send_log_email_lower', ['email_lower']),
+        ('Company_Basic', 'idx_company_basic_email_lower', ['LOWER(TRIM(email))']),
+    ]),
+]
+
+def _index_prefix_exists(cursor, table, columns):
+    """table 에 columns 로 시작하는 인덱스(PK/UNIQUE 자동 인덱스 포함)가 이미 있는지 확인합니다."""
+    for index_row in cursor.execute(f"PRAGMA index_list({table})").fetchall():
+        index_cols = [row[2] for row in cursor.execute(f"PRAGMA index_info('{index_row[1]}')").fetchall()]
+        if index_cols[:len(columns)] == columns:
+            return True
+    return False
+
+def apply_index_migrations(conn):
+    """INDEX_MIGRATIONS 중 아직 적용되지 않은 버전을 순서대로 적용합니다. (commit 은 호출자 책임)"""
+    cursor = conn.cursor()
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            version INTEGER PRIMARY KEY,
+            description TEXT,
+            applied_at TEXT
+        )
+    ''')
+    applied_versions = {row[0] for row in cursor.execute("SELECT version FROM schema_migrations").fetchall()}
+
+    created = False
+    for version, description, indexes in INDEX_MIGRATIONS:
+        if version in applied_versions:
+            continue
+        print(f"[SCHEMA FIX] Applying index migration v{version}: {description}")
+        complete = True
+        for table, index_name, columns in indexes:
+            try:
+                cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name=?", (table,))
+                if not cursor.fetchone():
+                    print(f"  - pending {index_name}: table {table} not found")
+                    complete = False
+                    continue
+                if _index_prefix_exists(cursor, table, columns):
+                    continue
+                cursor.execute(f"CREATE INDEX IF NOT EXISTS {index_name} ON {table}({', '.join(columns)})")
+                print(f"  - created {index_name}")
+                created = True
+            except Exception as idx_err:
+                print(f"  - failed {index_name}: {idx_err}")
+                complete = False
+        if complete:
+            cursor.execute("INSERT INTO schema_migrations (version, description, applied_at) VALUES (?, ?, ?)",
+                           (version, description, format_kst_datetime()))
+
+    if created:
+        # 새 인덱스를 쿼리 플래너 통계에 반영
+        cursor.execute("PRAGMA optimize")
+
+# --- 대시보드 집계 카운터 ---
+# 테이블별 행 수를 system_stats 에 보관하고 INSERT/DELETE 트리거로 증감합니다.
+# (대량 업로드/DB 교체 후에는 refresh_system_stats 로 다시 집계)
+SYSTEM_STATS_TABLES = {
+    'company_basic_count': 'Company_Basic',
+    'contact_history_count': 'Contact_History',
+}
+SYSTEM_STATS_CACHE_TTL = 60  # 초
+_system_stats_cache = {'expires_at': 0, 'values': {}}
+
+def ensure_system_stats(conn):
+    """system_stats 테이블과 카운터 트리거를 생성하고, 비어 있는 카운터는 1회 집계합니다."""
+    cursor = conn.cursor()
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS system_stats (
+            stat_key TEXT PRIMARY KEY,
+            stat_value INTEGER NOT NULL DEFAULT 0,
+            updated_at TEXT
+        )
+    """)
+    for stat_key, table in SYSTEM_STATS_TABLES.items():
+        if not cursor.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name=?", (table,)).fetchone():
+            continue
+        cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS trg_stats_{table}_ai AFTER INSERT ON {table} BEGIN
+                UPDATE system_stats SET stat_value = stat_value + 1 WHERE stat_key = '{stat_key}';
+            END
+        """)
+        cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS trg_stats_{table}_ad AFTER DELETE ON {table} BEGIN
+                UPDATE system_stats SET stat_value = stat_value - 1 WHERE stat_key = '{stat_key}';
+            END
+        """)
+        if not cursor.execute("SELECT 1 FROM system_stats WHERE stat_key = ?", (stat_key,)).fetchone():
+            refresh_system_stats(conn, [stat_key])
+
+def refresh_system_stats(conn, stat_keys=None):
+    """카운터를 COUNT(*) 로 다시 집계합니다. (호출자가 commit)"""
+    cursor = conn.cursor()
+    now = format_kst_datetime()
+    for stat_key in (stat_keys or SYSTEM_STATS_TABLES):
+        table = SYSTEM_STATS_TABLES[stat_key]
+        try:
+            count = cursor.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+        except sqlite3.OperationalError:
+            continue
+        cursor.execute("""
+            INSERT INTO system_stats (stat_key, stat_value, updated_at) VALUES (?, ?, ?)
+            ON CONFLICT(stat_key) DO UPDATE SET stat_value = excluded.stat_value, updated_at = excluded.updated_at
+        """, (stat_key, count, now))
+    _system_stats_cache['expires_at'] = 0
+
+def get_system_stats():
+    """대시보드 카운터 {stat_key: 값} (프로세스 내 SYSTEM_STATS_CACHE_TTL 초 캐시)"""
+    now = time.time()
+    if _system_stats_cache['expires_at'] > now:
+        return _system_stats_cache['values']
+    conn = get_db_connection()
+    try:
+        values = {row[0]: row[1] for row in conn.execute("SELECT stat_key, stat_value FROM system_stats")}
+    except sqlite3.OperationalError:
+        values = {}
+    finally:
+        conn.close()
+    _system_stats_cache.update(expires_at=now + SYSTEM_STATS_CACHE_TTL, values=values)
+    return values
+
+# --- 파이프라인 긴급도/D-day 사전 계산 ---
+# managed_companies 의 urgency_level/days_since_contact/d_day 는 날짜가 바뀌면 값이 달라지므로
+# 쓰기 경로에서는 해당 행만, 날짜가 바뀐 뒤에는 전체를 다시 계산합니다. (마지막 전체 계산일은 system_stats 에 기록)
+
+# 관리 소홀 알림 주기 (상태별 마지막 접촉 후 경과 일수, models.pipeline_models.ManagedCompany.ALERT_PERIODS 와 동일)
+PIPELINE_ALERT_DAYS = {
+    'prospect': 14, 'contacted': 7, 'proposal': 3,
+    'negotiation': 2, 'contract': 30, 'hold': 30
+}
+PIPELINE_ALERT_DAYS_CASE = "CASE mc.status " + " ".join(
+    f"WHEN '{status}' THEN {days}" for status, days in PIPELINE_ALERT_DAYS.items()) + " END"
+
+# urgency_level: 2 = 관리 소홀(알림 주기 초과 또는 접촉 기록 없음), 1 = 연락 예정일 도래/경과, 0 = 정상
+PIPELINE_URGENCY_URGENT = 2
+PIPELINE_URGENCY_DUE = 1
+PIPELINE_URGENCY_COLUMNS = [
+    ('urgency_level', "INTEGER DEFAULT 0"),
+    ('days_since_contact', "INTEGER"),
+    ('d_day', "INTEGER"),
+]
+PIPELINE_URGENCY_STAT_KEY = 'pipeline_urgency_date'  # system_stats 에 YYYYMMDD 정수로 저장
+
+def ensure_pipeline_urgency_columns(cursor):
+    """managed_companies 에 긴급도 컬럼이 없으면 추가합니다."""
+    if not cursor.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name='managed_companies'").fetchone():
+        return
+    cols = {row[1] for row in cursor.execute("PRAGMA table_info(managed_companies)").fetchall()}
+    for col_name, col_type in PIPELINE_URGENCY_COLUMNS:
+        if col_name not in cols:
+            print(f"[SCHEMA FIX] Adding column {col_name} to managed_companies")
+            cursor.execute(f"ALTER TABLE managed_companies ADD COLUMN {col_name} {col_type}")
+
+def refresh_pipeline_urgency(conn, company_ids=None, today=None):
+    """
+    긴급도/경과일/D-day 를 today 기준으로 다시 계산합니다. (호출자가 commit)
+    - days_since_contact: 마지막 접촉 후 경과 일수 (접촉 기록이 없으면 NULL)
+    - d_day: 다음 연락 예정일까지 남은 일수 (0 = 오늘, 음수 = 지남)
+    - company_ids 가 없으면 전체를 계산하고 계산일을 system_stats 에 기록
+    """
+    today = today or datetime.now().strftime('%Y-%m-%d')
+    days_since = "CAST(julianday(:today) - julianday(date(mc.last_contact_date)) AS INTEGER)"
+    d_day = "CAST(julianday(date(mc.next_contact_date)) - julianday(:today) AS INTEGER)"
+    query = f"""
+        UPDATE managed_companies AS mc SET
+            days_since_contact = {days_since},
+            d_day = {d_day},
+            urgency_level = CASE
+                WHEN ({PIPELINE_ALERT_DAYS_CASE}) IS NOT NULL
+                     AND COALESCE({days_since} > ({PIPELINE_ALERT_DAYS_CASE}), 1) THEN {PIPELINE_URGENCY_URGENT}
+                WHEN {d_day} <= 0 THEN {PIPELINE_URGENCY_DUE}
+                ELSE 0 END
+    """
+    params = {'today': today}
+    if company_ids is not None:
+        if not company_ids:
+            return
+        params.update({f'id{i}': company_id for i, company_id in enumerate(company_ids)})
+        query += f" WHERE mc.id IN ({', '.join(':id' + str(i) for i in range(len(company_ids)))})"
+    conn.execute(query, params)
+    if company_ids is None:
+        conn.execute("""
+            INSERT INTO system_stats (stat_key, stat_value, updated_at) VALUES (?, ?, ?)
+            ON CONFLICT(stat_key) DO UPDATE SET stat_value = excluded.stat_value, updated_at = excluded.updated_at
+        """, (PIPELINE_URGENCY_STAT_KEY, int(today.replace('-', '')), format_kst_datetime()))
+
+def ensure_pipeline_urgency_current(conn, today=None):
+    """마지막 전체 계산일이 오늘이 아니면 전체를 다시 계산하고 commit 합니다. 다시 계산했으면 True."""
+    today = today or datetime.now().strftime('%Y-%m-%d')
+    row = conn.execute("SELECT stat_value FROM system_stats WHERE stat_key = ?", (PIPELINE_URGENCY_STAT_KEY,)).fetchone()
+    if row and row[0] == int(today.replace('-', '')):
+        return False
+    refresh_pipeline_urgency(conn, today=today)
+    conn.commit()
+    print(f"[PIPELINE] urgency refreshed for {today}")
+    return True
+
+def start_pipeline_urgency_scheduler():
+    """
+    자정이 지나면 긴급도를 전체 재계산하고 오래된 변경 피드를 정리하는 야간 작업 스레드를 시작합니다.
+    (워커마다 실행되어도 긴급도는 하루 1회만 계산)
+    """
+    import threading
+
+    def _run():
+        while True:
+            now = datetime.now()
+            next_run = datetime.combine(now.date() + timedelta(days=1), datetime.min.time()) + timedelta(minutes=1)
+            time.sleep((next_run - now).total_seconds())
+            conn = get_db_connection()
+            try:
+                if ensure_pipeline_urgency_current(conn):
+                    invalidate_pipeline_dashboard()
+                prune_pipeline_changes(conn)
+                conn.commit()
+            except Exception as e:
+                print(f"[PIPELINE] nightly urgency refresh failed: {e}")
+            finally:
+                conn.close()
+
+    threading.Thread(target=_run, name='pipeline-urgency-nightly', daemon=True).start()
+
+# --- 파이프라인 변경 피드 ---
+# 관심 기업 등록/수정/삭제, 접촉 이력 등록 시 (담당자, 기업 id) 를 pipeline_changes 에 기록하고,
+# /api/pipeline/changes (SSE) 가 seq 이후 변경분만 전달합니다. 워커 프로세스가 여러 개여도 DB 로 공유됩니다.
+PIPELINE_CHANGE_RETENTION_DAYS = 2
+
+def ensure_pipeline_change_table(cursor):
+    """변경 피드 테이블(pipeline_changes)을 생성합니다."""
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS pipeline_changes (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            manager_id TEXT NOT NULL,
+            company_id INTEGER NOT NULL,
+            change_type TEXT NOT NULL,
+            changed_at TEXT
+        )
+    """)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_pipeline_changes_manager_seq ON pipeline_changes(manager_id, seq)")
+
+def record_pipeline_change(conn, manager_id, company_id, change_type='upsert'):
+    """변경 피드에 기록합니다. change_type: 'upsert' | 'delete' (호출자의 트랜잭션에 포함, 호출자가 commit)"""
+    conn.execute("INSERT INTO pipeline_changes (manager_id, company_id, change_type, changed_at) VALUES (?, ?, ?, ?)",
+                 (manager_id, company_id, change_type, format_kst_datetime()))
+
+def prune_pipeline_changes(conn):
+    """보관 기간이 지난 변경 기록을 삭제합니다. (호출자가 commit)"""
+    cutoff = (datetime.now(pytz.timezone('Asia/Seoul')) - timedelta(days=PIPELINE_CHANGE_RETENTION_DAYS)).strftime('%Y-%m-%d')
+    conn.execute("DELETE FROM pipeline_changes WHERE changed_at < ?", (cutoff,))
+
+# --- 전체 기업 비상장주식 가치 일괄 계산 ---
+COMPANY_VALUATION_COLUMNS = ['biz_no', 'fiscal_year', 'asset_value', 'profit_value', 'calculated_value',
+                             'total_shares', 'shares_source', 'estimated_stock_value', 'updated_at']
+
+def ensure_company_valuation_table(cursor):
+    """추정 주당가치 테이블(Company_Valuation)을 생성합니다."""
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS Company_Valuation (
+            biz_no TEXT PRIMARY KEY,
+            fiscal_year INTEGER,
+            asset_value REAL,
+            profit_value REAL,
+            calculated_value REAL,
+            total_shares REAL,
+            shares_source TEXT,
+            estimated_stock_value REAL,
+            updated_at TEXT
+        )
+    """)
+    # 주가 높은순 정렬(estimated_stock_value DESC, biz_no) 을 정렬 없이 인덱스 순서로 읽도록 구성
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_valuation_stock_value ON Company_Valuation(estimated_stock_value DESC, biz_no)")
+
+def _numeric_column(series):
+    """천단위 콤마가 섞인 문자열 컬럼을 숫자로 변환합니다. (변환 불가 값은 NaN)"""
+    if series.dtype == object:
+        series = series.astype(str).str.replace(',', '', regex=False)
+    return pd.to_numeric(series, errors='coerce')
+
+VALUATION_FINANCIAL_SQL = """
+    SELECT biz_no, fiscal_year, total_assets, total_liabilities, net_income,
+           shares_issued_count, capital_stock_value
+    FROM (
+        SELECT biz_no, fiscal_year, total_assets, total_liabilities, net_income,
+               shares_issued_count, capital_stock_value,
+               ROW_NUMBER() OVER (PARTITION BY biz_no ORDER BY fiscal_year DESC) AS rn
+        FROM Company_Financial {where}
+    )
+    WHERE rn <= 3
+"""
+VALUATION_SHAREHOLDER_SQL = """
+    SELECT biz_no, total_shares_owned
+    FROM Company_Shareholder
+    WHERE total_shares_owned IS NOT NULL AND total_shares_owned != '' AND total_shares_owned != '0' {where}
+"""
+
+def _compute_company_valuation(fin, holders):
+    """
+    최근 3개년 재무(fin)와 주주 소유 주식수(holders) DataFrame 으로 기업별 추정 주당가치를 계산합니다.
+    calculate_unlisted_stock_value 와 같은 규칙이며, 반환값은 COMPANY_VALUATION_COLUMNS DataFrame 입니다.
+    """
+    import numpy as np
+
+    # 주주 소유 주식수 합계: 기업 상세(sum_shareholder_shares)와 같은 규칙 (천단위 콤마 제거, 변환 불가 값 제외)
+    holders['total_shares_owned'] = _numeric_column(holders['total_shares_owned'])
+    holders = holders.groupby('biz_no')['total_shares_owned'].sum().rename('shareholder_shares')
+
+    for col in ['fiscal_year', 'total_assets', 'total_liabilities', 'net_income', 'shares_issued_count', 'capital_stock_value']:
+        fin[col] = _numeric_column(fin[col])
+
+    # 최근 3년 평균 순이익 (값이 있는 연도만 평균)
+    avg_income = fin.groupby('biz_no')['net_income'].mean().fillna(0)
+
+    # 최신 결산년도 행 (calculate_unlisted_stock_value 와 동일하게 결산년도 숫자 기준 최대값)
+    fin['_year_key'] = fin['fiscal_year'].fillna(0)
+    latest = fin.sort_values(['biz_no', '_year_key'], ascending=[True, False]).drop_duplicates('biz_no').set_index('biz_no')
+    latest = latest.join(avg_income.rename('avg_income')).join(holders)
+
+    asset_value = latest['total_assets'].fillna(0) - latest['total_liabilities'].fillna(0)
+    profit_value = latest['avg_income'] / 0.1
+    calculated_value = (asset_value * 2 + profit_value * 3) / 5
+
+    # 주식수 계층적 fallback: 발행주식수 > 주주합계 > 자본금/5000 > 1
+    issued = latest['shares_issued_count'].fillna(0)
+    holder_shares = latest['shareholder_shares'].fillna(0)
+    capital = latest['capital_stock_value'].fillna(0)
+    conditions = [issued > 1, holder_shares > 0, capital > 0]
+    total_shares = np.select(conditions, [issued, holder_shares, capital / 5000], default=1.0)
+    shares_source = np.select(conditions, ['발행주식수', '주주합계', '자본금추정'], default='기본값')
+
+    result = pd.DataFrame({
+        'biz_no': latest.index,
+        'fiscal_year': latest['fiscal_year'].values,
+        'asset_value': asset_value.values,
+        'profit_value': profit_value.values,
+        'calculated_value': calculated_value.values,
+        'total_shares': total_shares,
+        'shares_source': shares_source,
+        'estimated_stock_value': calculated_value.values / total_shares,
+    })
+    result['updated_at'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    return result.astype(object).where(result.notna(), None)
+
+def _insert_company_valuation(cursor, result):
+    placeholders = ', '.join(['?'] * len(COMPANY_VALUATION_COLUMNS))
+    cursor.executemany(
+        f"INSERT OR REPLACE INTO Company_Valuation ({', '.join(COMPANY_VALUATION_COLUMNS)}) VALUES ({placeholders})",
+        result[COMPANY_VALUATION_COLUMNS].itertuples(index=False, name=None)
+    )
+
+def rebuild_company_valuation(conn):
+    """
+    전체 기업의 추정 주당가치를 calculate_unlisted_stock_value 와 같은 규칙으로 일괄 계산해
+    Company_Valuation 을 다시 만듭니다.
+    - 기업별 최근 3개년 재무는 ROW_NUMBER 윈도 함수 1회 조회, 주주 주식수는 1회 조회
+    - 계산은 pandas groupby/numpy 벡터 연산 (기업별 Python 루프 없음)
+    - 삭제/삽입은 한 트랜잭션으로 처리하여 조회 중인 화면에는 이전 값이 보입니다.
+    반환값: 저장된 기업 수
+    """
+    started = time.time()
+    fin = pd.read_sql_query(VALUATION_FINANCIAL_SQL.format(where=''), conn)
+    holders = pd.read_sql_query(VALUATION_SHAREHOLDER_SQL.format(where=''), conn)
+
+    cursor = conn.cursor()
+    ensure_company_valuation_table(cursor)
+    if fin.empty:
+        cursor.execute("DELETE FROM Company_Valuation")
+        conn.commit()
+        return 0
+
+    result = _compute_company_valuation(fin, holders)
+    cursor.execute("DELETE FROM Company_Valuation")
+    _insert_company_valuation(cursor, result)
+    conn.commit()
+    print(f"[VALUATION] {len(result)} companies valued in {time.time() - started:.2f}s")
+    return len(result)
+
+def refresh_company_valuation(conn, biz_nos):
+    """
+    지정한 기업만 추정 주당가치를 다시 계산합니다. (rebuild_company_valuation 과 같은 계산, commit 은 호출자 책임)
+    재무/주주 정보를 수정하는 API 에서 같은 트랜잭션 안에 호출합니다. 재무 데이터가 없으면 행을 삭제합니다.
+    """
+    keys = sorted({biz_no for biz_no in biz_nos if biz_no})
+    if not keys:
+        return
+    placeholders = ', '.join(['?'] * len(keys))
+    fin = pd.read_sql_query(VALUATION_FINANCIAL_SQL.format(where=f"WHERE biz_no IN ({placeholders})"), conn, params=keys)
+    holders = pd.read_sql_query(VALUATION_SHAREHOLDER_SQL.format(where=f"AND biz_no IN ({placeholders})"), conn, params=keys)
+
+    cursor = conn.cursor()
+    ensure_company_valuation_table(cursor)
+    cursor.execute(f"DELETE FROM Company_Valuation WHERE biz_no IN ({placeholders})", keys)
+    if not fin.empty:
+        _insert_company_valuation(cursor, _compute_company_valuation(fin, holders))
+
 def fix_db_schema():
     """데이터베이스 스키마를 최신 상태로 유지 (컬럼 자동 추가 및 테이블 초기화)"""
     print("--- [SCHEMA FIX] Starting DB Schema maintenance ---")
@@ -1296,6 +1887,7 @@ def fix_db_schema():
                 batch_id TEXT,
                 biz_no TEXT,
                 email TEXT,
+                email_lower TEXT,
                 group_name TEXT,
                 subject TEXT,
                 status TEXT,
@@ -1304,9 +1896,68 @@ def fix_db_schema():
             )
         ''')
 
+        # 이메일 작업 큐 (대량 발송 / 반송 검사)
+        ensure_email_job_table(cursor)
+
+        # 반송 스캔 체크포인트 (SMTP 설정 × 폴더별 마지막 UID)
+        ensure_imap_checkpoint_table(cursor)
+
         # 3. 기존 데이터 카테고리 보정 (미분류 데이터를 '일반대상'으로 지정)
         cursor.execute("UPDATE Company_Basic SET category = 'GENERAL' WHERE category IS NULL OR category = ''")
 
+        # 4. 최신 결산년도 재무 요약 테이블 (비어 있으면 최초 1회 전체 구성)
+        try:
+            ensure_company_financial_latest_table(cursor)
+            cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='Company_Financial'")
+            if cursor.fetchone():
+                has_latest = cursor.execute("SELECT 1 FROM Company_Financial_Latest LIMIT 1").fetchone()
+                has_financial = cursor.execute("SELECT 1 FROM Company_Financial LIMIT 1").fetchone()
+                if has_financial and not has_latest:
+                    print("[SCHEMA FIX] Building Company_Financial_Latest...")
+                    refresh_company_financial_latest(conn)
+        except Exception as latest_err:
+            print(f"[SCHEMA FIX] Error building Company_Financial_Latest: {latest_err}")
+
+        # 5. 기업명/대표자/주소/업종 전문 검색 색인
+        ensure_search_indexes(conn)
+
+        # 6. 주요 조회 패턴용 인덱스 (버전 관리 마이그레이션, 인덱스 대상 컬럼을 먼저 추가)
+        ensure_pipeline_urgency_columns(cursor)
+        ensure_email_lower_column(cursor)
+        apply_index_migrations(conn)
+
+        # 7. 추정 주당가치 일괄 계산 테이블 (비어 있으면 최초 1회 계산)
+        try:
+            ensure_company_valuation_table(cursor)
+            has_valuation = cursor.execute("SELECT 1 FROM Company_Valuation LIMIT 1").fetchone()
+            has_financial = cursor.execute("SELECT 1 FROM Company_Financial LIMIT 1").fetchone()
+            if has_financial and not has_valuation:
+                print("[SCHEMA FIX] Building Company_Valuation...")
+                conn.commit()
+                rebuild_company_valuation(conn)
+        except Exception as valuation_err:
+            print(f"[SCHEMA FIX] Error building Company_Valuation: {valuation_err}")
+
+        # 8. 대시보드 카운터 (system_stats + 트리거)
+        try:
+            ensure_system_stats(conn)
+        except Exception as stats_err:
+            print(f"[SCHEMA FIX] Error initializing system_stats: {stats_err}")
+
+        # 9. 파이프라인 긴급도/D-day (오늘 기준으로 계산되지 않았으면 전체 재계산)
+        try:
+            conn.commit()
+            ensure_pipeline_urgency_current(conn)
+        except Exception as urgency_err:
+            print(f"[SCHEMA FIX] Error refreshing pipeline urgency: {urgency_err}")
+
+        # 10. 파이프라인 변경 피드
+        try:
+            ensure_pipeline_change_table(cursor)
+            prune_pipeline_changes(conn)
+        except Exception as feed_err:
+            print(f"[SCHEMA FIX] Error initializing pipeline_changes: {feed_err}")
+
         conn.commit()
         print("[SCHEMA FIX] Schema maintenance COMPLETED successfully.")
     except Exception as e:
@@ -1358,6 +2009,9 @@ def initialize_application():
     
     # DB 스키마 최신화 (컬럼 추가 및 이메일 테이블 초기화)
     fix_db_schema()
+
+    # 파이프라인 긴급도 야간 재계산
+    start_pipeline_urgency_scheduler()
     
     print("=== Initialization Complete ===")
 
@@ -1365,7 +2019,21 @@ def initialize_application():
 initialize_application()
 
 # --- 비상장 주식 가치 계산 ---
-def calculate_unlisted_stock_value(financial_data, biz_no=None):
+def _to_number(value):
+    """DB 값(숫자/문자열/None)을 float 로 변환합니다. 변환할 수 없으면 None."""
+    if value is None or value == '':
+        return None
+    try:
+        return float(str(value).replace(',', ''))
+    except (ValueError, TypeError):
+        return None
+
+def sum_shareholder_shares(values):
+    """주주별 소유 주식수(total_shares_owned) 합계. 변환할 수 없는 값은 제외합니다. (rebuild_company_valuation 과 같은 규칙)"""
+    numbers = [_to_number(v) for v in values]
+    return sum(v for v in numbers if v and not math.isnan(v))
+
+def calculate_unlisted_stock_value(financial_data, biz_no=None, shareholder_total_shares=None):
     """
     필요한 재무 항목:
     - total_assets: 자산총계
@@ -1374,22 +2042,19 @@ def calculate_unlisted_stock_value(financial_data, biz_no=None):
     - shares_issued_count: 발행주식수(없으면 주주합계 → 자본금/5000)
     - capital_stock_value: 자본금
     biz_no: 주주 합계 조회 시 사용
+    shareholder_total_shares: 주주 소유 주식수 합계 (호출자가 이미 조회한 경우 전달하면 DB 재조회 생략)
     """
     if not financial_data:
         return {}
-    df_financial = pd.DataFrame(financial_data)
-    if df_financial.empty:
-        return {}
 
-    latest_data = df_financial.sort_values(by='fiscal_year', ascending=False).iloc[0]
+    latest_data = max(financial_data, key=lambda row: _to_number(row.get('fiscal_year')) or 0)
 
-    total_assets = float(latest_data.get('total_assets') or 0)
-    total_liabilities = float(latest_data.get('total_liabilities') or 0)
+    total_assets = _to_number(latest_data.get('total_assets')) or 0
+    total_liabilities = _to_number(latest_data.get('total_liabilities')) or 0
 
     # 최근 3년 평균 순이익
-    net_income_3y_avg = pd.to_numeric(df_financial['net_income'], errors='coerce').mean()
-    if pd.isna(net_income_3y_avg):
-        net_income_3y_avg = 0
+    net_incomes = [v for v in (_to_number(row.get('net_income')) for row in financial_data) if v is not None]
+    net_income_3y_avg = sum(net_incomes) / len(net_incomes) if net_incomes else 0
 
     asset_value = total_assets - total_liabilities
     profit_value = net_income_3y_avg / 0.1 if net_income_3y_avg else 0
@@ -1397,49 +2062,35 @@ def calculate_unlisted_stock_value(financial_data, biz_no=None):
     calculated_value = (asset_value * 2 + profit_value * 3) / 5
 
     # 주식수 계산 - 계층적 fallback 적용
-    total_shares = float(latest_data.get('shares_issued_count') or 0)
+    total_shares = _to_number(latest_data.get('shares_issued_count')) or 0
     shares_source = '발행주식수'  # 출처 표시용
 
     # 1단계: shares_issued_count가 없거나 1 이하인 경우
     if total_shares <= 1:
         # 2단계: 주주 소유 주식수 합계 시도 (biz_no 파라미터 우선, 없으면 data에서 시도)
         lookup_biz_no = biz_no or latest_data.get('biz_no', '')
-        if lookup_biz_no:
+        total_owned_shares = shareholder_total_shares
+        if total_owned_shares is None and lookup_biz_no:
             try:
                 conn = get_db_connection()
                 cursor = conn.cursor()
                 cursor.execute("""
-                    SELECT SUM(CAST(total_shares_owned AS REAL)) 
+                    SELECT total_shares_owned
                     FROM Company_Shareholder 
                     WHERE biz_no = ? AND total_shares_owned IS NOT NULL AND total_shares_owned != '' AND total_shares_owned != '0'
                 """, (lookup_biz_no,))
-                total_owned_shares = cursor.fetchone()[0]
+                total_owned_shares = sum_shareholder_shares(row[0] for row in cursor.fetchall())
                 conn.close()
-
-                if total_owned_shares and total_owned_shares > 0:
-                    total_shares = total_owned_shares
-                    shares_source = '주주합계'
-                else:
-                    # 3단계: 자본금/5000 계산
-                    capital_stock = float(latest_data.get('capital_stock_value') or 0)
-                    if capital_stock > 0:
-                        total_shares = capital_stock / 5000
-                        shares_source = '자본금추정'
-                    else:
-                        total_shares = 1
-                        shares_source = '기본값'
             except Exception as e:
                 print(f"주주 소유 주식수 합계 계산 오류: {e}")
-                capital_stock = float(latest_data.get('capital_stock_value') or 0)
-                if capital_stock > 0:
-                    total_shares = capital_stock / 5000
-                    shares_source = '자본금추정'
-                else:
-                    total_shares = 1
-                    shares_source = '기본값'
+                total_owned_shares = None
+
+        if total_owned_shares and total_owned_shares > 0:
+            total_shares = total_owned_shares
+            shares_source = '주주합계'
         else:
-            # biz_no 없으면 자본금으로 fallback
-            capital_stock = float(latest_data.get('capital_stock_value') or 0)
+            # 3단계: 자본금/5000 계산
+            capital_stock = _to_number(latest_data.get('capital_stock_value')) or 0
             if capital_stock > 0:
                 total_shares = capital_stock / 5000
                 shares_source = '자본금추정'
@@ -1462,36 +2113,382 @@ def calculate_unlisted_stock_value(financial_data, biz_no=None):
         "estimated_stock_value": stock_value
     }
 
+# --- 기업 상세 집계 로더 ---
+class CompanyProfile:
+    """
+    기업 상세 화면용 집계 데이터(기본/재무/대표자/주주/특허/부가정보 + 주식가치)를
+    하나의 연결에서 조회하고 biz_no 별로 캐시합니다.
+    접촉이력은 사용자 권한별로 달라지므로 캐시하지 않습니다.
+    수정 API는 invalidate(biz_no) 를 호출해야 합니다. (캐시는 프로세스별, CACHE_TTL 로 최대 지연 제한)
+    """
+    CACHE_TTL = 600  # 초
+    CACHE_MAX_SIZE = 500
+    _cache = {}  # {biz_no: (expires_at, profile)}
+    _cache_lock = threading.Lock()  # gthread 워커의 요청 스레드들이 함께 사용
+    _generation = 0  # invalidate 마다 증가 (조회 도중 무효화된 결과는 캐시하지 않음)
+
+    @classmethod
+    def load(cls, biz_no, conn):
+        """캐시된 집계를 반환하고, 없으면 conn 으로 조회해 캐시합니다. (조회는 잠금 밖에서)"""
+        now = time.time()
+        with cls._cache_lock:
+            cached = cls._cache.get(biz_no)
+            generation = cls._generation
+        if cached and cached[0] > now:
+            return cached[1]
+
+        profile = cls._fetch(biz_no, conn)
+        with cls._cache_lock:
+            if generation == cls._generation:
+                if biz_no not in cls._cache and len(cls._cache) >= cls.CACHE_MAX_SIZE:
+                    # 가장 오래 전에 저장된 항목부터 제거
+                    cls._cache.pop(next(iter(cls._cache)), None)
+                cls._cache[biz_no] = (now + cls.CACHE_TTL, profile)
+        return profile
+
+    @classmethod
+    def invalidate(cls, biz_no=None):
+        """biz_no 캐시를 삭제합니다. biz_no 가 없으면 전체 삭제."""
+        with cls._cache_lock:
+            cls._generation += 1
+            if biz_no is None:
+                cls._cache.clear()
+            else:
+                cls._cache.pop(biz_no, None)
+
+    @classmethod
+    def _fetch(cls, biz_no, conn):
+        basic_info = conn.execute("""
+            SELECT cb.*, cf.rating1, cb.group_transaction_yn, cb.gfc_transaction_yn
+            FROM Company_Basic cb
+            LEFT JOIN Company_Financial_Latest cf ON cb.biz_no = cf.biz_no
+            WHERE cb.biz_no = ?
+        """, (biz_no,)).fetchone()
+
+        financials = [dict(row) for row in conn.execute("""
+            SELECT fiscal_year, sales_revenue, operating_income, net_income, total_assets, total_equity, retained_earnings, corporate_tax, 
+                   undistributed_retained_earnings, advances_paid, advances_received, shares_issued_count, total_liabilities,
+                   IFNULL(capital_stock_value, 0) as capital_stock_value,
+                   IFNULL(earned_reserve, 0) as earned_reserve
+            FROM Company_Financial WHERE biz_no = ? ORDER BY fiscal_year DESC LIMIT 3
+        """, (biz_no,)).fetchall()]
+
+        representatives = conn.execute("SELECT name, birth_date, gender, is_gfc FROM Company_Representative WHERE biz_no = ?", (biz_no,)).fetchall()
+        shareholders = [dict(row) for row in conn.execute("SELECT * FROM Company_Shareholder WHERE biz_no = ?", (biz_no,)).fetchall()]
+
+        try:
+            patents = [dict(row) for row in conn.execute("SELECT * FROM Company_Patent WHERE biz_no = ?", (biz_no,)).fetchall()]
+        except sqlite3.OperationalError:
+            patents = []
+
+        try:
+            additional_info_row = conn.execute("SELECT * FROM Company_Additional WHERE biz_no = ?", (biz_no,)).fetchone()
+        except sqlite3.OperationalError:
+            additional_info_row = None
+
+        # 주주 소유 주식수 합계는 이미 조회한 주주 목록에서 계산 (별도 연결/쿼리 없음)
+        shareholder_total_shares = sum_shareholder_shares(s.get('total_shares_owned') for s in shareholders)
+        stock_valuation = calculate_unlisted_stock_value(financials, biz_no=biz_no, shareholder_total_shares=shareholder_total_shares)
+
+        return {
+            'basic': dict(basic_info) if basic_info else {},
+            'financials': financials,
+            'representatives': cls._process_representatives(representatives),
+            'shareholders': cls._process_shareholders(shareholders, stock_valuation),
+            'patents': patents,
+            'additional': cls._process_additional(dict(additional_info_row) if additional_info_row else {}),
+            'stock_valuation': stock_valuation
+        }
+
+    @staticmethod
+    def _process_additional(additional_info):
+        if additional_info:
+            today_str = get_kst_now().strftime('%Y%m%d')
+            
+            def check_expired(expiry_val, current_date):
+                if not expiry_val:
+                    return False
+                # 문자열 변환 및 구분자 제거 (YYYYMMDD 형식으로 통일)
+                d_str = str(expiry_val).replace('-', '').replace('.', '').replace('/', '').strip()
+                # 8자리 숫자만 비교 (그 외 형식은 비교 스킵 또는 False 처리)
+                if len(d_str) >= 8:
+                    return d_str[:8] < current_date
+                return False
+
+            if additional_info.get('is_innobiz') == '1' and check_expired(additional_info.get('innobiz_expiry_date'), today_str):
+                additional_info['is_innobiz'] = '0'
+            if additional_info.get('is_mainbiz') == '1' and check_expired(additional_info.get('mainbiz_expiry_date'), today_str):
+                additional_info['is_mainbiz'] = '0'
+            if additional_info.get('is_venture') == '1' and check_expired(additional_info.get('venture_expiry_date'), today_str):
+                additional_info['is_venture'] = '0'
+        return additional_info
+
+    @staticmethod
+    def _process_shareholders(shareholders, stock_valuation):
+        # 주주 정보 처리 개선 - 지분율, 주식수, 금액 계산
+        processed_shareholders = []
+        if not shareholders:
+            return processed_shareholders
+
+        # 전체 주식수 계산 (stock_valuation에서 계산된 값 사용)
+        total_shares_issued = stock_valuation.get('total_shares_issued', 1)
+        estimated_stock_value = stock_valuation.get('estimated_stock_value', 0)
+        
+        for shareholder_dict in shareholders:
+            try:
+                # 안전한 지분율 변환
+                try:
+                    ownership_percent = float(shareholder_dict.get('ownership_percent', 0) or 0)
+                except (ValueError, TypeError):
+                    ownership_percent = 0.0
+                
+                # 실제 주식수가 있는지 확인
+                actual_stock_quantity = shareholder_dict.get('total_shares_owned')
+                has_actual_stock_data = (actual_stock_quantity is not None and 
+                                       actual_stock_quantity != '' and 
+                                       actual_stock_quantity != 0)
+                
+                if has_actual_stock_data:
+                    # 실제 주식수 데이터가 있는 경우
+                    try:
+                        stock_quantity = float(actual_stock_quantity)
+                        is_predicted = False
+                    except (ValueError, TypeError):
+                        stock_quantity = 0.0
+                        is_predicted = False
+                else:
+                    # 실제 주식수가 없는 경우 지분율로 예측 계산
+                    try:
+                        stock_quantity = (total_shares_issued * ownership_percent) / 100.0
+                        is_predicted = True
+                    except (ValueError, TypeError):
+                        stock_quantity = 0.0
+                        is_predicted = True
+                
+                # 주식 금액 계산
+                try:
+                    stock_value_amount = stock_quantity * estimated_stock_value
+                except (ValueError, TypeError):
+                    stock_value_amount = 0.0
+                
+                shareholder_dict.update({
+                    'ownership_percent': round(ownership_percent, 2),
+                    'stock_quantity': round(stock_quantity, 0),
+                    'stock_value_amount': round(stock_value_amount, 0),
+                    'shareholder_name': shareholder_dict.get('shareholder_name', ''),
+                    'relationship': shareholder_dict.get('relationship', ''),
+                    'is_predicted': is_predicted  # 예측 여부를 표시
+                })
+                
+                processed_shareholders.append(shareholder_dict)
+                
+            except Exception as e:
+                print(f"주주 정보 처리 중 오류: {e}")
+                # 오류가 발생한 주주는 건너뛰고 계속 진행
+                continue
+        return processed_shareholders
+
+    @staticmethod
+    def _process_representatives(representatives):
+        today = date.today()
+        processed_representatives = []
+        for rep in representatives:
+            rep_dict = dict(rep)
+            birth_date = rep_dict.get('birth_date')
+            age = None
+            if birth_date and '*' not in str(birth_date):
+                try:
+                    # Try parsing formats: YYYYMMDD, YYYY-MM-DD
+                    dt = None
+                    for fmt in ['%Y%m%d', '%Y-%m-%d']:
+                        try:
+                            dt = datetime.strptime(str(birth_date).strip(), fmt).date()
+                            break
+                        except ValueError:
+                            continue
+                    
+                    if dt:
+                        age = today.year - dt.year - ((today.month, today.day) < (dt.month, dt.day))
+                except Exception as e:
+                    print(f"Age calculation error: {e}")
+            
+            rep_dict['age'] = age
+            processed_representatives.append(rep_dict)
+        return processed_representatives
+
+def _invalidate_company_profiles(biz_nos):
+    """email_service 가 메일 상태를 갱신하면 해당 기업 정보 캐시를 비웁니다. (biz_nos 가 None 이면 전체)"""
+    if biz_nos is None:
+        CompanyProfile.invalidate()
+        return
+    for biz_no in biz_nos:
+        CompanyProfile.invalidate(biz_no)
+
+add_company_change_listener(_invalidate_company_profiles)
+
 # --- 기업정보 데이터 조회 함수 추가 ---
-def query_companies_data(args):
-    conn = get_db_connection()
-    query = """
-        SELECT
-            b.*,
-            f.fiscal_year,
-            f.total_assets,
-            f.sales_revenue,
-            f.retained_earnings
+COMPANY_PAGE_SIZE = 50
+COMPANY_COUNT_CACHE_TTL = 300  # 조회건수 캐시 유지 시간(초)
+COMPANY_EXPORT_BATCH_SIZE = 2000  # 엑셀/CSV 저장 시 한 번에 조회하는 행 수
+# 엑셀/CSV 저장 컬럼 (조회 컬럼명, 헤더)
+COMPANY_EXPORT_COLUMNS = [
+    ('biz_no', '사업자번호'), ('company_name', '기업명'), ('representative_name', '대표자명'),
+    ('phone_number', '전화번호'), ('company_size', '기업규모'), ('address', '주소'),
+    ('industry_name', '업종명'), ('fiscal_year', '최신결산년도'), ('total_assets', '자산총계'),
+    ('sales_revenue', '매출액'), ('retained_earnings', '이익잉여금'), ('estimated_stock_value', '추정주당가치')
+]
+COMPANY_SEARCH_KEYS = ('biz_no', 'company_name', 'industry_name', 'company_size', 'region', 'ret_min', 'ret_max', 'stock_min', 'stock_max')
+_company_count_cache = {}  # {cache_key: (expires_at, total_rows)}
+_company_count_cache_lock = threading.Lock()
+COMPANY_COUNT_CACHE_MAX_SIZE = 1000  # 조회 조건별 항목 수 상한 (만료 항목을 먼저 정리하고, 넘치면 오래된 항목부터 제거)
+
+# 최신 결산년도 재무는 Company_Financial_Latest(PK: biz_no) 에서 조회
+COMPANY_LATEST_FINANCIAL_JOIN = """
+        LEFT JOIN Company_Financial_Latest f ON b.biz_no = f.biz_no
+"""
+# 추정 주당가치는 Company_Valuation(PK: biz_no, rebuild_company_valuation 으로 일괄 계산) 에서 조회
+COMPANY_VALUATION_JOIN = """
+        LEFT JOIN Company_Valuation v ON b.biz_no = v.biz_no
+"""
+COMPANY_LIST_SELECT = """
+        SELECT b.*, f.fiscal_year, f.total_assets, f.sales_revenue, f.retained_earnings,
+               v.estimated_stock_value, v.shares_source
         FROM Company_Basic b
-        LEFT JOIN (
-            SELECT biz_no, fiscal_year, total_assets, sales_revenue, retained_earnings
-            FROM Company_Financial
-            WHERE (biz_no, fiscal_year) IN (
-                SELECT biz_no, MAX(fiscal_year) FROM Company_Financial GROUP BY biz_no
-            )
-        ) f ON b.biz_no = f.biz_no
+""" + COMPANY_LATEST_FINANCIAL_JOIN + COMPANY_VALUATION_JOIN
+
+def iter_company_export_rows(args, batch_size=COMPANY_EXPORT_BATCH_SIZE):
     """
-    filters = []
-    params = []
-    if args.get('biz_no'):
-        filters.append("b.biz_no LIKE ?")
-        params.append(f"%{args.get('biz_no')}%")
-    if args.get('company_name'):
-        filters.append("b.company_name LIKE ?")
-        params.append(f"%{args.get('company_name')}%")
-    if args.get('industry_name'):
-        filters.append("b.industry_name LIKE ?")
-        params.append(f"%{args.get('industry_name')}%")
+    검색 조건에 맞는 전체 기업 목록을 batch_size 단위 keyset 페이지로 나누어 순서대로 반환합니다. (엑셀/CSV 저장용)
+    전체 결과를 한 번에 메모리에 올리지 않으므로 건수 제한 없이 내보낼 수 있습니다.
+    """
+    cursor = None
+    while True:
+        companies, cursor = query_companies_page(args, cursor=cursor, limit=batch_size)
+        for company in companies:
+            yield company
+        if not cursor:
+            break
+
+def query_companies_page(args, cursor=None, offset=0, limit=COMPANY_PAGE_SIZE):
+    """
+    keyset 페이지네이션으로 한 페이지만 조회합니다.
+    - 정렬: 기본 biz_no 순, args['sort'] == 'stock_value' 이면 추정 주당가치 높은 순(가치 계산된 기업만)
+    - cursor: 직전 페이지 마지막 행의 정렬 키 (biz_no 또는 '주당가치|biz_no'), 있으면 OFFSET 대신 사용
+    - limit + 1 건을 조회해 다음 페이지 존재 여부를 판단
+    - 최신 재무/주당가치는 PK 조회이므로 페이지 크기만큼만 조인됨
+    반환값: (companies, next_cursor) - 다음 페이지가 없으면 next_cursor 는 None
+    """
+    filters, params, _ = build_company_search_filters(args)
+    sort_by_value = args.get('sort') == 'stock_value'
+    if sort_by_value:
+        filters.append("v.estimated_stock_value IS NOT NULL")
+        order_by = "v.estimated_stock_value DESC, v.biz_no"
+        if cursor:
+            try:
+                cursor_value, cursor_biz_no = cursor.rsplit('|', 1)
+                filters.append("(v.estimated_stock_value < ? OR (v.estimated_stock_value = ? AND v.biz_no > ?))")
+                params.extend([float(cursor_value), float(cursor_value), cursor_biz_no])
+            except ValueError:
+                cursor = None
+    else:
+        order_by = "b.biz_no"
+        if cursor:
+            filters.append("b.biz_no > ?")
+            params.append(cursor)
+
+    conn = get_db_connection()
+    try:
+        query = COMPANY_LIST_SELECT
+        if filters:
+            query += " WHERE " + " AND ".join(filters)
+        query += f" ORDER BY {order_by} LIMIT ?"
+        params.append(limit + 1)
+        if not cursor and offset:
+            query += " OFFSET ?"
+            params.append(offset)
+
+        rows = conn.execute(query, params).fetchall()
+    finally:
+        conn.close()
+
+    has_next = len(rows) > limit
+    companies = [dict(row) for row in rows[:limit]]
+    next_cursor = None
+    if has_next and companies:
+        last = companies[-1]
+        next_cursor = f"{last['estimated_stock_value']!r}|{last['biz_no']}" if sort_by_value else last['biz_no']
+    return companies, next_cursor
+
+def count_companies(args, mode='exact'):
+    """
+    검색 조건에 맞는 기업 수를 반환합니다. 결과는 사용자/조건별로 COMPANY_COUNT_CACHE_TTL 동안 캐시됩니다.
+    - mode='exact'   : COUNT(*) 실행 (캐시 우선)
+    - mode='estimate': 검색 조건이 없으면 rowid 최대값으로 추정, 조건이 있으면 exact 와 동일
+    반환값: (total_rows, is_estimated)
+    """
+    search_args = tuple((key, (args.get(key) or '').strip()) for key in COMPANY_SEARCH_KEYS)
+    has_search = any(value and not (key == 'company_size' and value == '전체') for key, value in search_args)
+
+    if mode == 'estimate' and not has_search:
+        conn = get_db_connection()
+        try:
+            estimated = conn.execute("SELECT MAX(rowid) FROM Company_Basic").fetchone()[0] or 0
+        finally:
+            conn.close()
+        return estimated, True
+
+    cache_key = (session.get('user_id'), search_args, args.get('sort'))
+    with _company_count_cache_lock:
+        cached = _company_count_cache.get(cache_key)
+    now = time.time()
+    if cached and cached[0] > now:
+        return cached[1], False
+
+    filters, params, joins = build_company_search_filters(args)
+    if args.get('sort') == 'stock_value':
+        filters.append("v.estimated_stock_value IS NOT NULL")
+        if COMPANY_VALUATION_JOIN not in joins:
+            joins.append(COMPANY_VALUATION_JOIN)
+    query = "SELECT COUNT(*) FROM Company_Basic b" + ''.join(joins)
+    if filters:
+        query += " WHERE " + " AND ".join(filters)
+
+    conn = get_db_connection()
+    try:
+        total_rows = conn.execute(query, params).fetchone()[0]
+    finally:
+        conn.close()
+
+    with _company_count_cache_lock:
+        if len(_company_count_cache) >= COMPANY_COUNT_CACHE_MAX_SIZE:
+            for key in [key for key, value in _company_count_cache.items() if value[0] <= now]:
+                del _company_count_cache[key]
+            while len(_company_count_cache) >= COMPANY_COUNT_CACHE_MAX_SIZE:
+                _company_count_cache.pop(next(iter(_company_count_cache)), None)
+        _company_count_cache[cache_key] = (now + COMPANY_COUNT_CACHE_TTL, total_rows)
+    return total_rows, False
+
+def invalidate_company_count_cache():
+    """기업 데이터 변경(일괄 업로드, 파이프라인 담당 기업 변경 등) 후 조회건수 캐시를 비웁니다."""
+    with _company_count_cache_lock:
+        _company_count_cache.clear()
+
+def build_company_search_filters(args):
+    """
+    기업 검색 조건을 WHERE 절 조각으로 변환합니다.
+    반환값: (filters, params, joins) - joins 는 조건에 필요한 조인 절 목록 (재무 f., 주당가치 v.)
+    """
+    # 사업자번호/기업명/업종/지역(주소) 키워드는 전문 검색 색인(MATCH 1회)으로 처리
+    # 지역(주소) 검색: 모든 키워드가 포함되어야 함
+    column_terms = [
+        (['biz_no'], args.get('biz_no')),
+        (['company_name'], args.get('company_name')),
+        (['industry_name'], args.get('industry_name')),
+    ]
+    if args.get('region'):
+        column_terms.extend((['address'], kw) for kw in args.get('region').split() if kw.strip())
+    filters, params = build_search_filters('Company_Search_FTS', 'b.rowid', column_terms)
+
     if args.get('company_size') and args.get('company_size') != '전체':
         filters.append("b.company_size = ?")
         params.append(args.get('company_size'))
@@ -1520,18 +2517,14 @@ def query_companies_data(args):
         
         params.extend(allowed_managers) 
 
-    # 지역(주소) 검색: 모든 키워드가 포함되어야 함
-    if args.get('region'):
-        region_keywords = [kw.strip() for kw in args.get('region').split() if kw.strip()]
-        for kw in region_keywords:
-            filters.append("b.address LIKE ?")
-            params.append(f"%{kw}%")
     # 이익잉여금 min/max (retained_earnings, 백만단위 입력값을 실제 단위로 변환)
+    joins = []
     if args.get('ret_min'):
         try:
             ret_min_val = int(args.get('ret_min')) * 1000000
             filters.append("f.retained_earnings >= ?")
             params.append(ret_min_val)
+            joins.append(COMPANY_LATEST_FINANCIAL_JOIN)
         except Exception:
             pass
     if args.get('ret_max'):
@@ -1539,14 +2532,27 @@ def query_companies_data(args):
             ret_max_val = int(args.get('ret_max')) * 1000000
             filters.append("f.retained_earnings <= ?")
             params.append(ret_max_val)
+            if COMPANY_LATEST_FINANCIAL_JOIN not in joins:
+                joins.append(COMPANY_LATEST_FINANCIAL_JOIN)
         except Exception:
             pass
-    if filters:
-        query += " WHERE " + " AND ".join(filters)
-    query += " ORDER BY b.biz_no"
-    df = pd.read_sql_query(query, conn, params=params)
-    conn.close()
-    return df
+    # 추정 주당가치 min/max (원 단위)
+    if args.get('stock_min'):
+        try:
+            filters.append("v.estimated_stock_value >= ?")
+            params.append(float(args.get('stock_min')))
+            joins.append(COMPANY_VALUATION_JOIN)
+        except Exception:
+            pass
+    if args.get('stock_max'):
+        try:
+            filters.append("v.estimated_stock_value <= ?")
+            params.append(float(args.get('stock_max')))
+            if COMPANY_VALUATION_JOIN not in joins:
+                joins.append(COMPANY_VALUATION_JOIN)
+        except Exception:
+            pass
+    return filters, params, joins
 
 # --- 로그아웃 라우트 추가 ---
 @app.route('/logout')
@@ -1810,6 +2816,150 @@ def check_tables():
             "error": f"테이블 확인 실패: {str(e)}"
         }), 500
 
+# --- 인덱스 진단 (EXPLAIN QUERY PLAN) ---
+# 앱의 주요 조회 쿼리 목록: (이름, SQL, 예시 파라미터)
+# 조회 쿼리를 새로 추가하거나 바꾸면 여기에도 반영해 전체 스캔 회귀를 미리 확인합니다.
+INDEX_ADVISOR_QUERIES = [
+    ('company_search_page',
+     "SELECT b.*, f.fiscal_year, f.total_assets, f.sales_revenue, f.retained_earnings FROM Company_Basic b "
+     "LEFT JOIN Company_Financial_Latest f ON b.biz_no = f.biz_no WHERE b.biz_no > ? ORDER BY b.biz_no LIMIT ?",
+     ('0000000000', 51)),
+    ('company_search_stock_value',
+     "SELECT b.biz_no, v.estimated_stock_value FROM Company_Basic b "
+     "LEFT JOIN Company_Valuation v ON b.biz_no = v.biz_no WHERE v.estimated_stock_value >= ? "
+     "ORDER BY v.estimated_stock_value DESC, v.biz_no LIMIT ?",
+     (10000, 51)),
+    ('company_search_keyword',
+     "SELECT COUNT(*) FROM Company_Basic b WHERE b.rowid IN "
+     "(SELECT rowid FROM Company_Search_FTS WHERE Company_Search_FTS MATCH ?)",
+     ('{address} : "강남구"',)),
+    ('company_detail_basic',
+     "SELECT cb.*, cf.rating1 FROM Company_Basic cb LEFT JOIN Company_Financial_Latest cf ON cb.biz_no = cf.biz_no WHERE cb.biz_no = ?",
+     ('0000000000',)),
+    ('company_detail_financial',
+     "SELECT * FROM Company_Financial WHERE biz_no = ? ORDER BY fiscal_year DESC LIMIT 3",
+     ('0000000000',)),
+    ('company_detail_representatives',
+     "SELECT name, birth_date, gender, is_gfc FROM Company_Representative WHERE biz_no = ?",
+     ('0000000000',)),
+    ('company_detail_shareholders',
+     "SELECT * FROM Company_Shareholder WHERE biz_no = ?",
+     ('0000000000',)),
+    ('company_detail_additional',
+     "SELECT * FROM Company_Additional WHERE biz_no = ?",
+     ('0000000000',)),
+    ('company_detail_history',
+     "SELECT * FROM Contact_History WHERE biz_no = ? AND registered_by = ? ORDER BY contact_datetime DESC",
+     ('0000000000', 'admin')),
+    ('contact_history_recent_page',
+     "SELECT h.history_id, b.company_name FROM Contact_History h LEFT JOIN Company_Basic b ON h.biz_no = b.biz_no "
+     "WHERE (h.contact_datetime, h.history_id) < (?, ?) "
+     "ORDER BY h.contact_datetime DESC, h.history_id DESC LIMIT ?",
+     ('2025-01-01 00:00:00', 1000000, 51)),
+    ('history_search_by_user',
+     "SELECT h.*, b.company_name FROM Contact_History h LEFT JOIN Company_Basic b ON h.biz_no = b.biz_no "
+     "WHERE h.registered_by = ? AND (h.contact_datetime, h.history_id) < (?, ?) "
+     "ORDER BY h.contact_datetime DESC, h.history_id DESC LIMIT ?",
+     ('admin', '2025-01-01 00:00:00', 1000000, 51)),
+    ('history_search_biz_no_prefix',
+     "SELECT h.*, b.company_name FROM Contact_History h LEFT JOIN Company_Basic b ON h.biz_no = b.biz_no "
+     "WHERE h.biz_no >= ? AND h.biz_no < ? ORDER BY h.contact_datetime DESC, h.history_id DESC LIMIT ?",
+     ('123', '123\uffff', 51)),
+    ('history_search_all',
+     "SELECT h.*, b.company_name FROM Contact_History h LEFT JOIN Company_Basic b ON h.biz_no = b.biz_no "
+     "ORDER BY h.contact_datetime DESC LIMIT ?",
+     (50,)),
+    ('email_companies_last_sent',
+     "SELECT MAX(sent_at) FROM email_send_log WHERE biz_no = ?",
+     ('0000000000',)),
+    ('email_batch_logs',
+     "SELECT * FROM email_send_log WHERE batch_id = ? ORDER BY sent_at DESC",
+     ('batch',)),
+    ('email_group_members',
+     "SELECT cb.* FROM email_group_members gm JOIN Company_Basic cb ON gm.biz_no = cb.biz_no WHERE gm.group_id = ?",
+     (1,)),
+    ('pipeline_manager_companies',
+     "SELECT mc.*, cb.company_name FROM managed_companies mc LEFT JOIN Company_Basic cb ON mc.biz_reg_no = cb.biz_no "
+     "WHERE mc.manager_id = ?",
+     ('admin',)),
+]
+
+def analyze_query_plan(conn, sql, params=()):
+    """EXPLAIN QUERY PLAN 결과와 경고(전체 스캔, 임시 B-tree 정렬)를 반환합니다."""
+    plan = [row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}", params).fetchall()]
+    warnings = []
+    for detail in plan:
+        if detail.startswith('SCAN ') and 'USING' not in detail and 'VIRTUAL TABLE' not in detail:
+            warnings.append(f"full scan: {detail}")
+        elif 'USE TEMP B-TREE' in detail:
+            warnings.append(f"temp sort: {detail}")
+    return plan, warnings
+
+@app.route('/admin/index-advisor')
+def index_advisor():
+    """주요 조회 쿼리의 실행 계획을 점검하여 전체 스캔을 알려줍니다. (관리자 전용)"""
+    if 'user_id' not in session:
+        return jsonify({"error": "Unauthorized"}), 401
+    if not check_permission(session.get('user_level', 'N'), 'S'):
+        return jsonify({"error": "관리자만 사용할 수 있습니다."}), 403
+
+    conn = get_db_connection()
+    try:
+        results = []
+        for name, sql, params in INDEX_ADVISOR_QUERIES:
+            try:
+                plan, warnings = analyze_query_plan(conn, sql, params)
+                results.append({"name": name, "status": "warn" if warnings else "ok",
+                                "plan": plan, "warnings": warnings})
+            except sqlite3.OperationalError as e:
+                # 테이블이 없는 환경 등
+                results.append({"name": name, "status": "error", "plan": [], "warnings": [str(e)]})
+
+        migrations = [dict(row) for row in conn.execute(
+            "SELECT version, description, applied_at FROM schema_migrations ORDER BY version").fetchall()]
+    finally:
+        conn.close()
+
+    return jsonify({
+        "summary": {
+            "total": len(results),
+            "warn": sum(1 for r in results if r['status'] == 'warn'),
+            "error": sum(1 for r in results if r['status'] == 'error')
+        },
+        "migrations": migrations,
+        "queries": results
+    })
+
+@app.route('/admin/db-pool-stats')
+def db_pool_stats():
+    """DB 커넥션 풀 사용 현황 (관리자 전용)"""
+    if 'user_id' not in session:
+        return jsonify({"error": "Unauthorized"}), 401
+    if not check_permission(session.get('user_level', 'N'), 'S'):
+        return jsonify({"error": "관리자만 사용할 수 있습니다."}), 403
+    return jsonify(get_db_pool_stats())
+
+@app.route('/admin/valuation/rebuild', methods=['POST'])
+def rebuild_valuation():
+    """전체 기업 추정 주당가치를 다시 계산합니다. (관리자 전용)"""
+    if 'user_id' not in session:
+        return jsonify({'success': False, 'message': '로그인이 필요합니다.'}), 401
+    if not check_permission(session.get('user_level', 'N'), 'S'):
+        return jsonify({'success': False, 'message': '관리자만 사용할 수 있습니다.'}), 403
+
+    conn = get_db_connection()
+    try:
+        started = time.time()
+        valued = rebuild_company_valuation(conn)
+        invalidate_company_count_cache()
+        return jsonify({'success': True, 'message': f'{valued:,}개 기업의 추정 주당가치를 계산했습니다.',
+                        'count': valued, 'elapsed': round(time.time() - started, 2)})
+    except Exception as e:
+        print(f"[VALUATION] rebuild error: {e}")
+        return jsonify({'success': False, 'message': f'주당가치 계산 중 오류가 발생했습니다: {e}'}), 500
+    finally:
+        conn.close()
+
 @app.route('/fix_db')
 def fix_db():
     """Render 서버에서 누락된 테이블들을 생성"""
@@ -1937,6 +3087,9 @@ def fix_db():
                     notes TEXT,
                     expected_amount INTEGER DEFAULT 0,
                     priority_level INTEGER DEFAULT 1 CHECK (priority_level BETWEEN 1 AND 5),
+                    urgency_level INTEGER DEFAULT 0,
+                    days_since_contact INTEGER,
+                    d_day INTEGER,
                     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
                     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
                 )
@@ -2170,24 +3323,59 @@ def upload_database():
     if file.filename == '':
         return jsonify({"success": False, "message": "파일이 선택되지 않았습니다"})
     
+    db_path = DB_PATH
+    upload_path = db_path + '.upload'
     try:
-        # 기존 데이터베이스 백업
-        db_path = DB_PATH
-        backup_path = db_path + '.backup'
-        
-        import shutil
-        if os.path.exists(db_path):
-            shutil.copy2(db_path, backup_path)
-        
-        # 새 데이터베이스 파일 저장
-        file.save(db_path)
-        
-        # 업로드된 파일 검증
-        conn = sqlite3.connect(db_path)
-        cursor = conn.cursor()
-        cursor.execute("SELECT name FROM sqlite_master WHERE type='table'")
-        tables = cursor.fetchall()
-        conn.close()
+        # 업로드 파일은 임시 경로에 저장하고 검증
+        # (운영 DB 파일을 직접 덮어쓰면 다른 스레드/프로세스가 열어 둔 연결과 -wal/-shm 이 새 파일을 손상시킬 수 있음)
+        file.save(upload_path)
+        source = sqlite3.connect(upload_path)
+        try:
+            check = source.execute("PRAGMA quick_check").fetchone()
+            if not check or check[0] != 'ok':
+                raise ValueError(f"DB 무결성 검사 실패: {check[0] if check else '결과 없음'}")
+            tables = source.execute("SELECT name FROM sqlite_master WHERE type='table'").fetchall()
+            if not tables:
+                raise ValueError("테이블이 없는 DB 파일입니다")
+
+            # 기존 데이터베이스 백업 후 SQLite backup API 로 운영 DB 에 복사
+            # (열려 있는 연결은 잠금/WAL 을 거쳐 새 내용을 보게 됨)
+            target = sqlite3.connect(db_path, timeout=60)
+            try:
+                backup = sqlite3.connect(db_path + '.backup')
+                try:
+                    target.backup(backup)
+                finally:
+                    backup.close()
+                source.backup(target)
+                target.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            finally:
+                target.close()
+        finally:
+            source.close()
+
+        # 업로드된 DB 기준으로 스키마(인덱스 대상 컬럼/인덱스, 이메일 작업 큐/반송 체크포인트) 보강 후 최신 재무 요약, 검색 색인, 추정 주당가치 재구성
+        conn = get_db_connection()
+        try:
+            ensure_pipeline_urgency_columns(conn.cursor())
+            ensure_email_lower_column(conn.cursor())
+            apply_index_migrations(conn)
+            ensure_email_job_table(conn.cursor())
+            ensure_imap_checkpoint_table(conn.cursor())
+            conn.commit()
+            ensure_company_financial_latest_table(conn.cursor())
+            refresh_company_financial_latest(conn)
+            ensure_search_indexes(conn)
+            ensure_system_stats(conn)
+            refresh_system_stats(conn)
+            conn.commit()
+            rebuild_company_valuation(conn)
+        except Exception as refresh_err:
+            print(f"[UPLOAD_DB] Company_Financial_Latest/Valuation rebuild failed: {refresh_err}")
+        finally:
+            conn.close()
+        invalidate_company_count_cache()
+        CompanyProfile.invalidate()
         
         success_response = jsonify({
             "success": True, 
@@ -2201,6 +3389,9 @@ def upload_database():
         error_response = jsonify({"success": False, "message": f"업로드 실패: {str(e)}"})
         error_response.headers['Content-Type'] = 'application/json; charset=utf-8'
         return error_response
+    finally:
+        if os.path.exists(upload_path):
+            os.remove(upload_path)
 
 @app.route('/download_database')
 def download_database():
@@ -3349,24 +4540,13 @@ def index():
     per_page = 20
     offset = (page - 1) * per_page
 
-    # Company_Basic 테이블로 변경
-    total_companies = conn.execute('SELECT COUNT(*) FROM Company_Basic').fetchone()[0]
+    # Company_Basic 건수는 system_stats 카운터 사용
+    total_companies = get_system_stats().get('company_basic_count', 0)
     total_pages = math.ceil(total_companies / per_page)
 
     companies = conn.execute('SELECT * FROM Company_Basic LIMIT ? OFFSET ?', (per_page, offset)).fetchall()
 
-    # 접촉 이력 조회 권한 처리 로직
-    user_level = session.get('user_level', 'N')
-    contact_params = []
-    contact_history_query = "SELECT * FROM Contact_History"
-    
-    # V(메인관리자), S(서브관리자)는 전체 이력 조회 가능
-    if not check_permission(user_level, 'S'):
-        contact_history_query += " WHERE registered_by = ?"
-        contact_params.append(user_id)
-    contact_history_query += " ORDER BY contact_datetime DESC"
-    contact_history = conn.execute(contact_history_query, contact_params).fetchall()
-
+    # 접촉이력은 화면에서 필요할 때 /api/contact_history?limit=... 로 페이지 단위 조회
     conn.close()
 
     return render_template('index.html',
@@ -3384,17 +4564,10 @@ def main():
     # 구독 정보 조회
     subscription_info = get_user_subscription_info(session.get('user_id'))
     
-    # 대시보드 통계 정보 조회
-    conn = get_db_connection()
-    try:
-        total_companies = conn.execute('SELECT COUNT(*) FROM Company_Basic').fetchone()[0]
-        total_history = conn.execute('SELECT COUNT(*) FROM Contact_History').fetchone()[0]
-    except Exception as e:
-        print(f"Stats query error: {e}")
-        total_companies = 0
-        total_history = 0
-    finally:
-        conn.close()
+    # 대시보드 통계 정보 조회 (system_stats 카운터, TTL 캐시)
+    stats = get_system_stats()
+    total_companies = stats.get('company_basic_count', 0)
+    total_history = stats.get('contact_history_count', 0)
     
     # 사용자 권한 정보를 템플릿에 전달
     user_data = {
@@ -3419,23 +4592,17 @@ def contact_history_csv():
         return jsonify({'success': False, 'message': 'Unauthorized'}), 401
     if request.method == 'GET':
         # 본인이 등록한 Contact_History만 CSV로 반환 (관리자는 전체 조회 가능)
-        conn = get_db_connection()
         user_level = session.get('user_level', 'N')
         user_id = session.get('user_id')
         
-        if user_level in ['V', 'S']:  # 최고관리자, 시스템관리자는 전체 조회
-            rows = conn.execute('SELECT history_id, contact_datetime, biz_no, contact_type, contact_person, memo, registered_by FROM Contact_History ORDER BY history_id').fetchall()
-        else:  # 일반 사용자는 본인 등록 건만 조회
-            rows = conn.execute('SELECT history_id, contact_datetime, biz_no, contact_type, contact_person, memo, registered_by FROM Contact_History WHERE registered_by = ? ORDER BY history_id', (user_id,)).fetchall()
-        
-        conn.close()
-        si = io.StringIO()
-        cw = csv.writer(si)
-        cw.writerow(['history_id','contact_datetime','biz_no','contact_type','contact_person','memo','registered_by'])
-        for row in rows:
-            cw.writerow([row['history_id'], row['contact_datetime'], row['biz_no'], row['contact_type'], row['contact_person'], row['memo'], row['registered_by']])
-        output = si.getvalue().encode('utf-8-sig')
-        return Response(output, mimetype='text/csv', headers={"Content-Disposition": "attachment;filename=contact_history.csv"})
+        query = f"SELECT {', '.join(CONTACT_HISTORY_CSV_COLUMNS)} FROM Contact_History"
+        params = ()
+        if user_level not in ['V', 'S']:  # 일반 사용자는 본인 등록 건만 조회 (최고/시스템관리자는 전체)
+            query += " WHERE registered_by = ?"
+            params = (user_id,)
+        query += " ORDER BY history_id"
+        return Response(stream_contact_history_csv(query, params), mimetype='text/csv',
+                        headers={"Content-Disposition": "attachment;filename=contact_history.csv"})
     else:
         # 업로드: 기존 데이터 전체 삭제 후, 업로드된 CSV로 전체 대체
         if 'file' not in request.files:
@@ -3457,30 +4624,111 @@ def contact_history_csv():
                 # UTF-8 시도
                 decoded_content = content.decode('utf-8', errors='ignore')
         
-        stream = io.StringIO(decoded_content)
-        reader = csv.DictReader(stream)
-        conn = get_db_connection()
-        try:
-            conn.execute('DELETE FROM Contact_History')
-            inserted, updated = 0, 0
-            for row in reader:
-                if row.get('history_id'):
-                    cur = conn.execute("SELECT 1 FROM Contact_History WHERE history_id = ?", (row['history_id'],))
-                    if cur.fetchone():
-                        conn.execute("UPDATE Contact_History SET contact_datetime=?, biz_no=?, contact_type=?, contact_person=?, memo=?, registered_by=? WHERE history_id = ?",
-                            (row['contact_datetime'], row['biz_no'], row['contact_type'], row['contact_person'], row['memo'], row['registered_by'], row['history_id']))
-                        updated += 1
-                        continue
-                conn.execute("INSERT INTO Contact_History (history_id, contact_datetime, biz_no, contact_type, contact_person, memo, registered_by) VALUES (?, ?, ?, ?, ?, ?, ?)",
-                    (row.get('history_id'), row.get('contact_datetime'), row.get('biz_no'), row.get('contact_type'), row.get('contact_person'), row.get('memo'), row.get('registered_by')))
-                inserted += 1
-            conn.commit()
-        except Exception as e:
-            conn.rollback()
-            return jsonify({'success': False, 'message': str(e)}), 500
-        finally:
-            conn.close()
-        return jsonify({'success': True, 'inserted': inserted, 'updated': updated})
+        events = import_contact_history_csv(decoded_content)
+        if request.args.get('stream') == '1':
+            # 진행률을 SSE 로 전달 (execute_corporate_upload 와 같은 이벤트 형식)
+            return Response((f"data: {json.dumps(evt, ensure_ascii=False)}\n\n" for evt in events),
+                            mimetype='text/event-stream')
+        result = None
+        for evt in events:
+            if evt['type'] in ('complete', 'error'):
+                result = evt
+        if result['type'] == 'error':
+            return jsonify({'success': False, 'message': result['message']}), 500
+        return jsonify({'success': True, 'inserted': result['inserted'], 'updated': result['updated']})
+
+CONTACT_HISTORY_CSV_COLUMNS = ['history_id', 'contact_datetime', 'biz_no', 'contact_type', 'contact_person', 'memo', 'registered_by']
+CONTACT_HISTORY_IMPORT_CHUNK = 5000
+CONTACT_HISTORY_EXPORT_CHUNK = 2000
+
+def stream_contact_history_csv(query, params=(), chunk_size=CONTACT_HISTORY_EXPORT_CHUNK):
+    """접촉이력 CSV 를 chunk_size 행씩 읽어 UTF-8(BOM) 블록으로 차례로 반환합니다. (메모리 사용량 일정)"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    buffer.write('\ufeff')
+    writer.writerow(CONTACT_HISTORY_CSV_COLUMNS)
+    conn = get_db_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.row_factory = None
+        cursor.execute(query, params)
+        while True:
+            rows = cursor.fetchmany(chunk_size)
+            if rows:
+                writer.writerows(rows)
+            yield buffer.getvalue().encode('utf-8')
+            buffer.seek(0)
+            buffer.truncate(0)
+            if not rows:
+                break
+    finally:
+        conn.close()
+
+def import_contact_history_csv(decoded_content, chunk_size=CONTACT_HISTORY_IMPORT_CHUNK):
+    """
+    접촉이력 CSV 로 Contact_History 를 전체 대체합니다. 진행 이벤트(dict)를 차례로 반환하는 generator.
+    - CSV 를 chunk 단위로 읽어 임시 스테이징 테이블에 executemany 로 적재
+    - 기존 이력 삭제 후 INSERT ... SELECT ... ON CONFLICT(history_id) DO UPDATE 한 번으로 반영
+      (파일 안에서 history_id 가 중복되면 뒤의 행이 반영되며 updated 로 집계)
+    - 전체 과정은 하나의 트랜잭션이며 실패 시 기존 데이터 유지
+    """
+    total_chars = max(len(decoded_content), 1)
+    stream = io.StringIO(decoded_content)
+    reader = csv.DictReader(stream)
+    placeholders = ', '.join(['?'] * len(CONTACT_HISTORY_CSV_COLUMNS))
+    columns = ', '.join(CONTACT_HISTORY_CSV_COLUMNS)
+
+    conn = get_db_connection()
+    try:
+        conn.execute("DROP TABLE IF EXISTS temp.contact_history_import")
+        conn.execute("""
+            CREATE TEMP TABLE contact_history_import (
+                seq INTEGER PRIMARY KEY,
+                history_id INTEGER, contact_datetime TEXT, biz_no TEXT, contact_type TEXT,
+                contact_person TEXT, memo TEXT, registered_by TEXT
+            )
+        """)
+        staged = 0
+        chunk = []
+        for row in reader:
+            history_id = (row.get('history_id') or '').strip()
+            chunk.append([int(history_id) if history_id.isdigit() else None] +
+                         [row.get(col) for col in CONTACT_HISTORY_CSV_COLUMNS[1:]])
+            if len(chunk) >= chunk_size:
+                conn.executemany(f"INSERT INTO contact_history_import ({columns}) VALUES ({placeholders})", chunk)
+                staged += len(chunk)
+                chunk = []
+                yield {'type': 'progress', 'table': 'Contact_History', 'current': stream.tell(), 'total': total_chars,
+                       'rows': staged}
+        if chunk:
+            conn.executemany(f"INSERT INTO contact_history_import ({columns}) VALUES ({placeholders})", chunk)
+            staged += len(chunk)
+        yield {'type': 'log', 'message': f'CSV {staged:,}건 적재 완료, 접촉이력 반영 중...'}
+
+        duplicated = conn.execute(
+            "SELECT COUNT(history_id) - COUNT(DISTINCT history_id) FROM contact_history_import").fetchone()[0]
+        conn.execute("DELETE FROM Contact_History")
+        conn.execute(f"""
+            INSERT INTO Contact_History ({columns})
+            SELECT {columns} FROM contact_history_import WHERE true ORDER BY seq
+            ON CONFLICT(history_id) DO UPDATE SET
+                contact_datetime = excluded.contact_datetime, biz_no = excluded.biz_no,
+                contact_type = excluded.contact_type, contact_person = excluded.contact_person,
+                memo = excluded.memo, registered_by = excluded.registered_by
+        """)
+        refresh_system_stats(conn, ['contact_history_count'])
+        conn.commit()
+        conn.execute("DROP TABLE IF EXISTS temp.contact_history_import")
+        print(f"[HISTORY IMPORT] {staged} rows staged, {duplicated} duplicated history_id")
+        yield {'type': 'progress', 'table': 'Contact_History', 'current': total_chars, 'total': total_chars, 'rows': staged}
+        yield {'type': 'complete', 'inserted': staged - duplicated, 'updated': duplicated}
+    except Exception as e:
+        conn.rollback()
+        print(f"[HISTORY IMPORT] failed: {e}")
+        yield {'type': 'error', 'message': str(e)}
+    finally:
+        conn.close()
+
 @app.route('/api/history_search')
 def api_history_search():
     print(">>> /api/history_search 라우트 진입")  # 라우트 진입 확인용 로그
@@ -3532,23 +4780,40 @@ def api_history_search():
         if request.args.get('end_date'):
             filters.append("h.contact_datetime <= ?")
             params.append(request.args.get('end_date') + ' 23:59:59')
-        if request.args.get('biz_no'):
-            filters.append("h.biz_no LIKE ?")
-            params.append(f"%{request.args.get('biz_no')}%")
-
-        if filters:
-            query += " WHERE " + " AND ".join(filters)
-        query += " ORDER BY h.contact_datetime DESC"
-
-        print(f"쿼리 실행: {query}")
-        print(f"파라미터: {params}")
+        biz_no_prefix = (request.args.get('biz_no') or '').replace('-', '').strip()
+        if biz_no_prefix:
+            # 앞자리 일치 검색: 범위 조건으로 biz_no 인덱스 사용
+            filters.append("h.biz_no >= ? AND h.biz_no < ?")
+            params.extend([biz_no_prefix, biz_no_prefix + '\uffff'])
 
         conn = get_db_connection()
-        results = conn.execute(query, params).fetchall()
-        conn.close()
+        try:
+            if request.args.get('limit') is not None:
+                # 페이지 조회: cursor 로 다음 페이지, count=exact 이면 전체 건수 포함
+                history, next_cursor = query_contact_history_page(
+                    conn, query, filters, params,
+                    cursor=request.args.get('cursor') or None,
+                    limit=parse_page_limit(request.args.get('limit')))
+                total_count = None
+                if request.args.get('count') == 'exact':
+                    count_query = "SELECT COUNT(*) FROM Contact_History h"
+                    if filters:
+                        count_query += " WHERE " + " AND ".join(filters)
+                    total_count = conn.execute(count_query, params).fetchone()[0]
+                print(f"조회된 결과 수: {len(history)} (next_cursor={next_cursor})")
+                return fast_jsonify({'success': True, 'data': history, 'next_cursor': next_cursor,
+                                     'total_count': total_count})
+
+            # limit 없는 기존 호출(배열 응답)도 최근 CONTACT_HISTORY_MAX_PAGE_SIZE 건까지만 반환
+            if filters:
+                query += " WHERE " + " AND ".join(filters)
+            query += " ORDER BY h.contact_datetime DESC, h.history_id DESC LIMIT ?"
+            columns, results = fetch_rows(conn, query, params + [CONTACT_HISTORY_MAX_PAGE_SIZE])
+        finally:
+            conn.close()
 
         print(f"조회된 결과 수: {len(results)}")
-        return jsonify([dict(row) for row in results])
+        return fast_jsonify(rows_to_records(columns, results))
         
     except Exception as e:
         print(f"Error in api_history_search: {str(e)}")
@@ -3563,26 +4828,25 @@ def get_companies():
         return jsonify({"error": "Unauthorized"}), 401
     try:
         page = request.args.get('page', 1, type=int)
-        per_page = 50
+        per_page = COMPANY_PAGE_SIZE
         offset = (page - 1) * per_page
-        
-        all_data = query_companies_data(request.args)
-        total_rows = len(all_data)
-        
-        has_next_page = total_rows > (offset + per_page)
-        
-        # NaN 값을 None으로 변환 (JSON 직렬화 문제 해결)
-        paginated_data = all_data.iloc[offset : offset + per_page]
-        
-        # NaN, inf, -inf를 None으로 변환
-        import numpy as np
-        paginated_data = paginated_data.replace([np.nan, np.inf, -np.inf], None)
-        
+        cursor = request.args.get('cursor') or None
+        count_mode = request.args.get('count', 'exact')  # exact | estimate | none
+
+        # cursor 가 있으면 keyset, 없으면 (하위호환) OFFSET 방식으로 한 페이지만 조회
+        companies, next_cursor = query_companies_page(request.args, cursor=cursor, offset=offset, limit=per_page)
+
+        total_rows, is_estimated = None, False
+        if count_mode != 'none':
+            total_rows, is_estimated = count_companies(request.args, mode=count_mode)
+
         return jsonify({
-            'companies': paginated_data.to_dict('records'),
-            'hasNextPage': has_next_page,
+            'companies': companies,
+            'hasNextPage': next_cursor is not None,
+            'nextCursor': next_cursor,
             'offset': offset,
-            'totalRows': total_rows
+            'totalRows': total_rows,
+            'totalRowsEstimated': is_estimated
         })
     except Exception as e:
         print(f"Error in get_companies: {e}")
@@ -3590,34 +4854,85 @@ def get_companies():
         traceback.print_exc()
         return jsonify({"error": "Internal server error"}), 500
 
+def _stream_file_and_remove(path, chunk_size=64 * 1024):
+    """임시 파일을 chunk 단위로 전송한 뒤 삭제합니다."""
+    try:
+        with open(path, 'rb') as f:
+            while True:
+                chunk = f.read(chunk_size)
+                if not chunk:
+                    break
+                yield chunk
+    finally:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
 @app.route('/export_excel')
 def export_excel():
+    """
+    기업 검색 결과 저장 (건수 제한 없음)
+    - format=csv: 조회하면서 바로 CSV 를 스트리밍 (엑셀 호환을 위해 UTF-8 BOM 포함)
+    - 기본(xlsx): xlsxwriter constant_memory 모드로 임시 파일에 행 단위 기록 후 전송
+    """
     if 'user_id' not in session:
         return redirect(url_for('login'))
-    try:
-        import xlsxwriter  # ensure xlsxwriter is installed
-        df = query_companies_data(request.args)
-        if len(df) > 500:
-            return "검색 결과가 500건을 초과합니다. 조건을 조정하여 500건 이하로 조회해주세요.", 400
-        df.rename(columns={
-            'biz_no': '사업자번호', 'company_name': '기업명', 'representative_name': '대표자명', 'phone_number': '전화번호',
-            'company_size': '기업규모', 'address': '주소', 'industry_name': '업종명', 'fiscal_year': '최신결산년도',
-            'total_assets': '자산총계', 'sales_revenue': '매출액', 'retained_earnings': '이익잉여금'
-        }, inplace=True)
-        excel_cols = ['사업자번호', '기업명', '대표자명', '전화번호', '기업규모', '주소', '업종명', '최신결산년도', '자산총계', '매출액', '이익잉여금']
-        df_excel = df[[col for col in excel_cols if col in df.columns]]
-        output = io.BytesIO()
-        with pd.ExcelWriter(output, engine='xlsxwriter') as writer:
-            df_excel.to_excel(writer, index=False, sheet_name='기업정보')
-        output.seek(0)
-        return Response(output, mimetype="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-                        headers={"Content-Disposition": "attachment;filename=company_data.xlsx"})
+    # [ACCESS CONTROL] 저장 버튼을 보여주는 사용자(ct0001, ct0002)만 허용 (index.html 과 같은 조건)
+    if session.get('user_id') not in ['ct0001', 'ct0002']:
+        return "접근 권한이 없습니다.", 403
+    args = request.args.to_dict()
+    headers = [header for _, header in COMPANY_EXPORT_COLUMNS]
+    keys = [key for key, _ in COMPANY_EXPORT_COLUMNS]
+
+    if args.get('format') == 'csv':
+        def generate():
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            buffer.write('\ufeff')
+            writer.writerow(headers)
+            for i, company in enumerate(iter_company_export_rows(args), 1):
+                writer.writerow(['' if company.get(key) is None else company.get(key) for key in keys])
+                if i % 500 == 0:
+                    yield buffer.getvalue()
+                    buffer.seek(0)
+                    buffer.truncate(0)
+            yield buffer.getvalue()
+
+        return Response(stream_with_context(generate()), mimetype='text/csv; charset=utf-8',
+                        headers={"Content-Disposition": "attachment;filename=company_data.csv"})
+
+    try:
+        import xlsxwriter
+        import tempfile
     except ImportError:
         return "엑셀 파일 생성에 필요한 'xlsxwriter' 패키지가 설치되어 있지 않습니다. 관리자에게 문의하세요.", 500
+
+    fd, tmp_path = tempfile.mkstemp(suffix='.xlsx')
+    os.close(fd)
+    try:
+        # constant_memory: 행을 쓰는 즉시 디스크로 내보내 메모리 사용량이 결과 건수와 무관
+        workbook = xlsxwriter.Workbook(tmp_path, {'constant_memory': True})
+        worksheet = workbook.add_worksheet('기업정보')
+        worksheet.write_row(0, 0, headers)
+        row_count = 0
+        for row_count, company in enumerate(iter_company_export_rows(args), 1):
+            worksheet.write_row(row_count, 0, [company.get(key) for key in keys])
+        workbook.close()
+        print(f"[EXPORT] company_data.xlsx: {row_count} rows")
     except Exception as e:
         print(f"Error in export_excel: {e}")
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
         return f"엑셀 파일 생성 중 오류가 발생했습니다. 상세: {e}", 500
 
+    return Response(_stream_file_and_remove(tmp_path),
+                    mimetype="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+                    headers={"Content-Disposition": "attachment;filename=company_data.xlsx",
+                             "Content-Length": str(os.path.getsize(tmp_path))})
+
 # ...existing code...
 @app.route('/company/<biz_no>')
 @app.route('/company_detail/<biz_no>')  # 추가 라우트 경로
@@ -3630,177 +4945,29 @@ def company_detail(biz_no):
     conn = get_db_connection()
     user_id = session.get('user_id')
     
-    basic_query = """
-    SELECT cb.*, cf.rating1, cb.group_transaction_yn, cb.gfc_transaction_yn
-    FROM Company_Basic cb
-    LEFT JOIN (SELECT biz_no, rating1, fiscal_year FROM Company_Financial ORDER BY fiscal_year DESC) AS cf ON cb.biz_no = cf.biz_no
-    WHERE cb.biz_no = ? GROUP BY cb.biz_no
-    """
-    basic_info = conn.execute(basic_query, (biz_no,)).fetchone()
-    
-    financial_query = """
-    SELECT fiscal_year, sales_revenue, operating_income, net_income, total_assets, total_equity, retained_earnings, corporate_tax, 
-           undistributed_retained_earnings, advances_paid, advances_received, shares_issued_count, total_liabilities,
-           IFNULL(capital_stock_value, 0) as capital_stock_value,
-           IFNULL(earned_reserve, 0) as earned_reserve
-    FROM Company_Financial WHERE biz_no = ? ORDER BY fiscal_year DESC LIMIT 3
-    """
-    financial_info = conn.execute(financial_query, (biz_no,)).fetchall()
-    
-    representatives = conn.execute("SELECT name, birth_date, gender, is_gfc FROM Company_Representative WHERE biz_no = ?", (biz_no,)).fetchall()
-    shareholders = conn.execute("SELECT * FROM Company_Shareholder WHERE biz_no = ?", (biz_no,)).fetchall()
-    
-    history_query = "SELECT * FROM Contact_History WHERE biz_no = ?"
-    history_params = [biz_no]
-    user_level = session.get('user_level', 'N')
-
-    # 권한에 따른 접촉이력 조회 범위 설정
-    if user_level == 'V':  # 메인관리자: 모든 이력
-        pass
-    elif user_level == 'S':  # 서브관리자: 관리자급 이력만
-        history_query += " AND registered_by IN (SELECT user_id FROM Users WHERE user_level IN ('V', 'S'))"
-    else:  # 매니저, 일반담당자: 본인 이력만
-        history_query += " AND registered_by = ?"
-        history_params.append(user_id)
-    
-    history_query += " ORDER BY contact_datetime DESC"
-    contact_history = conn.execute(history_query, tuple(history_params)).fetchall()
-
-    try:
-        patents = conn.execute("SELECT * FROM Company_Patent WHERE biz_no = ?", (biz_no,)).fetchall()
-    except sqlite3.OperationalError:
-        patents = []
-    
     try:
-        additional_info_row = conn.execute("SELECT * FROM Company_Additional WHERE biz_no = ?", (biz_no,)).fetchone()
-    except sqlite3.OperationalError:
-        additional_info_row = None
-    conn.close()
+        # 기업 집계 데이터 (biz_no 단위 캐시, 한 연결에서 조회)
+        profile = CompanyProfile.load(biz_no, conn)
 
-    additional_info = dict(additional_info_row) if additional_info_row else {}
-    if additional_info:
-        today_str = get_kst_now().strftime('%Y%m%d')
-        
-        def check_expired(expiry_val, current_date):
-            if not expiry_val:
-                return False
-            # 문자열 변환 및 구분자 제거 (YYYYMMDD 형식으로 통일)
-            d_str = str(expiry_val).replace('-', '').replace('.', '').replace('/', '').strip()
-            # 8자리 숫자만 비교 (그 외 형식은 비교 스킵 또는 False 처리)
-            if len(d_str) >= 8:
-                return d_str[:8] < current_date
-            return False
-
-        if additional_info.get('is_innobiz') == '1' and check_expired(additional_info.get('innobiz_expiry_date'), today_str):
-            additional_info['is_innobiz'] = '0'
-        if additional_info.get('is_mainbiz') == '1' and check_expired(additional_info.get('mainbiz_expiry_date'), today_str):
-            additional_info['is_mainbiz'] = '0'
-        if additional_info.get('is_venture') == '1' and check_expired(additional_info.get('venture_expiry_date'), today_str):
-            additional_info['is_venture'] = '0'
-
-    financial_data_for_calc = [dict(row) for row in financial_info] if financial_info else []
-    stock_valuation = calculate_unlisted_stock_value(financial_data_for_calc, biz_no=biz_no)
-    
-    # 주주 정보 처리 개선 - 지분율, 주식수, 금액 계산
-    processed_shareholders = []
-    total_shares_owned = 0
-    
-    if shareholders:
-        # 전체 주식수 계산 (stock_valuation에서 계산된 값 사용)
-        total_shares_issued = stock_valuation.get('total_shares_issued', 1)
-        estimated_stock_value = stock_valuation.get('estimated_stock_value', 0)
-        
-        for shareholder in shareholders:
-            try:
-                shareholder_dict = dict(shareholder)
-                
-                # 안전한 지분율 변환
-                try:
-                    ownership_percent = float(shareholder_dict.get('ownership_percent', 0) or 0)
-                except (ValueError, TypeError):
-                    ownership_percent = 0.0
-                
-                # 실제 주식수가 있는지 확인
-                actual_stock_quantity = shareholder_dict.get('total_shares_owned')
-                has_actual_stock_data = (actual_stock_quantity is not None and 
-                                       actual_stock_quantity != '' and 
-                                       actual_stock_quantity != 0)
-                
-                if has_actual_stock_data:
-                    # 실제 주식수 데이터가 있는 경우
-                    try:
-                        stock_quantity = float(actual_stock_quantity)
-                        is_predicted = False
-                    except (ValueError, TypeError):
-                        stock_quantity = 0.0
-                        is_predicted = False
-                else:
-                    # 실제 주식수가 없는 경우 지분율로 예측 계산
-                    try:
-                        stock_quantity = (total_shares_issued * ownership_percent) / 100.0
-                        is_predicted = True
-                    except (ValueError, TypeError):
-                        stock_quantity = 0.0
-                        is_predicted = True
-                
-                # 주식 금액 계산
-                try:
-                    stock_value_amount = stock_quantity * estimated_stock_value
-                except (ValueError, TypeError):
-                    stock_value_amount = 0.0
-                
-                shareholder_dict.update({
-                    'ownership_percent': round(ownership_percent, 2),
-                    'stock_quantity': round(stock_quantity, 0),
-                    'stock_value_amount': round(stock_value_amount, 0),
-                    'shareholder_name': shareholder_dict.get('shareholder_name', ''),
-                    'relationship': shareholder_dict.get('relationship', ''),
-                    'is_predicted': is_predicted  # 예측 여부를 표시
-                })
-                
-                processed_shareholders.append(shareholder_dict)
-                total_shares_owned += stock_quantity
-                
-            except Exception as e:
-                print(f"주주 정보 처리 중 오류: {e}")
-                # 오류가 발생한 주주는 건너뛰고 계속 진행
-                continue
+        history_query = "SELECT * FROM Contact_History WHERE biz_no = ?"
+        history_params = [biz_no]
+        user_level = session.get('user_level', 'N')
 
-    today = date.today()
-    processed_representatives = []
-    for rep in representatives:
-        rep_dict = dict(rep)
-        birth_date = rep_dict.get('birth_date')
-        age = None
-        if birth_date and '*' not in str(birth_date):
-            try:
-                # Try parsing formats: YYYYMMDD, YYYY-MM-DD
-                dt = None
-                for fmt in ['%Y%m%d', '%Y-%m-%d']:
-                    try:
-                        dt = datetime.strptime(str(birth_date).strip(), fmt).date()
-                        break
-                    except ValueError:
-                        continue
-                
-                if dt:
-                    age = today.year - dt.year - ((today.month, today.day) < (dt.month, dt.day))
-            except Exception as e:
-                print(f"Age calculation error: {e}")
-        
-        rep_dict['age'] = age
-        processed_representatives.append(rep_dict)
-
-    company_data = {
-        'basic': dict(basic_info) if basic_info else {},
-        'financials': [dict(row) for row in financial_info],
-        'representatives': processed_representatives,
-        'shareholders': processed_shareholders,
-        'history': [dict(row) for row in contact_history],
-        'patents': [dict(row) for row in patents],
-        'additional': additional_info,
-        'stock_valuation': stock_valuation
-    }
+        # 권한에 따른 접촉이력 조회 범위 설정
+        if user_level == 'V':  # 메인관리자: 모든 이력
+            pass
+        elif user_level == 'S':  # 서브관리자: 관리자급 이력만
+            history_query += " AND registered_by IN (SELECT user_id FROM Users WHERE user_level IN ('V', 'S'))"
+        else:  # 매니저, 일반담당자: 본인 이력만
+            history_query += " AND registered_by = ?"
+            history_params.append(user_id)
+        
+        history_query += " ORDER BY contact_datetime DESC"
+        contact_history = conn.execute(history_query, tuple(history_params)).fetchall()
+    finally:
+        conn.close()
+
+    company_data = dict(profile, history=[dict(row) for row in contact_history])
     return render_template('detail.html', 
                          company=company_data, 
                          is_popup=is_popup,
@@ -3834,6 +5001,7 @@ def update_representative_name():
         
         conn.commit()
         conn.close()
+        CompanyProfile.invalidate(biz_no)
         
         return jsonify({"success": True, "message": "대표자 이름이 수정되었습니다."})
         
@@ -3866,6 +5034,7 @@ def delete_representative():
         
         conn.commit()
         conn.close()
+        CompanyProfile.invalidate(biz_no)
         
         return jsonify({"success": True, "message": "대표자 정보가 삭제되었습니다."})
         
@@ -3895,9 +5064,12 @@ def delete_shareholder():
             DELETE FROM Company_Shareholder 
             WHERE biz_no = ? AND shareholder_name = ?
         """, (biz_no, shareholder_name))
+        refresh_company_valuation(conn, [biz_no])
         
         conn.commit()
         conn.close()
+        CompanyProfile.invalidate(biz_no)
+        invalidate_company_count_cache()
         
         return jsonify({"success": True, "message": "주주 정보가 삭제되었습니다."})
         
@@ -3905,13 +5077,70 @@ def delete_shareholder():
         print(f"주주 삭제 오류: {e}")
         return jsonify({"success": False, "message": f"삭제 중 오류가 발생했습니다: {str(e)}"})
 
+CONTACT_HISTORY_PAGE_SIZE = 50
+CONTACT_HISTORY_MAX_PAGE_SIZE = 500
+
+def query_contact_history_page(conn, select_sql, filters, params, cursor=None, limit=CONTACT_HISTORY_PAGE_SIZE):
+    """
+    접촉이력을 (contact_datetime, history_id) 내림차순 keyset 페이지로 조회합니다.
+    - select_sql: 별칭 h 로 Contact_History 를 조회하는 SELECT ... FROM 절 (WHERE/ORDER BY 제외)
+    - cursor: 직전 페이지 마지막 행의 'contact_datetime|history_id' (contact_datetime 이 없으면 '|history_id')
+    - (biz_no|registered_by, contact_datetime) 및 contact_datetime 인덱스 순서로 읽으므로 전체 정렬 없음
+    반환값: (rows, next_cursor) - 다음 페이지가 없으면 next_cursor 는 None
+    """
+    def run(extra_filters, extra_params, n):
+        where = list(filters) + extra_filters
+        query = select_sql
+        if where:
+            query += " WHERE " + " AND ".join(where)
+        query += " ORDER BY h.contact_datetime DESC, h.history_id DESC LIMIT ?"
+        return fetch_rows(conn, query, list(params) + extra_params + [n])
+
+    cursor_datetime = cursor_id = None
+    if cursor:
+        try:
+            cursor_datetime, cursor_id = cursor.rsplit('|', 1)
+            cursor_id = int(cursor_id)
+        except ValueError:
+            cursor_datetime = cursor_id = None
+
+    if cursor_id is None:
+        columns, rows = run([], [], limit + 1)
+    elif cursor_datetime:
+        # 행 값 비교로 인덱스 범위 탐색, contact_datetime 이 NULL 인 행(내림차순 맨 뒤)은 이어서 조회
+        columns, rows = run(["(h.contact_datetime, h.history_id) < (?, ?)"], [cursor_datetime, cursor_id], limit + 1)
+        if len(rows) <= limit:
+            _, null_rows = run(["h.contact_datetime IS NULL"], [], limit + 1 - len(rows))
+            rows = rows + null_rows
+    else:
+        columns, rows = run(["h.contact_datetime IS NULL", "h.history_id < ?"], [cursor_id], limit + 1)
+
+    records = rows_to_records(columns, rows[:limit])
+    next_cursor = None
+    if len(rows) > limit and records:
+        last = records[-1]
+        next_cursor = f"{last['contact_datetime'] or ''}|{last['history_id']}"
+    return records, next_cursor
+
+def parse_page_limit(value, default=CONTACT_HISTORY_PAGE_SIZE, maximum=CONTACT_HISTORY_MAX_PAGE_SIZE):
+    """limit 파라미터를 1 ~ maximum 범위 정수로 변환합니다."""
+    try:
+        return max(1, min(int(value), maximum))
+    except (TypeError, ValueError):
+        return default
+
 @app.route('/api/contact_history', methods=['GET'])
 def get_contact_history():
-    """특정 기업의 접촉이력 조회"""
+    """
+    접촉이력 조회
+    - biz_no 만 전달: 해당 기업 이력 전체 (기존 동작)
+    - limit 전달: 권한 범위 내 이력을 최신순 페이지 단위로 반환 (cursor 로 다음 페이지, biz_no 는 선택)
+    """
     if 'user_id' not in session: return jsonify({"error": "Unauthorized"}), 401
     
     biz_no = request.args.get('biz_no')
-    if not biz_no:
+    paged = request.args.get('limit') is not None
+    if not biz_no and not paged:
         return jsonify({"success": False, "message": "사업자번호가 필요합니다."}), 400
     
     conn = get_db_connection()
@@ -3919,6 +5148,25 @@ def get_contact_history():
         # 사용자 권한에 따른 접촉이력 조회
         user_level = session.get('user_level', 'N')
         user_id = session.get('user_id')
+
+        if paged:
+            filters, params = [], []
+            if biz_no:
+                filters.append("h.biz_no = ?")
+                params.append(biz_no)
+            if user_level not in ['V', 'S']:
+                filters.append("h.registered_by = ?")
+                params.append(user_id)
+            history_list, next_cursor = query_contact_history_page(
+                conn,
+                """SELECT h.history_id, h.biz_no, h.contact_datetime, h.contact_type, h.contact_person, h.memo,
+                          h.registered_by, h.registered_date, b.company_name
+                   FROM Contact_History h
+                   LEFT JOIN Company_Basic b ON h.biz_no = b.biz_no""",
+                filters, params,
+                cursor=request.args.get('cursor') or None,
+                limit=parse_page_limit(request.args.get('limit')))
+            return fast_jsonify({"success": True, "data": history_list, "next_cursor": next_cursor})
         
         if user_level in ['V', 'S']:
             # 메인관리자, 서브관리자는 모든 접촉이력 조회 가능
@@ -5208,24 +6456,24 @@ def get_expenses():
     try:
         # 권한에 따른 조회 범위 설정
         if check_permission(user_level, 'S'):  # 관리자는 모든 비용 조회
-            expenses = conn.execute('''
+            columns, expenses = fetch_rows(conn, '''
                 SELECT e.*, u.name as registered_by_name, c.company_name
                 FROM Expenses e
                 LEFT JOIN Users u ON e.registered_by = u.user_id
                 LEFT JOIN Company_Basic c ON e.biz_no = c.biz_no
                 ORDER BY e.expense_date DESC
-            ''').fetchall()
+            ''')
         else:  # 일반 사용자는 본인 등록 비용만 조회
-            expenses = conn.execute('''
+            columns, expenses = fetch_rows(conn, '''
                 SELECT e.*, u.name as registered_by_name, c.company_name
                 FROM Expenses e
                 LEFT JOIN Users u ON e.registered_by = u.user_id
                 LEFT JOIN Company_Basic c ON e.biz_no = c.biz_no
                 WHERE e.registered_by = ?
                 ORDER BY e.expense_date DESC
-            ''', (user_id,)).fetchall()
+            ''', (user_id,))
         
-        return jsonify([dict(expense) for expense in expenses])
+        return fast_jsonify(rows_to_records(columns, expenses))
     finally:
         conn.close()
 
@@ -6101,108 +7349,149 @@ def sales_pipeline():
                          user_level=user_level,
                          user_name=session.get('user_name', ''))
 
+PIPELINE_DASHBOARD_CACHE_TTL = 60  # 초
+_pipeline_dashboard_cache = {}  # {(담당자 tuple, 오늘 날짜): (expires_at, data)}
+
+PIPELINE_COMPANY_COLUMNS = """
+    mc.id, mc.biz_reg_no, mc.manager_id, mc.status, mc.keyman_name,
+    mc.keyman_phone, mc.keyman_position, mc.keyman_email, mc.registration_reason,
+    mc.next_contact_date, mc.last_contact_date, mc.notes, mc.expected_amount,
+    mc.priority_level, mc.created_at, mc.updated_at,
+    mc.urgency_level, mc.days_since_contact, mc.d_day,
+    cb.company_name, cb.representative_name
+"""
+
+def invalidate_pipeline_dashboard(manager_id=None):
+    """담당자(파트너 포함) 대시보드 캐시를 삭제합니다. manager_id 가 없으면 전체 삭제."""
+    if manager_id is None:
+        _pipeline_dashboard_cache.clear()
+        return
+    for key in [key for key in _pipeline_dashboard_cache if manager_id in key[0]]:
+        _pipeline_dashboard_cache.pop(key, None)
+
+def pipeline_target_managers(user_id):
+    """조회 대상 담당자 tuple ([ACCESS CONTROL] ct0001, ct0002 는 서로의 기업을 함께 봄)"""
+    if user_id in ['ct0001', 'ct0002']:
+        return ('ct0001', 'ct0002')
+    return (user_id,)
+
+def pipeline_status_stats(conn, target_managers):
+    """상태별 건수/예상금액 {status: {'count', 'amount'}}"""
+    mgr_placeholders = ','.join(['?'] * len(target_managers))
+    rows = conn.execute(f"""
+        SELECT status, COUNT(*), COALESCE(SUM(expected_amount), 0)
+        FROM managed_companies WHERE manager_id IN ({mgr_placeholders})
+        GROUP BY status
+    """, target_managers).fetchall()
+    return {row[0]: {'count': row[1], 'amount': row[2]} for row in rows}
+
+def latest_pipeline_change_seq(conn):
+    """현재까지 기록된 마지막 변경 seq (정리된 기록 포함)"""
+    row = conn.execute("SELECT seq FROM sqlite_sequence WHERE name = 'pipeline_changes'").fetchone()
+    return row[0] if row else 0
+
+def fetch_pipeline_changes(conn, target_managers, since_seq, limit=500):
+    """
+    since_seq 이후 변경된 관심 기업만 조회합니다. 변경이 없으면 None.
+    반환: {'seq', 'companies': 현재 행 목록, 'deleted_ids', 'status_stats'}
+    """
+    mgr_placeholders = ','.join(['?'] * len(target_managers))
+    changes = conn.execute(f"""
+        SELECT seq, company_id FROM pipeline_changes
+        WHERE manager_id IN ({mgr_placeholders}) AND seq > ?
+        ORDER BY seq LIMIT ?
+    """, (*target_managers, since_seq, limit)).fetchall()
+    if not changes:
+        return None
+
+    company_ids = list(dict.fromkeys(row[1] for row in changes))
+    id_placeholders = ','.join(['?'] * len(company_ids))
+    columns, rows = fetch_rows(conn, f"""
+        SELECT {PIPELINE_COMPANY_COLUMNS}
+        FROM managed_companies mc
+        LEFT JOIN Company_Basic cb ON mc.biz_reg_no = cb.biz_no
+        WHERE mc.id IN ({id_placeholders}) AND mc.manager_id IN ({mgr_placeholders})
+    """, (*company_ids, *target_managers))
+    companies = rows_to_records(columns, rows)
+    found_ids = {company['id'] for company in companies}
+    return {
+        "seq": changes[-1][0],
+        "companies": companies,
+        "deleted_ids": [company_id for company_id in company_ids if company_id not in found_ids],
+        "status_stats": pipeline_status_stats(conn, target_managers)
+    }
+
+def build_pipeline_dashboard(conn, target_managers, today):
+    """
+    담당자들의 관심 기업을 한 번 조회해 오늘 연락/관리 소홀/전체/상태별 통계를 만듭니다.
+    - 오늘 연락/관리 소홀 여부는 미리 계산된 d_day/urgency_level 을 사용 (ensure_pipeline_urgency_current 선행)
+    - 상태별 건수/예상금액은 윈도 함수로 같은 조회에서 집계
+    """
+    mgr_placeholders = ','.join(['?'] * len(target_managers))
+    query = f"""
+        SELECT {PIPELINE_COMPANY_COLUMNS},
+               mc.d_day = 0 AS _is_today,
+               mc.urgency_level = {PIPELINE_URGENCY_URGENT} AS _is_urgent,
+               COUNT(*) OVER (PARTITION BY mc.status) AS _status_count,
+               COALESCE(SUM(mc.expected_amount) OVER (PARTITION BY mc.status), 0) AS _status_amount
+        FROM managed_companies mc
+        LEFT JOIN Company_Basic cb ON mc.biz_reg_no = cb.biz_no
+        WHERE mc.manager_id IN ({mgr_placeholders})
+        ORDER BY mc.updated_at DESC
+    """
+    columns, rows = fetch_rows(conn, query, target_managers)
+    record_columns = columns[:-4]
+
+    all_companies, today_contacts, urgent_companies = [], [], []
+    status_stats = {}
+    for row in rows:
+        record = dict(zip(record_columns, row))
+        is_today, is_urgent, status_count, status_amount = row[-4:]
+        all_companies.append(record)
+        if is_today:
+            today_contacts.append(record)
+        if is_urgent:
+            urgent_companies.append(record)
+        status_stats[record['status']] = {'count': status_count, 'amount': status_amount}
+
+    status_order = {status: i for i, status in enumerate(PIPELINE_ALERT_DAYS)}
+    # priority_level DESC (SQLite 정렬과 같이 NULL < 숫자 < 문자)
+    today_contacts.sort(key=lambda r: (0, 0) if r['priority_level'] is None else
+                        (2, str(r['priority_level'])) if isinstance(r['priority_level'], str) else
+                        (1, r['priority_level']), reverse=True)
+    # 상태 순서 → 접촉 기록 없는 기업 → 마지막 접촉이 오래된 순
+    urgent_companies.sort(key=lambda r: (status_order[r['status']], r['last_contact_date'] is not None,
+                                         r['last_contact_date'] or ''))
+    return {
+        "today_contacts": today_contacts,
+        "urgent_companies": urgent_companies,
+        "all_companies": all_companies,
+        "status_stats": status_stats
+    }
+
 @app.route('/api/pipeline/dashboard')
 def pipeline_dashboard_data():
-    """파이프라인 대시보드 데이터 API"""
+    """파이프라인 대시보드 데이터 API (담당자별 PIPELINE_DASHBOARD_CACHE_TTL 초 캐시)"""
     if 'user_id' not in session:
         return jsonify({"success": False, "message": "로그인이 필요합니다"}), 401
     
-    user_id = session.get('user_id')
+    target_managers = pipeline_target_managers(session.get('user_id'))
+    today = datetime.now().strftime('%Y-%m-%d')
+    cache_key = (target_managers, today)
+    cached = _pipeline_dashboard_cache.get(cache_key)
+    now = time.time()
+    if cached and cached[0] > now:
+        return fast_jsonify({"success": True, "data": cached[1]})
+
     conn = get_db_connection()
-    
     try:
-        cursor = conn.cursor()
-        
-        # 오늘 연락해야 할 기업
-        today = datetime.now().strftime('%Y-%m-%d')
-
-        # [ACCESS CONTROL] ct0001, ct0002 파트너십 로직 적용
-        target_managers = [user_id]
-        if user_id in ['ct0001', 'ct0002']:
-            target_managers = ['ct0001', 'ct0002']
-            
-        mgr_placeholders = ','.join(['?'] * len(target_managers))
-        
-        # 오늘 연락해야 할 기업
-        today = datetime.now().strftime('%Y-%m-%d')
-        today_contacts_query = f'''
-            SELECT mc.id, mc.biz_reg_no, mc.manager_id, mc.status, mc.keyman_name,
-                   mc.keyman_phone, mc.keyman_position, mc.keyman_email, mc.registration_reason,
-                   mc.next_contact_date, mc.last_contact_date, mc.notes, mc.expected_amount,
-                   mc.priority_level, mc.created_at, mc.updated_at,
-                   cb.company_name, cb.representative_name 
-            FROM managed_companies mc
-            LEFT JOIN Company_Basic cb ON mc.biz_reg_no = cb.biz_no
-            WHERE mc.manager_id IN ({mgr_placeholders}) AND mc.next_contact_date = ?
-            ORDER BY mc.priority_level DESC
-        '''
-        cursor.execute(today_contacts_query, (*target_managers, today))
-        today_contacts = cursor.fetchall()
-        
-        # 관리 소홀 기업 (상태별 알림 주기 적용)
-        urgent_companies = []
-        status_periods = {
-            'prospect': 14, 'contacted': 7, 'proposal': 3, 
-            'negotiation': 2, 'contract': 30, 'hold': 30
-        }
-        
-        for status, days in status_periods.items():
-            threshold_date = (datetime.now() - timedelta(days=days)).strftime('%Y-%m-%d')
-
-            urgent_query = f'''
-                SELECT mc.id, mc.biz_reg_no, mc.manager_id, mc.status, mc.keyman_name,
-                       mc.keyman_phone, mc.keyman_position, mc.keyman_email, mc.registration_reason,
-                       mc.next_contact_date, mc.last_contact_date, mc.notes, mc.expected_amount,
-                       mc.priority_level, mc.created_at, mc.updated_at,
-                       cb.company_name, cb.representative_name 
-                FROM managed_companies mc
-                LEFT JOIN Company_Basic cb ON mc.biz_reg_no = cb.biz_no
-                WHERE mc.manager_id IN ({mgr_placeholders}) AND mc.status = ? 
-                AND (mc.last_contact_date IS NULL OR mc.last_contact_date < ?)
-                ORDER BY CASE WHEN mc.last_contact_date IS NULL THEN 0 ELSE 1 END, mc.last_contact_date ASC
-            '''
-            cursor.execute(urgent_query, (*target_managers, status, threshold_date))
-            urgent_for_status = cursor.fetchall()
-            urgent_companies.extend(urgent_for_status)
-        
-        # 전체 관리 기업 현황
-        # 전체 관리 기업 현황
-        total_query = f'''
-            SELECT mc.id, mc.biz_reg_no, mc.manager_id, mc.status, mc.keyman_name,
-                   mc.keyman_phone, mc.keyman_position, mc.keyman_email, mc.registration_reason,
-                   mc.next_contact_date, mc.last_contact_date, mc.notes, mc.expected_amount,
-                   mc.priority_level, mc.created_at, mc.updated_at,
-                   cb.company_name, cb.representative_name 
-            FROM managed_companies mc
-            LEFT JOIN Company_Basic cb ON mc.biz_reg_no = cb.biz_no
-            WHERE mc.manager_id IN ({mgr_placeholders})
-            ORDER BY mc.updated_at DESC
-        '''
-        cursor.execute(total_query, tuple(target_managers))
-        all_companies = cursor.fetchall()
-        
-        # 상태별 통계
-        # 상태별 통계
-        stats_query = f'''
-            SELECT status, COUNT(*) as count, 
-                   COALESCE(SUM(expected_amount), 0) as total_amount
-            FROM managed_companies 
-            WHERE manager_id IN ({mgr_placeholders})
-            GROUP BY status
-        '''
-        cursor.execute(stats_query, tuple(target_managers))
-        status_stats = {row[0]: {'count': row[1], 'amount': row[2]} for row in cursor.fetchall()}
-        
-        return jsonify({
-            "success": True,
-            "data": {
-                "today_contacts": [dict(row) for row in today_contacts],
-                "urgent_companies": [dict(row) for row in urgent_companies],
-                "all_companies": [dict(row) for row in all_companies],
-                "status_stats": status_stats
-            }
-        })
-        
+        ensure_pipeline_urgency_current(conn, today)
+        # 변경 피드는 이 seq 이후부터 이어받음 (캐시된 데이터여도 이후 변경분이 다시 전달되므로 누락 없음)
+        change_seq = latest_pipeline_change_seq(conn)
+        data = build_pipeline_dashboard(conn, target_managers, today)
+        data['change_seq'] = change_seq
+        _pipeline_dashboard_cache[cache_key] = (now + PIPELINE_DASHBOARD_CACHE_TTL, data)
+        return fast_jsonify({"success": True, "data": data})
     except Exception as e:
         print(f"Pipeline dashboard error: {e}")
         import traceback
@@ -6211,6 +7500,86 @@ def pipeline_dashboard_data():
     finally:
         conn.close()
 
+PIPELINE_FEED_POLL_SECONDS = 2
+PIPELINE_FEED_KEEPALIVE_SECONDS = 15
+# 스트림 하나가 gthread 워커의 스레드 하나를 점유하므로 일정 시간 후 끊고 브라우저가 Last-Event-ID 로 재연결
+# (Procfile 의 gunicorn --timeout 보다 짧아야 함)
+PIPELINE_FEED_MAX_SECONDS = int(os.environ.get('PIPELINE_FEED_MAX_SECONDS', 55))
+# 프로세스당 동시에 유지하는 스트림 수. 초과 연결은 1회만 확인하고 바로 닫음 (retry 간격으로 폴링하는 셈)
+# → 파이프라인 탭이 많아도 다른 요청을 처리할 스레드가 남도록 --threads 보다 작게 유지
+PIPELINE_FEED_MAX_STREAMS = int(os.environ.get('PIPELINE_FEED_MAX_STREAMS', 4))
+_pipeline_feed_streams = threading.BoundedSemaphore(PIPELINE_FEED_MAX_STREAMS)
+
+@app.route('/api/pipeline/changes')
+def pipeline_change_feed():
+    """
+    파이프라인 변경 피드 (SSE)
+    - since(또는 Last-Event-ID) 이후 변경된 관심 기업 행과 상태별 통계만 'changes' 이벤트로 전달
+    - 날짜가 바뀌었거나 이어받을 수 없는 경우 'reload' 이벤트 (전체 대시보드 재조회)
+    """
+    if 'user_id' not in session:
+        return jsonify({"success": False, "message": "로그인이 필요합니다"}), 401
+
+    target_managers = pipeline_target_managers(session.get('user_id'))
+    since = request.headers.get('Last-Event-ID') or request.args.get('since')
+    try:
+        since_seq = int(since) if since not in (None, '') else None
+    except ValueError:
+        return jsonify({"success": False, "message": "since 값이 올바르지 않습니다"}), 400
+    today = datetime.now().strftime('%Y-%m-%d')
+
+    def event(name, payload, event_id=None):
+        head = f"id: {event_id}\n" if event_id is not None else ""
+        return f"{head}event: {name}\ndata: {json.dumps(payload, ensure_ascii=False, default=str)}\n\n"
+
+    def generate():
+        nonlocal since_seq
+        streaming = _pipeline_feed_streams.acquire(blocking=False)
+        max_seconds = PIPELINE_FEED_MAX_SECONDS if streaming else 0
+        try:
+            yield f"retry: {int(PIPELINE_FEED_POLL_SECONDS * 1000)}\n\n"
+            conn = get_db_connection()
+            try:
+                if since_seq is None:
+                    since_seq = latest_pipeline_change_seq(conn)
+                else:
+                    # since 이후 변경 중 보관 기간이 지나 삭제된 것이 있으면 이어받을 수 없음
+                    latest_seq = latest_pipeline_change_seq(conn)
+                    oldest_seq = conn.execute("SELECT MIN(seq) FROM pipeline_changes").fetchone()[0] or latest_seq + 1
+                    if since_seq < latest_seq and oldest_seq > since_seq + 1:
+                        yield event('reload', {"reason": "expired"})
+                        return
+            finally:
+                conn.close()
+
+            started = last_sent = time.time()
+            while True:
+                if datetime.now().strftime('%Y-%m-%d') != today:
+                    yield event('reload', {"reason": "date_changed"})
+                    return
+                conn = get_db_connection()
+                try:
+                    changes = fetch_pipeline_changes(conn, target_managers, since_seq)
+                finally:
+                    conn.close()
+                if changes:
+                    since_seq = changes['seq']
+                    last_sent = time.time()
+                    yield event('changes', changes, since_seq)
+                    continue
+                if time.time() - started >= max_seconds:
+                    return
+                if time.time() - last_sent >= PIPELINE_FEED_KEEPALIVE_SECONDS:
+                    last_sent = time.time()
+                    yield ": keepalive\n\n"
+                time.sleep(PIPELINE_FEED_POLL_SECONDS)
+        finally:
+            if streaming:
+                _pipeline_feed_streams.release()
+
+    return Response(generate(), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
 @app.route('/api/pipeline/company', methods=['POST'])
 def add_managed_company():
     """관심 기업 등록"""
@@ -6253,7 +7622,11 @@ def add_managed_company():
         ))
         
         company_id = cursor.lastrowid
+        refresh_pipeline_urgency(conn, [company_id])
+        record_pipeline_change(conn, user_id, company_id)
         conn.commit()
+        invalidate_pipeline_dashboard(user_id)
+        invalidate_company_count_cache()  # 기업 검색 건수는 담당 기업(managed_companies) 기준 접근 제한을 포함
         
         return jsonify({"success": True, "message": "관심 기업이 등록되었습니다", "company_id": company_id})
         
@@ -6298,8 +7671,12 @@ def update_managed_company(company_id):
             data.get('expected_amount', 0), data.get('priority_level', 1),
             company_id
         ))
+        refresh_pipeline_urgency(conn, [company_id])
+        record_pipeline_change(conn, user_id, company_id)
         
         conn.commit()
+        invalidate_pipeline_dashboard(user_id)
+        invalidate_company_count_cache()
         return jsonify({"success": True, "message": "기업 정보가 수정되었습니다"})
         
     except Exception as e:
@@ -6336,8 +7713,11 @@ def delete_managed_company(company_id):
         
         # 기업 정보 삭제
         cursor.execute('DELETE FROM managed_companies WHERE id = ?', (company_id,))
+        record_pipeline_change(conn, user_id, company_id, 'delete')
         
         conn.commit()
+        invalidate_pipeline_dashboard(user_id)
+        invalidate_company_count_cache()
         return jsonify({
             "success": True, 
             "message": f"'{company_name}' 기업이 삭제되었습니다. (접촉이력 {deleted_contacts}건 삭제)"
@@ -6397,8 +7777,11 @@ def add_contact_history():
                 SET next_contact_date = ?
                 WHERE id = ?
             ''', (data['follow_up_date'], data['managed_company_id']))
+        refresh_pipeline_urgency(conn, [data['managed_company_id']])
+        record_pipeline_change(conn, user_id, data['managed_company_id'])
         
         conn.commit()
+        invalidate_pipeline_dashboard(user_id)
         return jsonify({"success": True, "message": "접촉 이력이 등록되었습니다"})
         
     except Exception as e:
@@ -7009,6 +8392,7 @@ def update_ceo_name():
         
         conn.commit()
         conn.close()
+        CompanyProfile.invalidate(biz_no)
         
         return jsonify({'success': True, 'message': '대표자명이 성공적으로 업데이트되었습니다.'})
     
@@ -7040,6 +8424,7 @@ def update_representative_name_api():
         
         conn.commit()
         conn.close()
+        CompanyProfile.invalidate(biz_no)
         
         return jsonify({'success': True, 'message': '대표자명이 성공적으로 업데이트되었습니다.'})
     
@@ -7069,9 +8454,12 @@ def update_shareholder():
             SET shareholder_name = ?
             WHERE biz_no = ? AND shareholder_name = ?
         ''', (new_shareholder_name, biz_no, old_shareholder_name))
+        refresh_company_valuation(conn, [biz_no])
         
         conn.commit()
         conn.close()
+        CompanyProfile.invalidate(biz_no)
+        invalidate_company_count_cache()
         
         return jsonify({'success': True, 'message': '주주명이 성공적으로 업데이트되었습니다.'})
     
@@ -7101,9 +8489,12 @@ def update_share_count():
             SET share_count = ?
             WHERE biz_no = ? AND shareholder_name = ?
         ''', (new_share_count, biz_no, shareholder_name))
+        refresh_company_valuation(conn, [biz_no])
         
         conn.commit()
         conn.close()
+        CompanyProfile.invalidate(biz_no)
+        invalidate_company_count_cache()
         
         return jsonify({'success': True, 'message': '수식수가 성공적으로 업데이트되었습니다.'})
     
@@ -7146,6 +8537,7 @@ def update_representative_info():
         
         conn.commit()
         conn.close()
+        CompanyProfile.invalidate(biz_no)
         
         return jsonify({'success': True, 'message': '대표자 정보가 수정되었습니다.'})
     
@@ -7190,9 +8582,12 @@ def update_shareholder_info():
                 SET shareholder_name = ?
                 WHERE biz_no = ? AND shareholder_name = ?
             ''', (new_name, biz_no, old_name))
+        refresh_company_valuation(conn, [biz_no])
         
         conn.commit()
         conn.close()
+        CompanyProfile.invalidate(biz_no)
+        invalidate_company_count_cache()
         
         return jsonify({'success': True, 'message': '주주 정보가 수정되었습니다.'})
     
@@ -8215,21 +9610,16 @@ def individual_business_list():
                  query += " AND status = ?"
                  params.append(status_filter)
         
-        if company_name:
-            query += " AND company_name LIKE ?"
-            params.append(f'%{company_name}%')
-        
-        if business_number:
-            query += " AND business_number LIKE ?"
-            params.append(f'%{business_number}%')
-        
-        if address:
-            query += " AND address LIKE ?"
-            params.append(f'%{address}%')
-
-        if industry_type:
-            query += " AND industry_type LIKE ?"
-            params.append(f'%{industry_type}%')
+        # 기업명/사업자번호/주소/업종 검색은 전문 검색 색인(MATCH 1회)으로 처리
+        text_filters, text_params = build_search_filters('Individual_Search_FTS', 'rowid', [
+            (['company_name'], company_name),
+            (['business_number'], business_number),
+            (['address'], address),
+            (['industry_type'], industry_type),
+        ])
+        for text_filter in text_filters:
+            query += f" AND {text_filter}"
+        params.extend(text_params)
             
         if financial_year:
             query += " AND CAST(financial_year AS INTEGER) >= ?"
@@ -9039,6 +10429,15 @@ def initialize_db():
     except Exception as e:
         print(f"? 개인사업자 테이블 초기화 실패: {e}")
 
+    try:
+        conn = get_db_connection()
+        ensure_search_indexes(conn)
+        conn.commit()
+        conn.close()
+        print("✅ 전문 검색 색인 초기화 완료")
+    except Exception as e:
+        print(f"❌ 전문 검색 색인 초기화 실패: {e}")
+
     try:
         init_lys_tables()
         print("✅ LYS 테이블 초기화 완료")
@@ -9063,6 +10462,7 @@ def migrate_email_system_schema():
                 batch_id TEXT,
                 biz_no TEXT,
                 email TEXT,
+                email_lower TEXT,
                 group_name TEXT,
                 subject TEXT,
                 status TEXT,
@@ -9861,10 +11261,23 @@ def execute_corporate_upload():
                     pass
             
             process.wait()
-            
+            invalidate_company_count_cache()
+            CompanyProfile.invalidate()
+            _system_stats_cache['expires_at'] = 0
+
             if process.returncode != 0:
                 yield f"data: {json.dumps({'type': 'error', 'message': 'Script failed'})}\n\n"
             else:
+                # 재무/주주 변경분을 반영해 추정 주당가치 재계산
+                try:
+                    conn = get_db_connection()
+                    try:
+                        valued = rebuild_company_valuation(conn)
+                    finally:
+                        conn.close()
+                    yield f"data: {json.dumps({'type': 'log', 'message': f'추정 주당가치 재계산 완료: {valued:,}개 기업'})}\n\n"
+                except Exception as valuation_err:
+                    yield f"data: {json.dumps({'type': 'log', 'message': f'추정 주당가치 재계산 실패: {valuation_err}'})}\n\n"
                 yield f"data: {json.dumps({'type': 'complete', 'stats': stats})}\n\n"
                 
         except Exception as e:
@@ -10091,12 +11504,12 @@ def api_email_batch_send_new():
         conn.close()
         return jsonify({'success': False, 'message': 'SMTP 설정을 찾을 수 없습니다.'}), 404
         
-    # Get company details for personalization (반송된 이메일 제외)
-    placeholders = ','.join(['?'] * len(biz_nos))
-    cursor.execute(f'SELECT biz_no, company_name, representative_name, email, phone_number, phone_number as phone, address FROM Company_Basic WHERE biz_no IN ({placeholders}) AND (email_usable = 1 OR email_usable IS NULL)', biz_nos)
-    companies = [dict(row) for row in cursor.fetchall()]
+    # Get company details for personalization (반송된 이메일 제외, 템플릿에서 쓰는 재무 매크로가 있으면 재무 포함)
+    from email_service import CompiledMailTemplate, load_mail_recipients
+    companies = load_mail_recipients(cursor, biz_nos, (CompiledMailTemplate(subject), CompiledMailTemplate(body)))
     
     # 반송된 이메일 확인
+    placeholders = ','.join(['?'] * len(biz_nos))
     cursor.execute(f'SELECT COUNT(*) as bounce_count FROM Company_Basic WHERE biz_no IN ({placeholders}) AND email_usable = 0', biz_nos)
     bounce_info = cursor.fetchone()
     bounce_count = bounce_info['bounce_count'] if bounce_info else 0
@@ -10127,6 +11540,42 @@ def api_email_batch_send_new():
     )
     return jsonify({'success': True, 'message': '발송이 시작되었습니다.', 'batch_id': result['batch_id']})
 
+EMAIL_PREVIEW_MAX = 20
+
+@app.route('/api/email/preview', methods=['POST'])
+def api_email_preview():
+    """
+    발송 전 미리보기 (dry-run): 선택한 기업 중 처음 limit 곳에 대해 매크로가 치환된 제목/본문을 반환합니다.
+    실제 발송/로그 기록은 하지 않으며, 등록되지 않은 {매크로} 는 unknown_macros 로 알려줍니다.
+    """
+    if 'user_id' not in session:
+        return jsonify({'success': False, 'message': '로그인이 필요합니다.'}), 401
+
+    data = request.json or {}
+    biz_nos = data.get('biz_nos', [])
+    if not biz_nos:
+        return jsonify({'success': False, 'message': '미리볼 기업을 선택해주세요'}), 400
+    try:
+        limit = min(max(int(data.get('limit', 5)), 1), EMAIL_PREVIEW_MAX)
+    except (TypeError, ValueError):
+        return jsonify({'success': False, 'message': 'limit 값이 올바르지 않습니다.'}), 400
+
+    from email_service import CompiledMailTemplate, MAIL_MACRO_FIELDS, load_mail_recipients, render_mail_preview
+    subject = data.get('subject', '')
+    body = data.get('body', '')
+    conn = get_db_connection()
+    try:
+        # 반송 제외 후 실제 발송될 순서대로 처음 limit 곳
+        companies = load_mail_recipients(conn.cursor(), biz_nos,
+                                         (CompiledMailTemplate(subject), CompiledMailTemplate(body)))
+        result = render_mail_preview(companies, subject, body, limit)
+        return jsonify({'success': True, 'recipient_count': len(companies),
+                        'available_macros': list(MAIL_MACRO_FIELDS), **result})
+    except Exception as e:
+        return jsonify({'success': False, 'message': str(e)}), 500
+    finally:
+        conn.close()
+
 @app.route('/api/email/batches')
 def api_email_batches():
     if 'user_id' not in session:
@@ -10393,6 +11842,7 @@ def api_email_update_company():
         
         cursor.execute(query, params)
         conn.commit()
+        CompanyProfile.invalidate(biz_no)
         return jsonify({'success': True, 'message': '기업 정보가 업데이트되었습니다.', 'email_usable': bool(email_usable)})
     except Exception as e:
         return jsonify({'success': False, 'message': str(e)}), 500
@@ -10406,7 +11856,6 @@ def api_email_companies():
     keyword = request.args.get('keyword', '')
     
     conn = get_db_connection()
-    cursor = conn.cursor()
     
     query = 'SELECT cb.*, (SELECT MAX(sent_at) FROM email_send_log WHERE biz_no = cb.biz_no) as last_sent_at FROM Company_Basic cb'
     params = []
@@ -10426,10 +11875,13 @@ def api_email_companies():
     elif email_status == 'ABNORMAL':
         conditions.append('(email IS NULL OR email = "" OR email_usable = 0)')
         
-    # 3. Keyword Search
+    # 3. Keyword Search (전문 검색 색인 사용, 3글자 미만은 LIKE)
     if keyword:
-        conditions.append('(company_name LIKE ? OR representative_name LIKE ? OR biz_no LIKE ? OR email LIKE ?)')
-        params.extend([f'%{keyword}%', f'%{keyword}%', f'%{keyword}%', f'%{keyword}%'])
+        keyword_filters, keyword_params = build_search_filters(
+            'Company_Search_FTS', 'cb.rowid',
+            [(['company_name', 'representative_name', 'biz_no', 'email'], keyword)])
+        conditions.extend(keyword_filters)
+        params.extend(keyword_params)
         
     if conditions:
         query += ' WHERE ' + ' AND '.join(conditions)
@@ -10439,11 +11891,12 @@ def api_email_companies():
     # Optional: Paging or Limit for performance
     query += ' LIMIT 200'
     
-    cursor.execute(query, params)
-    companies = [dict(row) for row in cursor.fetchall()]
-    conn.close()
+    try:
+        columns, rows = fetch_rows(conn, query, params)
+    finally:
+        conn.close()
     
-    return jsonify({'success': True, 'companies': companies})
+    return fast_jsonify({'success': True, 'companies': rows_to_records(columns, rows)})
 
 @app.route('/api/email/companies/add', methods=['POST'])
 def api_email_companies_add():
@@ -10481,11 +11934,47 @@ def api_email_companies_add():
     finally:
         conn.close()
 
+def batch_status_response(batch):
+    """send_batches 행(또는 메모리 진행 정보)을 batch-status 응답으로 변환합니다."""
+    # Calculate percentage
+    total = batch.get('total_count') or 1
+    processed = batch.get('sent_count') or 0
+    success_count = batch.get('success_count') or 0
+    fail_count = batch.get('fail_count') or 0
+    percent = int((processed / total) * 100)
+    
+    # 상태 정규화: email_service.py에서 'completed'로 저장됨
+    current_status = batch.get('status', 'in_progress')
+    
+    return jsonify({
+        'success': True,
+        'status': {
+            'status': current_status,
+            'percent': percent,
+            'processed_count': processed,  # JS trackProgress()가 사용하는 키
+            'success_count': success_count,
+            'fail_count': fail_count,
+            'total_count': total,
+            # 구버전 호환성
+            'sent': processed,
+            'success': success_count,
+            'fail': fail_count,
+            'total': total,
+            'last_error': batch.get('last_error')
+        }
+    })
+
 @app.route('/api/email/batch-status/<batch_id>')
 def api_email_batch_status(batch_id):
     if 'user_id' not in session:
         return jsonify({'success': False, 'message': '로그인이 필요합니다.'}), 401
-        
+
+    # 이 프로세스에서 발송 중인 배치는 메모리의 진행 정보를 사용 (DB 는 결과 버퍼 flush 때만 갱신됨)
+    from email_service import get_batch_progress
+    batch = get_batch_progress(batch_id)
+    if batch:
+        return batch_status_response(batch)
+
     conn = get_db_connection()
     cursor = conn.cursor()
     try:
@@ -10494,34 +11983,7 @@ def api_email_batch_status(batch_id):
         if not row:
             return jsonify({'success': False, 'message': '배치를 찾을 수 없습니다.'}), 404
             
-        batch = dict(row)
-        # Calculate percentage
-        total = batch.get('total_count') or 1
-        processed = batch.get('sent_count') or 0
-        success_count = batch.get('success_count') or 0
-        fail_count = batch.get('fail_count') or 0
-        percent = int((processed / total) * 100)
-        
-        # 상태 정규화: email_service.py에서 'completed'로 저장됨
-        current_status = batch.get('status', 'in_progress')
-        
-        return jsonify({
-            'success': True,
-            'status': {
-                'status': current_status,
-                'percent': percent,
-                'processed_count': processed,  # JS trackProgress()가 사용하는 키
-                'success_count': success_count,
-                'fail_count': fail_count,
-                'total_count': total,
-                # 구버전 호환성
-                'sent': processed,
-                'success': success_count,
-                'fail': fail_count,
-                'total': total,
-                'last_error': batch.get('last_error')
-            }
-        })
+        return batch_status_response(dict(row))
     except Exception as e:
         return jsonify({'success': False, 'message': str(e)}), 500
     finally:
@@ -10550,13 +12012,11 @@ def api_email_upload_attachments():
     return jsonify({'success': True, 'files': uploaded})
 
 
-# 반송 스캔 작업 상태 맴리저 (in-memory, 세션 키 기준)
-_bounce_jobs = {}  # {job_id: {'status': 'running'|'done'|'error', 'result': {...}}}
-
 @app.route('/api/email/check-bounces', methods=['POST'])
 def api_email_check_bounces():
     """IMAP으로 반송 메일을 확인하고 DB(email_send_log + Company_Basic)를 업데이트합니다.
-    Render의 30초 요청 타임아웃을 피하기 위해 백그라운드 스레드로 실행합니다.
+    Render의 30초 요청 타임아웃을 피하기 위해 작업 큐(email_jobs)에 등록하고 워커가 실행합니다.
+    smtp_config_id 가 'all' 이면 사용 가능한 모든 SMTP 계정을 동시에 검사합니다.
     """
     if 'user_id' not in session:
         return jsonify({'success': False, 'message': '로그인이 필요합니다.'}), 401
@@ -10574,15 +12034,25 @@ def api_email_check_bounces():
     # SMTP 설정에 IMAP 서버 정보 없으면 기본값 설정
     conn = get_db_connection()
     cursor = conn.cursor()
-    cursor.execute('SELECT * FROM smtp_configs WHERE config_id = ?', (smtp_config_id,))
-    cfg = cursor.fetchone()
-    conn.close()
+    if smtp_config_id == 'all':
+        # ct0001, ct0002는 SMTP 설정을 서로 공유할 수 있음
+        smtp_users = [session['user_id']]
+        if session['user_id'] in ['ct0001', 'ct0002']:
+            smtp_users = ['ct0001', 'ct0002']
+        placeholders = ','.join(['?' for _ in smtp_users])
+        cursor.execute(f'SELECT * FROM smtp_configs WHERE user_id IN ({placeholders})', smtp_users)
+    else:
+        cursor.execute('SELECT * FROM smtp_configs WHERE config_id = ?', (smtp_config_id,))
+    cfgs = cursor.fetchall()
 
-    if not cfg:
+    if not cfgs:
+        conn.close()
         return jsonify({'success': False, 'message': 'SMTP 설정을 찾을 수 없습니다.'}), 404
 
     # IMAP 서버 자동 결정 (미설정 시)
-    if not cfg['imap_server']:
+    for cfg in cfgs:
+        if cfg['imap_server']:
+            continue
         smtp_srv = (cfg['smtp_server'] or '').lower()
         if 'gmail' in smtp_srv:
             auto_imap = 'imap.gmail.com'
@@ -10594,34 +12064,14 @@ def api_email_check_bounces():
             auto_imap = 'imap.nate.com'
         else:
             auto_imap = smtp_srv.replace('smtp.', 'imap.')
+        conn.execute('UPDATE smtp_configs SET imap_server = ?, imap_port = 993 WHERE config_id = ?',
+                     (auto_imap, cfg['config_id']))
+    conn.commit()
+    conn.close()
+    config_ids = [cfg['config_id'] for cfg in cfgs]
 
-        conn2 = get_db_connection()
-        conn2.execute('UPDATE smtp_configs SET imap_server = ?, imap_port = 993 WHERE config_id = ?',
-                      (auto_imap, smtp_config_id))
-        conn2.commit()
-        conn2.close()
-
-    # 백그라운드 작업 시작
-    import uuid as _uuid
-    job_id = _uuid.uuid4().hex
-    _bounce_jobs[job_id] = {'status': 'running', 'result': None}
-
-    def _run_bounce_scan(job_id, smtp_config_id, since_date):
-        try:
-            from email_service import check_bounce_and_update
-            result = check_bounce_and_update(int(smtp_config_id), since_date)
-            _bounce_jobs[job_id] = {'status': 'done', 'result': result}
-        except Exception as e:
-            err_msg = str(e)
-            print(f"[bounce_scan_thread] Error: {err_msg}")
-            _bounce_jobs[job_id] = {
-                'status': 'error',
-                'result': {'success': False, 'message': f'반송 검사 실패: {err_msg}'}
-            }
-
-    import threading
-    t = threading.Thread(target=_run_bounce_scan, args=(job_id, smtp_config_id, since_date), daemon=True)
-    t.start()
+    # 작업 큐에 등록 (어느 프로세스의 워커든 처리 가능)
+    job_id = enqueue_email_job('bounce_scan', {'smtp_config_id': config_ids, 'since_date': since_date})
 
     return jsonify({'success': True, 'job_id': job_id, 'status': 'running',
                     'message': 'IMAP 스캔이 시작되었습니다. 잠시 후 결과를 확인하세요.'})
@@ -10632,10 +12082,10 @@ def api_bounce_job_status(job_id):
     """check-bounces 백그라운드 작업 상태 조회"""
     if 'user_id' not in session:
         return jsonify({'success': False, 'message': '로그인이 필요합니다.'}), 401
-    job = _bounce_jobs.get(job_id)
-    if not job:
+    job = get_email_job(job_id)
+    if not job or job['job_type'] != 'bounce_scan':
         return jsonify({'success': False, 'message': '작업을 찾을 수 없습니다.'}), 404
-    return jsonify({'success': True, 'status': job['status'], 'result': job.get('result')})
+    return jsonify({'success': True, 'status': job['status'], 'result': job['result']})
 
 
 @app.route('/api/email/bounced-emails', methods=['GET'])
@@ -10837,12 +12287,14 @@ def api_email_recover_bounce():
         # 3. 로그 기록
         cursor.execute('''
             INSERT INTO email_send_log 
-            (batch_id, biz_no, email, status, sent_at, error_msg)
-            VALUES (?, ?, ?, ?, ?, ?)
-        ''', (f'RECOVER-{datetime.now().timestamp()}', biz_no, before['email'], 
+            (batch_id, biz_no, email, email_lower, status, sent_at, error_msg)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        ''', (f'RECOVER-{datetime.now().timestamp()}', biz_no, before['email'], normalize_email(before['email']), 
               'RECOVERED', datetime.now().isoformat(), f"반송 복구 시도 (이전상태: {before['last_send_status']})"))
         
         conn.commit()
+        CompanyProfile.invalidate(biz_no)
+        CompanyProfile.invalidate(raw_biz_no)
         
         # 4. 사후 검증 (최종 확인)
         cursor.execute(query_check, (biz_no, biz_no))
@@ -10908,6 +12360,11 @@ def api_email_bulk_recover_bounces():
             recovered_count = cursor.rowcount
         
         conn.commit()
+        if action == 'all':
+            CompanyProfile.invalidate()
+        else:
+            for biz_no in biz_nos:
+                CompanyProfile.invalidate(biz_no)
         
         return jsonify({
             'success': True,
@@ -11028,6 +12485,9 @@ if __name__ == '__main__':
     except Exception as e:
         print(f"DB 초기화 중 오류 발생: {e}")
     
+    # 이메일 작업 큐 워커 (gunicorn 에서는 gunicorn.conf.py 에서 시작)
+    start_embedded_email_worker()
+
     # 서버 실행 (Production 환경에서는 debug=False 추천)
     app.run(host='0.0.0.0', port=port, debug=False)
 